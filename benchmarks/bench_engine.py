@@ -0,0 +1,233 @@
+"""
+Benchmark of the hot paths of the mazex engine on generated mazes of increasing size.
+
+Every stage is timed on its own, without any interface: loading and validating the maze, solving it,
+moving the player, moving a batch of games when numpy is installed, drawing frames to a null stream,
+and building, stepping, saving and loading replays.
+The throughput of each stage and the peak memory it allocates are displayed and can be saved as json,
+and another saved run can be given to compare the stages with it.
+
+Usage pattern: python benchmarks/bench_engine.py [--sizes 100 500 ...] [--repeat N] [--output FILE] [--compare FILE]
+"""
+
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import subprocess
+import importlib.util
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mazex.mazex import DIRECTIONS, GameBatch, GameState, MazeRenderer, ReplayIndex, draw_maze, encode_replay, generate_maze, \
+    load_maze, load_replay, maze_validator, save_maze, solve_maze
+
+
+def random_walk(maze_data: dict, moves: int, seed: int) -> tuple:
+    """
+    Playing random moves on a copy of a maze with an unlimited number of moves.
+
+    :param maze_data: Information of maze in dict format.
+    :param moves: Number of moves, moves into walls included.
+    :param seed: The seed of the random directions.
+    :return: tuple (maze_data of the game, game)
+    """
+
+    maze_data = dict(maze_data, maze=maze_data['maze'].copy(), moves=10 ** 9)
+    game = GameState(maze_data=maze_data, validated_result=maze_validator(maze_data=maze_data))
+    rnd = random.Random(seed)
+
+    for _ in range(moves):
+        game.step(direction=DIRECTIONS[rnd.randrange(4)])
+        if game.result:
+            break
+
+    return maze_data, game
+
+
+def stages(maze_data: dict, directory: str, moves: int) -> dict:
+    """
+    Returning the stages of the benchmark for a maze. Each stage is a pair of functions: the first one prepares
+    what the stage needs and is not timed, the second one takes it, runs the stage and returns the number of operations.
+
+    :param maze_data: Information of maze in dict format.
+    :param directory: A directory for the files written by the stages.
+    :param moves: Number of moves in the move, draw and replay stages, and of moves of all the games in the batch stage.
+    :return: dict {name: (setup, run, unit)}
+    """
+
+    maze_path, replay_path = os.path.join(directory, 'maze.mzx'), os.path.join(directory, 'replay.rmzx')
+    cells = maze_data['maze'].width * maze_data['maze'].height
+    save_maze(maze_data=maze_data, maze_file_path=maze_path)
+
+    _, game = random_walk(maze_data=maze_data, moves=moves, seed=1)
+    replay_data = dict(game.logs)
+    replay_data.update(maze_data, moves=10 ** 9)
+
+    def playing() -> tuple:
+        game_data = dict(maze_data, maze=maze_data['maze'].copy(), moves=10 ** 9)
+        game = GameState(maze_data=game_data, validated_result=maze_validator(maze_data=game_data))
+        rnd = random.Random(2)
+        return game_data, game, [DIRECTIONS[rnd.randrange(4)] for _ in range(moves)]
+
+    def move(state: tuple) -> int:
+        game_data, game, directions = state
+        for direction in directions:
+            game.step(direction=direction)
+        return len(directions)
+
+    def batch_playing() -> tuple:
+        import numpy as np
+
+        game_data = dict(maze_data, moves=10 ** 9)
+        batch = GameBatch(maze_data=game_data, validated_result=maze_validator(maze_data=game_data), size=1024)
+        return batch, np.random.default_rng(4).integers(0, 4, (max(1, moves // 1024), 1024))
+
+    def batch_move(state: tuple) -> int:
+        batch, actions = state
+        for step_actions in actions:
+            batch.step(actions=step_actions)
+        return actions.size
+
+    def draw_full(state: tuple) -> int:
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+            draw_maze('game', state[0]['maze'], 0, 0, 0, 0)
+        return 1
+
+    def draw_moves(state: tuple) -> int:
+        game_data, game, directions = state
+        with open(os.devnull, 'w') as null:
+            renderer = MazeRenderer(stream=null)
+            draw_maze('game', game_data['maze'], game.moves, game.point, 0, 0, renderer=renderer)
+            for direction in directions:
+                game.step(direction=direction)
+                draw_maze('game', game_data['maze'], game.moves, game.point, 0, 0, renderer=renderer)
+        return len(directions)
+
+    def replay_steps(replay_index: ReplayIndex) -> int:
+        for index in range(1, replay_index.moves + 1):
+            replay_index.seek(index)
+        for index in range(replay_index.moves - 1, -1, -1):
+            replay_index.seek(index)
+        return replay_index.moves * 2
+
+    def replay_seeks(replay_index: ReplayIndex) -> int:
+        rnd = random.Random(3)
+        for _ in range(1000):
+            replay_index.seek(rnd.randrange(replay_index.moves + 1))
+        return 1000
+
+    def replay_round_trip(state: None) -> int:
+        with open(replay_path, 'wb') as replay_file:
+            replay_file.write(encode_replay(replay_data=replay_data))
+        return max(key for key in load_replay(replay_path) if isinstance(key, int))
+
+    batch = {'batch move': (batch_playing, batch_move, 'moves')} if importlib.util.find_spec('numpy') else {}
+
+    return {
+        'load_maze': (lambda: None, lambda state: load_maze(maze_path) and cells, 'cells'),
+        'maze_validator': (lambda: None, lambda state: maze_validator(maze_data=maze_data) and cells, 'cells'),
+        'solve_maze': (lambda: None, lambda state: solve_maze(maze_data=maze_data) and cells, 'cells'),
+        'move': (playing, move, 'moves'),
+        **batch,
+        'draw_maze full': (playing, draw_full, 'frames'),
+        'draw_maze moves': (playing, draw_moves, 'frames'),
+        'replay index': (lambda: None, lambda state: ReplayIndex(replay_data=replay_data).moves, 'moves'),
+        'replay steps': (lambda: ReplayIndex(replay_data=replay_data), replay_steps, 'moves'),
+        'replay seeks': (lambda: ReplayIndex(replay_data=replay_data), replay_seeks, 'seeks'),
+        'replay save/load': (lambda: None, replay_round_trip, 'moves'),
+    }
+
+
+def measure(setup: callable, run: callable, repeat: int) -> tuple:
+    """
+    Timing a stage several times and measuring the peak memory it allocates in one more run.
+
+    :param setup: The function that prepares the stage.
+    :param run: The function that runs the stage and returns the number of operations.
+    :param repeat: Number of timed runs.
+    :return: tuple (best time in seconds, number of operations, peak memory in bytes)
+    """
+
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        operations = run(state)
+        times.append(time.perf_counter() - start)
+
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return min(times), operations, peak_memory
+
+
+def commit() -> str:
+    """
+    Returning the git commit of the repository, or None outside of a git repository.
+
+    :return: str
+    """
+
+    output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    return output.stdout.strip() or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the hot paths of the mazex engine.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 1000, 2000, 5000],
+                        help='Widths and heights of the generated mazes.')
+    parser.add_argument('--moves', type=int, default=10000, help='Number of moves in the move, draw and replay stages.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs of each stage, the best one is kept.')
+    parser.add_argument('--output', type=str, default=None, help='Saving the results in a json file.')
+    parser.add_argument('--compare', type=str, default=None, help='A json file of an earlier run to compare with.')
+    options = parser.parse_args()
+
+    baseline = {}
+    if options.compare:
+        with open(options.compare) as compare_file:
+            baseline = {(result['size'], result['stage']): result for result in json.load(compare_file)['results']}
+
+    results = []
+    print(f"{'size':>6} {'stage':<18} {'best ms':>10} {'throughput':>22} {'peak MB':>9}" + (' speedup' if baseline else ''))
+
+    for size in options.sizes:
+        start = time.perf_counter()
+        maze_data = generate_maze(width=size, height=size, seed=size, points=size // 10)
+        print(f"{size:>6} {'generate_maze':<18} {(time.perf_counter() - start) * 1000:>10.1f}")
+
+        with tempfile.TemporaryDirectory() as directory:
+            for stage, (setup, run, unit) in stages(maze_data=maze_data, directory=directory, moves=options.moves).items():
+                seconds, operations, peak_memory = measure(setup=setup, run=run, repeat=options.repeat)
+                result = {'size': size, 'stage': stage, 'seconds': seconds, 'operations': operations, 'unit': unit,
+                          'throughput': operations / seconds if seconds else None, 'peak_memory': peak_memory}
+                results.append(result)
+
+                compared = ''
+                if (size, stage) in baseline:
+                    compared = f" {baseline[(size, stage)]['seconds'] / seconds:>7.2f}x"
+                throughput = f"{result['throughput']:,.0f} {unit}/s" if seconds else '-'
+                print(f"{size:>6} {stage:<18} {seconds * 1000:>10.1f} {throughput:>22} {peak_memory / 2 ** 20:>9.1f}{compared}")
+
+    if options.output:
+        report = {'commit': commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                  'moves': options.moves, 'repeat': options.repeat, 'results': results}
+        with open(options.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Startup time benchmark of the mazex command line.
+
+Every command is started again and again in a fresh interpreter, like the scripts that call
+'mazex info' and 'mazex make' in a loop do, and the wall time of each run is measured.
+
+Usage pattern: python benchmarks/bench_startup.py [--runs N]
+"""
+
+
+import sys
+import json
+import time
+import pickle
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def time_command(args: list, runs: int) -> list:
+    """
+    Running a command several times in a new interpreter and measuring the wall time of each run.
+
+    :param args: Arguments passed to the python interpreter.
+    :param runs: Number of runs.
+    :return: list of times in seconds
+    """
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def imported_packages() -> list:
+    """
+    Returning the packages outside of the standard library that importing mazex loads.
+
+    :return: list
+    """
+
+    code = 'import sys, json; import mazex.mazex; stdlib = getattr(sys, "stdlib_module_names", ()); ' \
+           'packages = {m.split(".")[0] for m in sys.modules if not m.startswith("_")}; ' \
+           'print(json.dumps(sorted(packages - set(stdlib) - set(sys.builtin_module_names))))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Startup time benchmark of the mazex command line.')
+    parser.add_argument('--runs', type=int, default=20, help='Number of runs of each command.')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(ROOT / 'mazes' / 'football_maze.mzx', 'rb') as maze_file:
+            maze_data = pickle.load(maze_file)
+        (Path(directory) / 'maze.txt').write_text('\n'.join(''.join(line) for line in maze_data.pop('maze')))
+        (Path(directory) / 'maze.json').write_text(json.dumps(maze_data))
+
+        commands = {
+            'python -c pass': ['-c', 'pass'],
+            'mazex version': ['-m', 'mazex.mazex', 'version'],
+            'mazex info': ['-m', 'mazex.mazex', 'info', 'mazes/football_maze.mzx'],
+            'mazex make': ['-m', 'mazex.mazex', 'make', f'{directory}/maze.txt', f'{directory}/maze.json',
+                           f'{directory}/exists.mzx'],
+        }
+        (Path(directory) / 'exists.mzx').touch()
+
+        print(f"{'command':<16} {'median ms':>10} {'min ms':>10}")
+        for name, args in commands.items():
+            times = time_command(args=args, runs=options.runs)
+            print(f'{name:<16} {statistics.median(times) * 1000:>10.1f} {min(times) * 1000:>10.1f}')
+
+    print(f'Packages loaded by importing mazex: {", ".join(imported_packages())}')
+
+
+if __name__ == '__main__':
+    main()
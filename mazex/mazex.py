@@ -5,42 +5,52 @@ Github repo: https://github.com/mimseyedi/mazex
 """
 
 
+import io
 import os
 import sys
 import json
+import math
 import click
 import pickle
-import subprocess
+import random
+import time
+import zlib
+import struct
+import contextlib
+import unicodedata
+import importlib.util
+from array import array
 from pathlib import Path
-try:
-    from prompt_toolkit.styles import Style
-    from prompt_toolkit import PromptSession
-    from prompt_toolkit.formatted_text import HTML
-    from prompt_toolkit.completion import PathCompleter
-    from prompt_toolkit.shortcuts import input_dialog, yes_no_dialog
-    from prompt_toolkit.key_binding.bindings.basic import load_basic_bindings
-except ModuleNotFoundError:
-    subprocess.run([sys.executable, "-m", "pip", "install", "prompt-toolkit==3.0.16"], stdout=subprocess.DEVNULL)
-except ImportError:
-    subprocess.run([sys.executable, "-m", "pip", "install", "prompt-toolkit==3.0.16"], stdout=subprocess.DEVNULL)
-finally:
-    from prompt_toolkit.styles import Style
-    from prompt_toolkit import PromptSession
-    from prompt_toolkit.formatted_text import HTML
-    from prompt_toolkit.completion import PathCompleter
-    from prompt_toolkit.shortcuts import input_dialog, yes_no_dialog
-    from prompt_toolkit.key_binding.bindings.basic import load_basic_bindings
+from itertools import chain
+from functools import lru_cache
+
+
+MAZE_MAGIC, MAZE_VERSION = b'MZX\x00', 2
+REPLAY_MAGIC, REPLAY_VERSION = b'RMZ\x00', 2
+DIRECTIONS = [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
+DIRECTION_NAMES = ['up', 'down', 'left', 'right']
+EMPTY_EVENT, WALL_EVENT, POINT_EVENT, RIDDLE_EVENT, KEY_EVENT, DOOR_EVENT, GOAL_EVENT = range(7)
+
+# The number of cells from which shortest_distances moves a frontier with NumPy arrays instead of one cell at a time.
+WIDE_FRONTIER = 64
+
+# The MazeProfiler that times the stages of the run and replay commands, or None when they are not profiled.
+PROFILER = None
 
 
 @click.group()
-def main() -> None:
+@click.option('--cache', is_flag=True, help='Keep the results of checking and solving the files in ~/.cache/mazex.')
+def main(cache: bool) -> None:
     """
     mazex is a simple terminal game in which you have to find the right way to reach the key and after opening the door,
     get to the goal with the least possible movement.\n
     You can also easily create your desired maze under the specified rules and protocols and send it to your friends and challenge them!\n
     For more information and contribution: https://github.com/mimseyedi/mazex
     """
-    pass
+
+    # The worker processes of the bulk commands find the cache through the environment too.
+    if cache and not os.environ.get('MAZEX_CACHE'):
+        os.environ['MAZEX_CACHE'] = MazeCache.default_path()
 
 
 @main.command('make')
@@ -57,38 +67,172 @@ def make(args: list) -> None:
 
 @main.command('run')
 @click.argument('maze_file_path', nargs=1, type=str)
-def run(maze_file_path: str) -> None:
+@click.option('--time-limit', type=float, default=None,
+              help='Seconds that the whole game can take (time attack).')
+@click.option('--move-time', type=float, default=None,
+              help='Seconds that each move can take.')
+@click.option('--profile', is_flag=True, help='Time the stages of every frame and display their percentiles at the end.')
+@click.option('--trace', 'trace_file_path', type=str, default=None, help='Save the timings in a trace file (implies --profile).')
+def run(maze_file_path: str, time_limit: float, move_time: float, profile: bool, trace_file_path: str) -> None:
     """
     Running a valid maze file and starting the game and challenge.
 
-    Usage pattern: mazex run [maze file path]
+    Usage pattern: mazex run [maze file path] [--time-limit seconds] [--move-time seconds] [--profile] [--trace trace.json]
     """
 
-    run_game(maze_file_path=maze_file_path)
+    with profiling(enabled=profile or trace_file_path is not None, trace_file_path=trace_file_path):
+        run_game(maze_file_path=maze_file_path, time_limit=time_limit, move_time=move_time)
 
 
 @main.command('replay')
 @click.argument('replay_file_path', nargs=1, type=str)
-def replay(replay_file_path: str) -> None:
+@click.option('--autoplay', is_flag=True, help='Play the moves from the start, space also plays and pauses them.')
+@click.option('--fps', type=float, default=10.0, help='Number of moves played per second.')
+@click.option('--export', 'cast_file_path', type=str, default=None,
+              help='Save the replay as an asciicast recording with the .cast suffix instead of opening it.')
+@click.option('--width', type=int, default=80, help='Width of the terminal of the exported recording.')
+@click.option('--height', type=int, default=24, help='Height of the terminal of the exported recording.')
+@click.option('--annotate', is_flag=True, help='Show the moves wasted by each move, compared to the best way to the goal.')
+@click.option('--profile', is_flag=True, help='Time the stages of every frame and display their percentiles at the end.')
+@click.option('--trace', 'trace_file_path', type=str, default=None, help='Save the timings in a trace file (implies --profile).')
+def replay(replay_file_path: str, autoplay: bool, fps: float, cast_file_path: str, width: int, height: int,
+           annotate: bool, profile: bool, trace_file_path: str) -> None:
     """
     Running the replay file to watch and check the movements of the recorded game.
 
-    Usage pattern: mazex replay [replay file path]
+    Usage pattern: mazex replay [replay file path] [--autoplay] [--fps N] [--export out.cast] [--annotate] [--profile] [--trace trace.json]
     """
 
-    run_replay(replay_file_path=replay_file_path)
+    if cast_file_path is not None:
+        export_replay(replay_file_path=replay_file_path, cast_file_path=cast_file_path, fps=fps, width=width, height=height,
+                      annotate=annotate)
+        return
+
+    with profiling(enabled=profile or trace_file_path is not None, trace_file_path=trace_file_path):
+        run_replay(replay_file_path=replay_file_path, autoplay=autoplay, fps=fps, annotate=annotate)
 
 
 @main.command('info')
+@click.argument('paths', nargs=-1, required=True, type=str)
+@click.option('--jobs', type=int, default=None, help='Number of worker processes (default: number of cores).')
+@click.option('--json', 'json_output', is_flag=True, help='Write one json object per maze instead of text.')
+def info(paths: list, jobs: int, json_output: bool) -> None:
+    """
+    Display complete information of a maze file, or a line of information for each maze of many files,
+    directories and glob patterns.
+
+    Usage pattern: mazex info [maze file paths, directories or patterns] [--jobs N] [--json]
+    """
+
+    import glob
+
+    if len(paths) == 1 and not json_output and not Path(paths[0]).is_dir() and not glob.has_magic(paths[0]):
+        valid = get_maze_info(maze_file_path=paths[0])
+    else:
+        valid = inspect_maze_files(paths=paths, lint=False, jobs=jobs, json_output=json_output)
+
+    if not valid:
+        sys.exit(1)
+
+
+@main.command('lint')
+@click.argument('paths', nargs=-1, required=True, type=str)
+@click.option('--jobs', type=int, default=None, help='Number of worker processes (default: number of cores).')
+@click.option('--json', 'json_output', is_flag=True, help='Write one json object per maze instead of text.')
+def lint(paths: list, jobs: int, json_output: bool) -> None:
+    """
+    Checking maze files, directories and glob patterns, and displaying every problem of each maze,
+    including the mazes that cannot be won.
+
+    Usage pattern: mazex lint [maze file paths, directories or patterns] [--jobs N] [--json]
+    """
+
+    if not inspect_maze_files(paths=paths, lint=True, jobs=jobs, json_output=json_output):
+        sys.exit(1)
+
+
+@main.command('solve')
+@click.argument('maze_file_path', nargs=1, type=str)
+@click.option('--points', is_flag=True, help='Also find the most points that can be taken within the moves, and a route.')
+def solve(maze_file_path: str, points: bool) -> None:
+    """
+    Calculating the minimum number of moves needed to win a maze file.
+
+    Usage pattern: mazex solve [maze file path] [--points]
+    """
+
+    solve_maze_file(maze_file_path=maze_file_path, points=points)
+
+
+@main.command('convert')
+@click.argument('args', nargs=2, type=str)
+def convert(args: list) -> None:
+    """
+    Converting a maze file made by an older version of mazex to the current format.
+
+    Usage pattern: mazex convert [maze file path] [output maze file path with .mzx suffix]
+    """
+
+    convert_maze_file(maze_file_path=args[0], output_file_path=args[1])
+
+
+@main.command('generate')
 @click.argument('maze_file_path', nargs=1, type=str)
-def info(maze_file_path: str) -> None:
+@click.option('--width', type=int, default=41, help='Width of the maze in cells.')
+@click.option('--height', type=int, default=21, help='Height of the maze in cells.')
+@click.option('--algorithm', type=click.Choice(['backtracker', 'kruskal', 'wilson', 'sidewinder']), default='backtracker',
+              help='The algorithm that carves the maze.')
+@click.option('--braid', type=float, default=0.0, help='The fraction of dead ends that are opened to make loops.')
+@click.option('--points', type=int, default=0, help='Number of points.')
+@click.option('--riddles', type=int, default=0, help='Number of riddles.')
+@click.option('--slack', type=float, default=0.25, help='Moves allowed more than the minimum, as a fraction of it.')
+@click.option('--seed', type=int, default=None, help='The seed of the random numbers, to make the same maze again.')
+def generate(maze_file_path: str, width: int, height: int, algorithm: str, braid: float, points: int, riddles: int,
+             slack: float, seed: int) -> None:
+    """
+    Generating a random maze file.
+
+    Usage pattern: mazex generate [maze file path with .mzx suffix] [--width W] [--height H] [--algorithm A] [--seed S] ...
+    """
+
+    generate_maze_file(maze_file_path=maze_file_path, width=width, height=height, algorithm=algorithm, braid=braid,
+                       points=points, riddles=riddles, slack=slack, seed=seed)
+
+
+@main.command('verify')
+@click.argument('paths', nargs=-1, required=True, type=str)
+@click.option('--maze', 'maze_file_path', type=str, default=None, help='The maze file that every replay must be played on.')
+@click.option('--jobs', type=int, default=None, help='Number of worker processes (default: number of cores).')
+@click.option('--json', 'json_output', is_flag=True, help='Write one json object per replay instead of text.')
+def verify(paths: list, maze_file_path: str, jobs: int, json_output: bool) -> None:
+    """
+    Checking replay files by playing their moves again with the rules of the game, without any interface.
+
+    Usage pattern: mazex verify [replay file or directory paths] [--maze maze file path] [--jobs N] [--json]
+    """
+
+    if not verify_replay_files(paths=paths, maze_file_path=maze_file_path, jobs=jobs, json_output=json_output):
+        sys.exit(1)
+
+
+@main.command('tournament')
+@click.argument('maze_directory', nargs=1, type=str)
+@click.argument('agents', nargs=-1, required=True, type=str)
+@click.option('--jobs', type=int, default=None, help='Number of worker processes (default: number of cores).')
+@click.option('--json', 'json_output', is_flag=True, help='Write one json object per run instead of text.')
+@click.option('--replays', 'replay_directory', type=str, default=None, help='A directory to save the replay of every run in.')
+@click.option('--time-limit', type=float, default=60.0, help='Seconds that each run can take before it is stopped.')
+def tournament(maze_directory: str, agents: list, jobs: int, json_output: bool, replay_directory: str,
+               time_limit: float) -> None:
     """
-    Display complete information of a maze file.
+    Playing every agent script on every maze of a directory, without any interface.
 
-    Usage pattern: mazex info [maze file path]
+    Usage pattern: mazex tournament [maze directory] [agent scripts...] [--jobs N] [--json] [--replays directory] [--time-limit S]
     """
 
-    get_maze_info(maze_file_path=maze_file_path)
+    if not run_tournament(maze_directory=maze_directory, agent_paths=agents, jobs=jobs, json_output=json_output,
+                          replay_directory=replay_directory, time_limit=time_limit):
+        sys.exit(1)
 
 
 @main.command('version')
@@ -100,77 +244,115 @@ def version() -> None:
     click.echo('1.0.0')
 
 
-def run_game(maze_file_path: str) -> None:
+def run_game(maze_file_path: str, time_limit: float=None, move_time: float=None) -> None:
     """
     This function checks the maze file and runs the game after confirmation.
+    The game is one full-screen application whose key bindings move the player directly. It runs on an asyncio
+    event loop, where the clock of the timed modes is a task next to the input and the rendering of prompt_toolkit.
 
     :param maze_file_path: Path of maze file in string.
+    :param time_limit: Seconds that the whole game can take (time attack), or None.
+    :param move_time: Seconds that each move can take, or None.
     :return: None
     """
 
+    if not interface_validator():
+        return
+
+    if any(limit is not None and not limit > 0 for limit in [time_limit, move_time]):
+        print("Error: The time limits must be positive numbers of seconds!")
+        return
+
     if path_validator(path=maze_file_path, suffix='.mzx'):
         maze_data = load_maze(maze_file_path=maze_file_path)
-        validated_result = maze_validator(maze_data=maze_data)
+        validated_result = maze_validator(maze_data=maze_data, file_path=maze_file_path)
 
         if validated_result:
-            logs = {}
-            player_location, key_location, goal_location, total_point = validated_result
-            session = PromptSession()
-            moves_counter, is_key, point = maze_data['moves'], True, 0
-
-            logs[maze_data['moves'] - moves_counter] = add_log(log_type='empty_loc',
-                                                               log=[[player_location[0], player_location[1]]])
-            while True:
-                if moves_counter == 0:
-                    logs[maze_data['moves'] - moves_counter] = add_log(log_type='lose',
-                                                                         log=[[player_location[0], player_location[1]]])
-                    maze_data = load_maze(maze_file_path)
-                    logs.update(maze_data)
-                    game_over(mode='lose', logs=logs)
-                    clear_screen()
-                    break
-
-                clear_screen()
-                draw_maze('game', maze_data['maze'], moves_counter, point, total_point, 0)
-
-                prompt = session.prompt(key_bindings=game_bindings, bottom_toolbar=game_toolbar())
-
-                if prompt == 'up':
-                    player_location, moves_counter, current_point, logs = move(maze_data, player_location, moves_counter, [1, 0, 0, 0], logs)
-                    point += current_point
-                elif prompt == 'down':
-                    player_location, moves_counter, current_point, logs = move(maze_data, player_location, moves_counter, [0, 1, 0, 0], logs)
-                    point += current_point
-                elif prompt == 'left':
-                    player_location, moves_counter, current_point, logs = move(maze_data, player_location, moves_counter, [0, 0, 1, 0], logs)
-                    point += current_point
-                elif prompt == 'right':
-                    player_location, moves_counter, current_point, logs = move(maze_data, player_location, moves_counter, [0, 0, 0, 1], logs)
-                    point += current_point
-                elif prompt == 'exit':
-                    exit_code = exit_the_game()
-                    if exit_code:
-                        clear_screen()
-                        break
-
-                if player_location == goal_location:
-                    logs[maze_data['moves'] - moves_counter] = add_log(log_type='win',
-                                                                         log=[[player_location[0], player_location[1]]])
-                    maze_data = load_maze(maze_file_path)
-                    logs.update(maze_data)
-
-                    game_over(mode='win', logs=logs, details=[moves_counter, point, total_point])
-                    clear_screen()
-                    break
+            game = GameState(maze_data=dict(maze_data, maze=maze_data['maze'].copy()), validated_result=validated_result)
+            game_step = profiled('step', game.step)
+            clock = GameClock(time_limit=time_limit, move_time=move_time)
+            distances, hint_message = None, None
+
+            def maze_distances() -> MazeDistances:
+                # The fields are only built when a hint or the report of the game needs them.
+                nonlocal distances
+
+                if distances is None:
+                    distances = MazeDistances(maze_data=maze_data, validated_result=validated_result, file_path=maze_file_path)
+                return distances
+
+            def step(direction: list, user_answer: str=None) -> None:
+                nonlocal hint_message
+
+                if game.result:
+                    return
+
+                hint_message = None
+                if game_step(direction=direction, answer=user_answer)[0] != 'wall':
+                    clock.moved()
+                if game.result:
+                    app.exit(result=game.result)
+
+            def answer_riddle(direction: list, user_answer: str, asked: float) -> None:
+                if PROFILER is not None:
+                    PROFILER.record('riddle', asked)
+                step(direction, user_answer)
+
+            def request_step(direction: list) -> None:
+                player_location = game.player
+                target = [player_location[0] - direction[0] + direction[1], player_location[1] - direction[2] + direction[3]]
+
+                if game.grid[target[0], target[1]] == '?':
+                    question, answer = get_riddle(maze_data=maze_data, riddle_location=target, events=game.events)
+                    riddle_dialog(app=app, question=question,
+                                  on_answer=lambda user_answer, asked=time.perf_counter(): answer_riddle(direction, user_answer, asked))
+                else:
+                    step(direction)
 
-                if player_location == key_location and is_key:
-                    is_key = False
-                    door_location = maze_data['door']
-                    maze_data['maze'][door_location[0]].pop(door_location[1])
-                    maze_data['maze'][door_location[0]].insert(door_location[1], ' ')
+            def show_hint() -> None:
+                nonlocal hint_message
 
-                    logs[maze_data['moves'] - moves_counter] = add_log(log_type='key',
-                                                                         log=[[player_location[0], player_location[1]]])
+                has_key = not game.is_key
+                direction = maze_distances().hint(location=game.player, has_key=has_key)
+                if direction is None:
+                    hint_message = 'There is no way to the goal from here!'
+                else:
+                    hint_message = f'Hint: {DIRECTION_NAMES[direction]} - ' \
+                                   f'{maze_distances().remaining(location=game.player, has_key=has_key)} moves to the goal'
+
+            def time_out() -> None:
+                game.time_out()
+                app.exit(result=game.result)
+
+            from prompt_toolkit.key_binding import KeyBindings
+
+            bindings, playing = KeyBindings(), ~dialog_is_open()
+            for key, direction in [('up', [1, 0, 0, 0]), ('down', [0, 1, 0, 0]), ('left', [0, 0, 1, 0]), ('right', [0, 0, 0, 1])]:
+                bindings.add(key, filter=playing)(lambda event, direction=direction: request_step(direction))
+            bindings.add('h', filter=playing)(lambda event: show_hint())
+            bindings.add('c-c', filter=playing)(lambda event: exit_dialog(app=app))
+
+            camera = MazeCamera(grid=game.grid, width=80, height=24, wall=maze_data['wall'],
+                                markers=[(maze_data['key'], game.key), (maze_data['goal'], game.goal)])
+            app = maze_application(status=lambda: maze_status('game', game.moves, game.point, game.total_point, 0,
+                                                              seconds=clock.remaining()),
+                                   grid=game.grid, toolbar=lambda: hint_message or game_toolbar(), key_bindings=bindings,
+                                   camera=camera, focus=lambda: game.player)
+
+            tasks = [lambda: clock.run(app=app, on_time_out=time_out)] if clock.timed else []
+            end_mode = game.result or run_application(app=app, tasks=tasks)
+
+            if end_mode in ['win', 'lose']:
+                details = [game.moves, game.point, game.total_point]
+                if end_mode == 'win' and game.total_point:
+                    route = point_route(maze_data=maze_data, validated_result=validated_result,
+                                        file_path=maze_file_path, search=False)
+                    details.append(route['points'] if route is not None else None)
+
+                logs = game.logs
+                logs.update(maze_data)
+                game_over(mode=end_mode, logs=logs, details=details, actions=(game.directions, game.answers))
+                print('\n'.join(wasted_moves_report(distances=maze_distances(), logs=logs)))
 
     else:
         print(f"Error: '{maze_file_path}' is not valid!")
@@ -190,7 +372,7 @@ def make_maze_file(txt_maze_path: str, json_maze_path, maze_file_path: str) -> N
 
     if path_validator(path=txt_maze_path, suffix='.txt'):
         with open(txt_maze_path, 'r') as txt_maze_file:
-            maze = [list(line.strip()) for line in txt_maze_file.readlines()]
+            maze = MazeGrid.from_lines([line.strip() for line in txt_maze_file.readlines()])
     else:
         print(f"Error: '{txt_maze_path}' is not valid!")
         return
@@ -204,12 +386,12 @@ def make_maze_file(txt_maze_path: str, json_maze_path, maze_file_path: str) -> N
         print(f"Error: '{json_maze_path}' is not valid!")
         return
 
-    if maze_validator(maze_data=maze_data):
+    validated_result = maze_validator(maze_data=maze_data)
+
+    if validated_result and solvability_validator(maze_data=maze_data, validated_result=validated_result):
         if maze_file_path.endswith('.mzx'):
             if not Path(maze_file_path).exists():
-                with open(maze_file_path, 'wb') as maze_file:
-                    pickle.dump(maze_data, maze_file)
-
+                save_maze(maze_data=maze_data, maze_file_path=maze_file_path)
                 print(f"The maze file was created successfully!")
             else:
                 print(f"Error: '{maze_file_path}' already exists!")
@@ -217,672 +399,3276 @@ def make_maze_file(txt_maze_path: str, json_maze_path, maze_file_path: str) -> N
             print("Error: The output file must have the .mzx suffix!")
 
 
-def load_maze(maze_file_path: str) -> dict:
+def convert_maze_file(maze_file_path: str, output_file_path: str) -> None:
     """
-    This function loads the maze file and returns its information.
+    This function loads a maze file in any supported format, checks it and saves it in the current format.
 
     :param maze_file_path: Path of maze file in string.
-    :return: dict
+    :param output_file_path: Path of output file with .mzx suffix in string.
+    :return: None
     """
 
-    with open(maze_file_path, 'rb') as maze_file:
-        maze_data = pickle.load(maze_file)
+    if not path_validator(path=maze_file_path, suffix='.mzx'):
+        print(f"Error: '{maze_file_path}' is not valid!")
+        return
 
-    return maze_data
+    maze_data = load_maze(maze_file_path=maze_file_path)
+
+    if maze_validator(maze_data=maze_data, file_path=maze_file_path):
+        if output_file_path.endswith('.mzx'):
+            if not Path(output_file_path).exists():
+                save_maze(maze_data=maze_data, maze_file_path=output_file_path)
+                print(f"The maze file was converted successfully!")
+            else:
+                print(f"Error: '{output_file_path}' already exists!")
+        else:
+            print("Error: The output file must have the .mzx suffix!")
 
 
-def maze_validator(maze_data: dict) -> bool:
+def generate_maze_file(maze_file_path: str, width: int, height: int, algorithm: str, braid: float, points: int,
+                       riddles: int, slack: float, seed: int) -> None:
     """
-    This function evaluates the maze information and approves it if there is no problem and rejects it otherwise.
+    This function generates a random maze with the rules of maze_validator and saves it in a file executable by the run command.
 
-    :param maze_data: maze information in dict format.
-    :return: bool
+    :param maze_file_path: Path of output file with .mzx suffix in string.
+    :param width: Width of the maze in cells, rounded down to an odd number.
+    :param height: Height of the maze in cells, rounded down to an odd number.
+    :param algorithm: The algorithm that carves the maze: 'backtracker', 'kruskal', 'wilson' or 'sidewinder'.
+    :param braid: The fraction of dead ends that are opened to make loops, from 0 to 1.
+    :param points: Number of points in the maze.
+    :param riddles: Number of riddles in the maze.
+    :param slack: The moves allowed more than the minimum number of moves needed to win, as a fraction of it.
+    :param seed: The seed of the random numbers, a random seed is chosen if it is None.
+    :return: None
     """
 
-    def keys_validator() -> bool:
-        """
-        The task of this function is to check the dictionary keys containing the information of the maze.
-
-        :return: bool
-        """
-
-        signs = set()
-        for key in ['maze', 'player', 'wall', 'goal', 'moves', 'key', 'door', 'point']:
-            if key not in maze_data.keys():
-                print(f"Error: The {key} key is one of the essential keys and must be there!")
-                return False
-
-            if key in ['player', 'wall', 'key', 'goal', 'point']:
-                if not isinstance(maze_data[key], str):
-                    print(f"Error: The sign of the {key} key must be of the string type!")
-                    return False
+    if not maze_file_path.endswith('.mzx'):
+        print("Error: The output file must have the .mzx suffix!")
+        return
+    if Path(maze_file_path).exists():
+        print(f"Error: '{maze_file_path}' already exists!")
+        return
+    if width < 5 or height < 5:
+        print("Error: The width and the height of the maze must be at least 5!")
+        return
+    if not 0 <= braid <= 1 or slack < 0 or points < 0 or riddles < 0:
+        print("Error: The braid must be between 0 and 1, and the slack, points and riddles cannot be negative!")
+        return
+    if points + riddles > ((width - 1) // 2) * ((height - 1) // 2) - 3:
+        print("Error: There is not enough room in the maze for this number of points and riddles!")
+        return
+    if algorithm == 'sidewinder' and importlib.util.find_spec('numpy') is None:
+        print("Error: The sidewinder algorithm needs numpy! (python3 -m pip install mazex[batch])")
+        return
 
-                if len(maze_data[key]) != 1:
-                    print(f"Error: The sign of the {key} key must be a character!")
-                    return False
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    maze_data = generate_maze(width=width, height=height, algorithm=algorithm, braid=braid, points=points,
+                              riddles=riddles, slack=slack, seed=seed)
+    save_maze(maze_data=maze_data, maze_file_path=maze_file_path)
+    print(f"The maze file was created successfully! (seed: {seed}, number of moves: {maze_data['moves']})")
 
-                signs.add(maze_data[key])
 
-        if len(signs) != 5:
-            print(f"Error: One sign is used for two keys and this is unacceptable!")
-            return False
+def generate_maze(width: int, height: int, algorithm: str='backtracker', braid: float=0.0, points: int=0,
+                  riddles: int=0, slack: float=0.25, seed: int=None) -> dict:
+    """
+    This function generates the information of a random maze in dict format. The same arguments always make the same maze.
+    The goal is put in a dead end whose only opening becomes the door, the player in the cell farthest from the door
+    and the key in the cell farthest from the player. The number of moves is the minimum number of moves needed to win
+    plus the slack. The sidewinder mazes are also searched with NumPy arrays, see frontier_search.
+
+    :param width: Width of the maze in cells, rounded down to an odd number.
+    :param height: Height of the maze in cells, rounded down to an odd number.
+    :param algorithm: The algorithm that carves the maze: 'backtracker', 'kruskal', 'wilson' or 'sidewinder'.
+    :param braid: The fraction of dead ends that are opened to make loops, from 0 to 1.
+    :param points: Number of points in the maze.
+    :param riddles: Number of riddles in the maze.
+    :param slack: The moves allowed more than the minimum number of moves needed to win, as a fraction of it.
+    :param seed: The seed of the random numbers.
+    :return: dict
+    """
 
-        return True
+    generators = {'backtracker': backtracker_maze, 'kruskal': kruskal_maze, 'wilson': wilson_maze,
+                  'sidewinder': sidewinder_maze}
+    rooms_x, rooms_y = (width - 1) // 2, (height - 1) // 2
+    width, stride = rooms_x * 2 + 1, rooms_x * 2 + 3
+    rnd = random.Random(seed)
+
+    # The maze is carved in a buffer with one more line of padding on each side, in which the rooms are the cells with
+    # two odd coordinates and the neighbour rooms of a room are two cells away. Walls are 0 and the padding is 255.
+    cells = bytearray(stride * (rooms_y * 2 + 3))
+    cells[:stride], cells[-stride:] = b'\xff' * stride, b'\xff' * stride
+    cells[::stride] = cells[stride - 1::stride] = b'\xff' * (rooms_y * 2 + 3)
+    rows = [range((y * 2 + 2) * stride + 2, (y * 2 + 3) * stride - 1, 2) for y in range(rooms_y)]
+
+    generators[algorithm](cells=cells, stride=stride, rows=rows, rnd=rnd)
+    cells[:] = cells.translate(bytes([0]) + bytes([1]) * 254 + bytes([255]))
+    vectorized = algorithm == 'sidewinder'
+
+    # The walls around a room are never padding, so the sum of the four cells next to it is its number of openings.
+    if vectorized:
+        import numpy as np
+        buffer = np.frombuffer(cells, dtype=np.uint8).reshape(-1, stride)
+        openings = buffer[1:-2:2, 2:-1:2] + buffer[3::2, 2:-1:2] + buffer[2:-1:2, 1:-2:2] + buffer[2:-1:2, 3::2]
+        dead_ends = np.flatnonzero(openings == 1)
+        del buffer, openings
+        room_y, room_x = divmod(int(dead_ends[rnd.randrange(len(dead_ends))]), rooms_x)
+        goal = rows[room_y][room_x]
+    else:
+        dead_ends = [room for room in chain.from_iterable(rows)
+                     if cells[room - stride] + cells[room + stride] + cells[room - 1] + cells[room + 1] == 1]
+        goal = dead_ends[rnd.randrange(len(dead_ends))]
+    del dead_ends
 
+    door = next(goal + step for step in (-stride, stride, -1, 1) if cells[goal + step] == 1)
+    cells[door] = 0
 
-    def wall_validator(wall_sign: str) -> bool:
-        """
-        The task of this function is to check the walls to make sure of their correct location.
+    if braid:
+        braid_maze(cells=cells, stride=stride, rows=rows, rnd=rnd, braid=braid, goal=goal)
 
-        :param wall_sign: A sign assigned to the 'wall' in one char.
-        :return: bool
-        """
+    if vectorized:
+        player = frontier_search(cells=cells, stride=stride, source=door + door - goal)[0]
+        key, key_moves = frontier_search(cells=cells, stride=stride, source=player)
+    else:
+        player = farthest_cell(cells=cells, stride=stride, source=door + door - goal)
+        key = farthest_cell(cells=cells, stride=stride, source=player)
+
+    signs = {player: 'X', key: 'K', goal: '*'}
+    while len(signs) < points + riddles + 3:
+        room = rows[rnd.randrange(rooms_y)][rnd.randrange(rooms_x)]
+        if room not in signs and cells[room] == 1:
+            signs[room] = '$' if len(signs) < points + 3 else '?'
+
+    grid = MazeGrid(width=width, height=rooms_y * 2 + 1)
+    table = bytes([grid.code('o'), grid.code(' ')]) + bytes(254)
+    for y in range(grid.height):
+        row = (y + 1) * stride + 1
+        grid.cells[y * width:(y + 1) * width] = cells[row:row + width].translate(table)
+
+    maze_data = {'maze': grid, 'player': 'X', 'wall': 'o', 'key': 'K', 'goal': '*', 'point': '$', 'moves': 0, 'riddles': [],
+                 'door': list(divmod(door - stride - 1, stride))}
+
+    for cell, sign in signs.items():
+        y, x = divmod(cell - stride - 1, stride)
+        grid[y, x] = sign
+        if sign == '?':
+            first, second = rnd.randrange(1, 100), rnd.randrange(1, 100)
+            maze_data['riddles'].append([f'How much is {first} + {second}?', str(first + second), [y, x]])
+
+    if vectorized:
+        # The only way to the goal is through the door, so the best way is to the key, back out of it to the cell in
+        # front of the door and two more moves, and the riddles and the points do not block the way.
+        min_moves = key_moves + frontier_search(cells=cells, stride=stride, source=key, target=door + door - goal)[1] + 2
+    else:
+        min_moves = search_maze(maze_data=maze_data, validated_result=maze_validator(maze_data=maze_data))[1]
+    maze_data['moves'] = min_moves + int(min_moves * slack)
 
-        for y in [0, len(maze_data['maze']) - 1]:
-            for x in range(len(maze_data['maze'][y])):
-                if maze_data['maze'][y][x] != wall_sign:
-                    print(f'Error: Lack of proper covering of the wall at [{y}, {x}]')
-                    return False
+    return maze_data
 
-        for y in range(1, len(maze_data['maze']) - 1):
-            if maze_data['maze'][y][0] != wall_sign or maze_data['maze'][y][-1] != wall_sign:
-                print(f'Error: Lack of proper covering of the wall in line {y}')
-                return False
 
-        return True
+def backtracker_maze(cells: bytearray, stride: int, rows: list, rnd: random.Random) -> None:
+    """
+    The recursive backtracker: a random walk that carves into unvisited rooms and goes back when it is stuck.
+    The way back is kept in the cells instead of a stack, as the direction that each room was entered from,
+    so the memory does not grow with the length of the walk.
+
+    :param cells: The buffer of the maze, see generate_maze.
+    :param stride: Row stride of the buffer.
+    :param rows: Indexes of the rooms in the buffer, as one range for each line of rooms.
+    :param rnd: The random number generator.
+    :return: None
+    """
 
+    steps, randrange = (-stride, stride, -1, 1), rnd.randrange
+    up, down = -stride * 2, stride * 2
+    location = rows[randrange(len(rows))][randrange(len(rows[0]))]
+    cells[location] = 5
+
+    while True:
+        options = []
+        if not cells[location + up]:
+            options.append(0)
+        if not cells[location + down]:
+            options.append(1)
+        if not cells[location - 2]:
+            options.append(2)
+        if not cells[location + 2]:
+            options.append(3)
+
+        if options:
+            direction = options[randrange(len(options))] if len(options) > 1 else options[0]
+            cells[location + steps[direction]] = 1
+            location += steps[direction] * 2
+            cells[location] = direction + 1
+        elif cells[location] == 5:
+            break
+        else:
+            location -= steps[cells[location] - 1] * 2
 
-    def pkg_validator(player_sign: str, key_sign: str, goal_sign: str) -> bool:
-        """
-        The task of this function is to check player, key and goal keys to make sure that they are correct according to the rules.
 
-        :param player_sign: A sign assigned to the 'player' in one char.
-        :param key_sign: A sign assigned to the 'key' in one char.
-        :param goal_sign: A sign assigned to the 'goal' in one char.
-        :return: bool
-        """
+def kruskal_maze(cells: bytearray, stride: int, rows: list, rnd: random.Random) -> None:
+    """
+    Randomized Kruskal's algorithm: the walls between rooms are removed in a random order
+    if the rooms on their two sides are not connected yet, which is tracked with a union-find.
 
-        player_counter, key_counter, goal_counter = 0, 0, 0
-        for y in range(len(maze_data['maze'])):
-            player_counter += maze_data['maze'][y].count(player_sign)
-            key_counter += maze_data['maze'][y].count(key_sign)
-            goal_counter += maze_data['maze'][y].count(goal_sign)
+    :param cells: The buffer of the maze, see generate_maze.
+    :param stride: Row stride of the buffer.
+    :param rows: Indexes of the rooms in the buffer, as one range for each line of rooms.
+    :param rnd: The random number generator.
+    :return: None
+    """
 
-        for sign, number in {'player': player_counter, 'key': key_counter, 'goal': goal_counter}.items():
-            if number != 1:
-                print(f'Error: The valid number of {sign} in each maze is equal to one!')
-                return False
+    walls = array('i', (room + step for room in chain.from_iterable(rows) for step in (1, stride)
+                        if cells[room + step * 2] != 255))
+    rnd.shuffle(walls)
+    parent = array('i', range(len(cells)))
 
-        return True
+    def find(room: int) -> int:
+        while parent[room] != room:
+            parent[room] = parent[parent[room]]
+            room = parent[room]
+        return room
 
+    for wall in walls:
+        step = 1 if (wall // stride) % 2 == 0 else stride
+        first, second = find(wall - step), find(wall + step)
 
-    def door_validator(door_location: list) -> bool:
-        """
-        The task of this function is to check the 'door' key to make sure that the correct place is considered for this key.
+        if first != second:
+            parent[first] = second
+            cells[wall - step] = cells[wall] = cells[wall + step] = 1
 
-        :param door_location: The location of 'door' key in [y, x] format.
-        :return: bool
-        """
 
-        if not isinstance(door_location, list) or len(door_location) != 2:
-            print(f"Error: The value provided for the door is not valid!")
-            return False
+def wilson_maze(cells: bytearray, stride: int, rows: list, rnd: random.Random) -> None:
+    """
+    Wilson's algorithm: loop-erased random walks from each room that is not in the maze yet until they hit the maze.
+    Only the last direction taken from each room of a walk is kept, which erases the loops, and the walk is then
+    carved from its start. The mazes are uniform among all the possible mazes.
+
+    :param cells: The buffer of the maze, see generate_maze.
+    :param stride: Row stride of the buffer.
+    :param rows: Indexes of the rooms in the buffer, as one range for each line of rooms.
+    :param rnd: The random number generator.
+    :return: None
+    """
 
-        try:
-            if maze_data['maze'][door_location[0]][door_location[1]] != maze_data['wall']:
-                print(f"Error: The location intended for the door must be the location of a wall!")
-                return False
-        except IndexError:
-            print(f"Error: The door location was not found in the maze!")
-            return False
-        except TypeError:
-            print(f"Error: The door location must be integers!")
+    steps, randrange = (-stride, stride, -1, 1), rnd.randrange
+    walks = bytearray(len(cells))
+    cells[rows[randrange(len(rows))][randrange(len(rows[0]))]] = 1
 
-        if door_location[0] in [0, len(maze_data['maze']) - 1] or \
-                door_location[1] in [0, len(maze_data['maze'][door_location[0]])]:
-            print(f"Error: Really? do you like to run away? The door location cannot be one of the border walls!")
-            return False
+    for start in chain.from_iterable(rows):
+        location = start
+        while not cells[location]:
+            direction = randrange(4)
+            if cells[location + steps[direction] * 2] != 255:
+                walks[location] = direction
+                location += steps[direction] * 2
 
-        return True
+        location = start
+        while not cells[location]:
+            step = steps[walks[location]]
+            cells[location] = cells[location + step] = 1
+            location += step * 2
 
 
-    def moves_validator(moves: int) -> bool:
-        """
-        The task of this function is to check the number of movements assigned to the maze and validate it.
+def sidewinder_maze(cells: bytearray, stride: int, rows: list, rnd: random.Random, block: int=256) -> None:
+    """
+    The sidewinder algorithm: the first line of rooms is one corridor, and every other line is cut into runs of rooms
+    joined from west to east, each of them opened to the north from one of its rooms chosen at random. A line does not
+    depend on the others, so the lines are carved in blocks with NumPy arrays, without a Python loop over the rooms,
+    and the memory does not grow with the height of the maze. The mazes have a long corridor at the north and no dead
+    end that points to the south. NumPy is only needed by this algorithm (python3 -m pip install mazex[batch]).
+
+    :param cells: The buffer of the maze, see generate_maze.
+    :param stride: Row stride of the buffer.
+    :param rows: Indexes of the rooms in the buffer, as one range for each line of rooms.
+    :param rnd: The random number generator.
+    :param block: Number of lines of rooms carved at once.
+    :return: None
+    """
 
-        :param moves: A positive integer indicating the number of allowed moves in a maze.
-        :return: bool
-        """
+    import numpy as np
 
-        if not isinstance(moves, int):
-            print(f"Error: The value of moves must be of integer type!")
-            return False
+    rng = np.random.default_rng(rnd.getrandbits(64))
+    grid = np.frombuffer(cells, dtype=np.uint8).reshape(-1, stride)
+    rooms_y, rooms_x = len(rows), len(rows[0])
 
-        if moves < 0:
-            print(f"Error: The value of moves must be a positive integer!")
-            return False
+    grid[2:-1:2, 2:-1:2] = 1
+    grid[2, 3:-2:2] = 1
 
-        return True
+    for first in range(1, rooms_y, block):
+        lines = min(block, rooms_y - first)
+        east = rng.random((lines, rooms_x - 1), dtype=np.float32) < 0.5
 
+        # A run ends at a room that is not joined to the east, and every line ends a run.
+        ends = np.ones((lines, rooms_x), dtype=bool)
+        ends[:, :-1] = ~east
+        ends = ends.ravel()
+        last_rooms = np.flatnonzero(ends)
+        first_rooms = np.concatenate(([0], last_rooms[:-1] + 1))
+        north = np.zeros(lines * rooms_x, dtype=bool)
+        north[first_rooms + rng.integers(last_rooms - first_rooms + 1)] = True
 
-    def riddle_validator(riddles: list) -> bool:
-        """
-        The task of this function is to check the 'riddles' and their locations in order to manage them correctly in the maze.
+        top = first * 2 + 2
+        grid[top:top + lines * 2:2, 3:-2:2][east] = 1
+        grid[top - 1:top + lines * 2 - 1:2, 2:-1:2][north.reshape(lines, rooms_x)] = 1
 
-        :param riddles: A 2D list containing the information of puzzles in the form of separate lists.
-                        Pattern: [[question, answer, location in [y, x]], ...]
-        :return: bool
-        """
 
-        for index, riddle in enumerate(riddles):
-            try:
-                question, answer, loc = riddle
-            except ValueError:
-                print(f"Error: Riddle number {index} is not properly packaged!")
-                return False
+def braid_maze(cells: bytearray, stride: int, rows: list, rnd: random.Random, braid: float, goal: int) -> None:
+    """
+    This function opens a wall of a part of the dead ends to make loops, preferring the walls towards other dead ends.
+    The room of the goal and its walls are never opened.
+
+    :param cells: The buffer of the maze with walls 0, open cells 1 and padding 255.
+    :param stride: Row stride of the buffer.
+    :param rows: Indexes of the rooms in the buffer, as one range for each line of rooms.
+    :param rnd: The random number generator.
+    :param braid: The fraction of dead ends that are opened, from 0 to 1.
+    :param goal: Index of the room of the goal.
+    :return: None
+    """
 
-            if not isinstance(question, str) or not isinstance(answer, str):
-                print(f"Error: The question and answer values of each riddle must be of string type!")
-                return False
+    steps = (-stride, stride, -1, 1)
 
-            if not isinstance(loc, list):
-                print(f"Error: The location of riddle number {index} is not valid!")
-                return False
+    for room in chain.from_iterable(rows):
+        if cells[room - stride] + cells[room + stride] + cells[room - 1] + cells[room + 1] != 1 or \
+                room == goal or rnd.random() >= braid:
+            continue
 
-            try:
-                if maze_data['maze'][loc[0]][loc[1]] != "?":
-                    print(f"Error: The mismatch of riddle number {index} with its address!")
-                    return False
-            except IndexError:
-                print(f"Error: The riddle location was not found in the maze!")
-                return False
-            except TypeError:
-                print(f"Error: The location of riddle number {index} must be of integer type!")
-                return False
+        walls = [step for step in steps if cells[room + step] == 0 and cells[room + step * 2] == 1 and room + step * 2 != goal]
+        dead_ends = [step for step in walls if sum(cells[room + step * 2 + other] == 1 for other in steps) == 1]
 
-        return True
+        if walls:
+            step = rnd.choice(dead_ends or walls)
+            cells[room + step] = 1
 
 
-    def point_counter(point_sign: str) -> int:
-        """
-        A function to count the number of points or bonuses in each maze.
+def farthest_cell(cells: bytearray, stride: int, source: int) -> int:
+    """
+    A breadth-first search that finds one of the open cells farthest from a cell.
 
-        :param point_sign: A sign assigned to the 'point' in one char.
-        :return: int
-        """
+    :param cells: Flat grid in bytearray format, 1 for open cells. The buffer is not changed.
+    :param stride: Row stride of the grid.
+    :param source: Index of the cell where the search starts.
+    :return: int
+    """
 
-        points = 0
-        for y in range(len(maze_data['maze'])):
-            points += maze_data['maze'][y].count(point_sign)
+    unvisited = cells.translate(bytes([0, 1]) + bytes(254))
+    unvisited[source], frontier, last = 0, [source], source
+
+    while frontier:
+        last, next_frontier = frontier[0], []
+        append = next_frontier.append
+
+        for location in frontier:
+            neighbour = location - stride
+            if unvisited[neighbour]:
+                unvisited[neighbour] = 0
+                append(neighbour)
+            neighbour = location + stride
+            if unvisited[neighbour]:
+                unvisited[neighbour] = 0
+                append(neighbour)
+            neighbour = location - 1
+            if unvisited[neighbour]:
+                unvisited[neighbour] = 0
+                append(neighbour)
+            neighbour = location + 1
+            if unvisited[neighbour]:
+                unvisited[neighbour] = 0
+                append(neighbour)
+
+        frontier = next_frontier
+
+    return last
+
+
+def frontier_search(cells: bytearray, stride: int, source: int, target: int=None) -> tuple:
+    """
+    The breadth-first search of farthest_cell with NumPy arrays: each step moves the whole frontier at once, without a
+    Python loop over its cells. It is fast when the frontier is wide and the number of steps is small, as in the
+    sidewinder mazes, and slow in the long corridors of the other algorithms.
+
+    :param cells: Flat grid in bytearray format, 1 for open cells. The buffer is not changed.
+    :param stride: Row stride of the grid.
+    :param source: Index of the cell where the search starts.
+    :param target: Index of a cell where the search stops, or None to search all the cells.
+    :return: tuple (one of the cells reached last or the target, its distance from the source),
+             (None, None) if the target cannot be reached
+    """
 
-        return points
+    import numpy as np
 
+    unvisited = np.frombuffer(cells, dtype=np.uint8) == 1
+    steps = np.array([-stride, stride, -1, 1], dtype=np.int64)
+    unvisited[source], frontier, distance = False, np.array([source], dtype=np.int64), 0
 
-    def find_location(sign: str) -> list:
-        """
-        A function to find the location of a sign in the maze that accepts as an argument.
+    while True:
+        if target is not None and not unvisited[target]:
+            return target, distance
 
-        :param sign: Any sign in one char.
-        :return: list [y, x]
-        """
+        neighbours = (frontier[:, None] + steps).ravel()
+        neighbours = neighbours[unvisited[neighbours]]
+        if not len(neighbours):
+            return (int(frontier[0]), distance) if target is None else (None, None)
 
-        for y in range(len(maze_data['maze'])):
-            for x in range(len(maze_data['maze'][y])):
-                if maze_data['maze'][y][x] == sign:
-                    location = [y, x]
+        # Two cells of the frontier can share a neighbour where the maze has loops.
+        neighbours.sort()
+        neighbours = neighbours[np.concatenate(([True], neighbours[1:] != neighbours[:-1]))]
+        unvisited[neighbours] = False
+        frontier, distance = neighbours, distance + 1
 
-        return location
 
+def save_maze(maze_data: dict, maze_file_path: str) -> None:
+    """
+    This function saves the maze in the .mzx format version 2:
+    the magic bytes and the version, the size of the header, a json header that keeps the information of the maze,
+    the signs of the palette and the dimensions of the grid, and the grid itself in row-major order with one byte per cell.
+    The grid starts at a multiple of 64 bytes, and load_maze reads it straight into the bytearray of the grid.
 
-    if keys_validator() and wall_validator(maze_data['wall']) and \
-        pkg_validator(maze_data['player'], maze_data['key'], maze_data['goal']) and \
-        door_validator(maze_data['door']) and moves_validator(maze_data['moves']) and \
-        riddle_validator(maze_data['riddles']):
+    :param maze_data: Information of maze in dict format.
+    :param maze_file_path: Path of maze file in string.
+    :return: None
+    """
 
-        total_point = point_counter(maze_data['point'])
-        player, key, goal = find_location(maze_data['player']), find_location(maze_data['key']), find_location(maze_data['goal'])
+    grid = maze_data['maze']
+    header = {key: value for key, value in maze_data.items() if key != 'maze'}
+    header['grid'] = {'width': grid.width, 'height': grid.height, 'palette': grid.palette, 'offset': 0}
 
-        return player, key, goal, total_point
+    # The offset of the grid is part of the header, so the header is encoded until its size does not change.
+    encoded_header = b''
+    while len(encoded_header) != header['grid']['offset'] - 12:
+        header['grid']['offset'] = 12 + len(encoded_header)
+        encoded_header = json.dumps(header).encode('utf-8')
+        encoded_header += b' ' * (-(12 + len(encoded_header)) % 64)
 
-    return False
+    with open(maze_file_path, 'wb') as maze_file:
+        maze_file.write(struct.pack('<4sHHI', MAZE_MAGIC, MAZE_VERSION, 0, len(encoded_header)))
+        maze_file.write(encoded_header)
+        maze_file.write(grid.cells)
 
 
-def move(maze_data: dict, player_location: list, remaining_moves: int, direction: list, logs: dict) -> tuple:
+def load_maze(maze_file_path: str) -> dict:
     """
-    The task of this function is to manage the movement of the player in the maze and the events that occur.
+    This function loads the maze file and returns its information.
+    Both the current format and the pickle files of version 1 are supported.
+    The grid is read with one readinto call into the bytearray of a MazeGrid, without parsing any cell. It is not
+    memory-mapped, because the game writes to the grid and its searches need the methods of a bytearray.
 
-    :param maze_data: Information of maze in dict format.
-    :param player_location: Location of player sign in [y, x] format.
-    :param remaining_moves: Number of moves left.
-    :param direction: To move with binary values in a list like this: [up, down, left, right]
-                      Example: [1, 0, 0, 0] >>> up
-                               [0, 1, 0, 0] >>> down
-                               [0, 0, 1, 0] >>> left
-                               [0, 0, 0, 1] >>> right
-    :param logs: Movement logs in dict format.
-    :return: tuple
+    :param maze_file_path: Path of maze file in string.
+    :return: dict
     """
 
-    def get_riddle(riddle_location: list):
-        for index in range(len(maze_data['riddles'])):
-            if maze_data['riddles'][index][2][0] == riddle_location[0] and \
-                maze_data['riddles'][index][2][1] == riddle_location[1]:
-                question = maze_data['riddles'][index][0]
-                answer = maze_data['riddles'][index][1]
-                return question, answer
+    with open(maze_file_path, 'rb') as maze_file:
+        if maze_file.read(4) != MAZE_MAGIC:
+            maze_file.seek(0)
+            maze_data = SafeUnpickler(maze_file).load()
+            maze_data['maze'] = MazeGrid.from_lines(maze_data['maze'])
+            return maze_data
 
-    def riddle_form(question: str, answer: str):
-        user_answer = input_dialog(title='Riddle?', text=question).run()
-        return user_answer
+        version, _, header_size = struct.unpack('<HHI', maze_file.read(8))
+        if version != MAZE_VERSION:
+            raise ValueError(f"Version {version} of the maze file format is not supported!")
 
-    maze = maze_data['maze']
-    last_player_location = player_location[0], player_location[1]
-    point, last_remaining_moves = 0, remaining_moves
+        maze_data = json.loads(maze_file.read(header_size).decode('utf-8'))
+        grid_info = maze_data.pop('grid')
 
-    if maze[last_player_location[0]][last_player_location[1]] != '?':
-        maze[last_player_location[0]].pop(last_player_location[1])
-        maze[last_player_location[0]].insert(last_player_location[1], " ")
+        grid = MazeGrid(width=grid_info['width'], height=grid_info['height'])
+        for sign in grid_info['palette'][1:]:
+            grid.code(sign)
 
-    if direction[0] == 1:
-        player_location[0] -= 1
-    elif direction[1] == 1:
-        player_location[0] += 1
-    elif direction[2] == 1:
-        player_location[1] -= 1
-    elif direction[3] == 1:
-        player_location[1] += 1
+        maze_file.seek(grid_info['offset'])
+        if maze_file.readinto(grid.cells) != len(grid.cells):
+            raise ValueError("The grid of the maze file is incomplete!")
 
-    if maze[player_location[0]][player_location[1]] == '$':
-        point = 1
-        maze[player_location[0]].pop(player_location[1])
-        maze[player_location[0]].insert(player_location[1], maze_data['player'])
-        remaining_moves -= 1
+    maze_data['maze'] = grid
+    return maze_data
 
-        logs[maze_data['moves'] - remaining_moves] = add_log(log_type='point',
-                                                             log=[[player_location[0], player_location[1]]])
 
-    elif maze[player_location[0]][player_location[1]] == '?':
-        question, answer = get_riddle([player_location[0], player_location[1]])
+class AgentTimeout(BaseException):
+    """
+    Raised in the agent of a tournament run when the time limit of the run is reached while the agent is thinking.
+    It is a BaseException, so a bare except Exception in the agent cannot catch it.
+    """
 
-        user_answer = riddle_form(question, answer)
 
-        if user_answer != answer:
-            maze[player_location[0]].pop(player_location[1])
-            maze[player_location[0]].insert(player_location[1], '?')
+class SafeUnpickler(pickle.Unpickler):
+    """
+    An unpickler for the maze and replay files of version 1, which only contain dicts, lists, strings and numbers.
+    Loading any class or function is refused, so a manipulated file cannot run code.
+    """
 
-            player_location = [last_player_location[0], last_player_location[1]]
-            remaining_moves = last_remaining_moves
+    def find_class(self, module: str, name: str):
+        raise pickle.UnpicklingError(f"'{module}.{name}' is not allowed in a mazex file!")
 
-            maze[player_location[0]].pop(player_location[1])
-            maze[player_location[0]].insert(player_location[1], maze_data['player'])
 
-            remaining_moves -= 1
+class MazeGrid:
+    """
+    The map of the maze in a flat bytearray with one byte per cell and a row stride equal to the width of the widest line.
+    Each byte is the code of a sign in the palette of the maze, code 0 is the padding after the end of shorter lines.
+    Cells are read and written with grid[y, x] in constant time.
+    When changes is a list, the index of every written cell is appended to it, for the renderer.
+    """
 
-            logs[maze_data['moves'] - remaining_moves] = add_log(log_type='riddle',
-                                                                 log=[[player_location[0], player_location[1]],
-                                                                      question, user_answer])
-        else:
-            remaining_moves -= 1
+    __slots__ = ('width', 'height', 'cells', 'palette', 'codes', 'table', 'changes')
 
-            maze[player_location[0]].pop(player_location[1])
-            maze[player_location[0]].insert(player_location[1], maze_data['player'])
+    def __init__(self, width: int, height: int) -> None:
+        self.width, self.height = width, height
+        self.cells = bytearray(width * height)
+        self.palette, self.codes, self.table = [''], {'': 0}, {0: None}
+        self.changes = None
 
-            logs[maze_data['moves'] - remaining_moves] = add_log(log_type='riddle',
-                                                                 log=[[player_location[0], player_location[1]],
-                                                                      question, user_answer])
+    @classmethod
+    def from_lines(cls, lines: list) -> 'MazeGrid':
+        """
+        Building a grid from the lines of a maze, each line is a string or a list of one character strings.
 
-    elif maze[player_location[0]][player_location[1]] == maze_data['wall']:
-        player_location = [last_player_location[0], last_player_location[1]]
-        remaining_moves = last_remaining_moves
+        :param lines: Lines of the maze.
+        :return: MazeGrid
+        """
 
-        maze[player_location[0]].pop(player_location[1])
-        maze[player_location[0]].insert(player_location[1], maze_data['player'])
+        lines = [''.join(line) for line in lines]
+        grid = cls(width=max(map(len, lines), default=0), height=len(lines))
+        encoding = {}
 
-    else:
-        maze[player_location[0]].pop(player_location[1])
-        maze[player_location[0]].insert(player_location[1], maze_data['player'])
+        for y, line in enumerate(lines):
+            for sign in set(line) - grid.codes.keys():
+                encoding[ord(sign)] = chr(grid.code(sign))
 
-        remaining_moves -= 1
+            row = y * grid.width
+            grid.cells[row:row + len(line)] = line.translate(encoding).encode('latin-1')
 
-        logs[maze_data['moves'] - remaining_moves] = add_log(log_type='empty_loc', log=[[player_location[0], player_location[1]]])
+        return grid
 
-    return player_location, remaining_moves, point, logs
+    def code(self, sign: str) -> int:
+        """
+        Returning the code of a sign and adding it to the palette if it is new.
 
+        :param sign: Any sign in one char.
+        :return: int
+        """
 
-def path_validator(path: str, suffix: str) -> bool:
-    """
-    The task of this function is to validate file paths.
+        if sign not in self.codes:
+            if len(self.palette) == 256:
+                raise ValueError('A maze cannot have more than 255 different signs!')
 
-    :param path: Path of file in string format.
-    :param suffix: Suffix of the file.
-    :return: bool
-    """
+            self.codes[sign] = len(self.palette)
+            self.table[len(self.palette)] = sign
+            self.palette.append(sign)
 
-    return True if Path(path).exists() and Path(path).is_file() and path.endswith(suffix) else False
+        return self.codes[sign]
 
+    def __getitem__(self, location: tuple) -> str:
+        y, x = location
+        if not 0 <= y < self.height or not 0 <= x < self.width:
+            raise IndexError('The location is outside of the maze!')
 
-def draw_maze(maze_mode: str, maze: list, remaining_moves: int, point: int, total_point: int, moves: int) -> None:
-    """
-    A function to draw and display the maze.
+        return self.palette[self.cells[y * self.width + x]]
 
-    :param maze_mode: Binary value, 'game' or 'replay'
-    :param maze: Maze in list format.
-    :param remaining_moves: Number of moves left.
-    :param point: Total points earned.
-    :param total_point: The total number of points in the maze that can be achieved.
-    :param moves: Number of total moves in positive integer.
-    :return: None
-    """
+    def __setitem__(self, location: tuple, sign: str) -> None:
+        y, x = location
+        if not 0 <= y < self.height or not 0 <= x < self.width:
+            raise IndexError('The location is outside of the maze!')
 
-    if maze_mode == 'game':
-        print(f"Remaining Moves: {remaining_moves} - Point: {point}/{total_point}")
-    else:
-        print(f'Move: {remaining_moves}/{moves} - Point: {point}/{total_point}')
+        self.cells[y * self.width + x] = self.code(sign)
+        if self.changes is not None:
+            self.changes.append(y * self.width + x)
 
-    for line in maze:
-        print(''.join(line))
+    def __len__(self) -> int:
+        return self.height
 
+    def line(self, y: int) -> str:
+        """
+        Returning a line of the maze as a string, without the padding.
 
-def game_over(mode: str, logs: dict, details: list=[]) -> None:
-    """
-    This function will be called at the end of the game and is responsible for the end state and
-    the end message depending on the end mode of the game.
+        :param y: Index of the line.
+        :return: str
+        """
 
-    :param mode: In two situations, lose or win.
-    :param logs: Movement logs in dict format.
-    :param details: Details containing information necessary for display in 'win' mode.
-    :return: None
-    """
+        row = y * self.width
+        return self.cells[row:row + self.width].decode('latin-1').translate(self.table)
 
-    lose_style = Style.from_dict({
-        'dialog': 'bg:#cb4335',
-        'dialog frame.label': 'bg:#2c3e50 #cb4335',
-        'dialog.body': 'bg:#2c3e50 #cb4335',
-        'dialog shadow': 'bg:#17202a'})
+    def lines(self) -> list:
+        """
+        Returning all the lines of the maze as strings.
 
-    win_style = Style.from_dict({
-        'dialog': 'bg:#229954',
-        'dialog frame.label': 'bg:#2c3e50 #229954',
-        'dialog.body': 'bg:#2c3e50 #229954',
-        'dialog shadow': 'bg:#17202a'})
+        :return: list
+        """
 
-    if mode == 'lose':
-        user_answer = yes_no_dialog(title='GAME OVER', text='Unfortunately, you lost the game!\nDo you want to save the replay file?', style=lose_style).run()
-        if user_answer:
-            save_replay(logs=logs)
+        return [self.line(y) for y in range(self.height)]
 
-    else:
-        user_answer = yes_no_dialog(title='GAME OVER', text=f'Congratulations, you won!\nRemaining moves: {details[0]}\nPoint: {details[1]}/{details[2]}\nDo you want to save the replay file?',
-                       style=win_style).run()
-        if user_answer:
-            save_replay(logs=logs)
+    def to_list(self) -> list:
+        """
+        Returning the maze as a list of lists of one character strings, the format stored in maze and replay files.
 
+        :return: list
+        """
 
-def exit_the_game() -> bool:
-    """
-    The task of this function is to exit the game after user confirmation.
+        return [list(line) for line in self.lines()]
 
-    :return: bool
-    """
+    def count(self, sign: str) -> int:
+        """
+        Counting the cells that contain a sign.
 
-    exit_style = Style.from_dict({
-        'dialog': 'bg:#cb4335',
-        'dialog frame.label': 'bg:#2c3e50 #cb4335',
-        'dialog.body': 'bg:#2c3e50 #cb4335',
-        'dialog shadow': 'bg:#17202a'})
+        :param sign: Any sign in one char.
+        :return: int
+        """
 
-    exit_code = yes_no_dialog(title='EXIT', text='Are you sure?', style=exit_style).run()
-    return True if exit_code else False
+        return self.cells.count(self.codes[sign]) if sign in self.codes else 0
 
+    def find(self, sign: str) -> list:
+        """
+        Finding the first location of a sign in the maze.
 
-def clear_screen() -> None:
-    """
-    The task of this function is to clear the screen in order to update the information of the maze.
+        :param sign: Any sign in one char.
+        :return: list [y, x] (None if the sign is not in the maze)
+        """
 
-    :return: None
-    """
+        index = self.cells.find(self.codes[sign]) if sign in self.codes else -1
+        return None if index == -1 else list(divmod(index, self.width))
 
-    subprocess.call('clear' if os.name == 'posix' else 'cls', shell=True)
+    def copy(self) -> 'MazeGrid':
+        """
+        Returning an independent copy of the grid.
+
+        :return: MazeGrid
+        """
+
+        grid = MazeGrid(width=self.width, height=self.height)
+        grid.cells[:] = self.cells
+        grid.palette, grid.codes, grid.table = list(self.palette), dict(self.codes), dict(self.table)
+        return grid
+
+
+class MazeIndex:
+    """
+    The special cells of a maze found by scan_maze: the locations of the player, the key and the goal in [y, x] format,
+    the door, the cell indexes of the points and the riddles by cell index, along with every problem found in the maze.
+    It unpacks like the (player, key, goal, total_point) tuple that maze_validator returned before it.
+    """
+
+    __slots__ = ('player', 'key', 'goal', 'door', 'points', 'riddles', 'errors')
+
+    def __init__(self) -> None:
+        self.player, self.key, self.goal, self.door = None, None, None, None
+        self.points, self.riddles, self.errors = [], {}, []
+
+    @property
+    def total_point(self) -> int:
+        return len(self.points)
+
+    def __iter__(self):
+        return iter((self.player, self.key, self.goal, self.total_point))
+
+    def to_json(self) -> str:
+        """
+        Returning the index in json format, for the cache.
+
+        :return: str
+        """
+
+        return json.dumps({slot: getattr(self, slot) for slot in self.__slots__})
+
+    @classmethod
+    def from_json(cls, text: str) -> 'MazeIndex':
+        """
+        Making an index again from the output of to_json.
+
+        :param text: The index in json format.
+        :return: MazeIndex
+        """
+
+        index = cls()
+        for slot, value in json.loads(text).items():
+            setattr(index, slot, value)
+        index.riddles = {int(cell): tuple(riddle) for cell, riddle in index.riddles.items()}
+
+        return index
+
+    def __getitem__(self, index: int):
+        return tuple(self)[index]
+
+
+def maze_validator(maze_data: dict, file_path: str=None) -> MazeIndex:
+    """
+    This function evaluates the maze information and approves it if there is no problem and rejects it otherwise.
+    All the problems of the maze are displayed at once.
+    When the maze is loaded from a file, the result is kept in the cache and found again for the same file content.
+
+    :param maze_data: maze information in dict format.
+    :param file_path: Path of the maze or replay file that maze_data is loaded from, or None.
+    :return: MazeIndex (False if the maze is rejected)
+    """
+
+    cache = maze_cache() if file_path is not None else None
+    content_hash = cache.file_hash(file_path) if cache else None
+    cached_index = cache.get(content_hash, 'index') if content_hash else None
+
+    if cached_index is not None:
+        index = MazeIndex.from_json(cached_index)
+    else:
+        index = scan_maze(maze_data=maze_data)
+        if content_hash:
+            cache.put(content_hash, 'index', index.to_json())
+
+    for error in index.errors:
+        print(f"Error: {error}")
+
+    return False if index.errors else index
+
+
+class MazeCache:
+    """
+    A cache of the results of the validator and the solver in a SQLite database, keyed by a hash of the content of
+    the maze and replay files, so the work is not done again for a file that has not changed.
+    The hash of a file is kept with its path, size and modification time, and the file is only read and hashed again
+    when one of them changes.
+    The cache is off unless the MAZEX_CACHE environment variable is a path of the database, which the --cache option
+    of the commands sets to default_path(). When its size is more than max_size, the least recently used results are
+    removed. Any problem with the database turns the cache off instead of stopping the command.
+    """
+
+    __slots__ = ('path', 'max_size', 'connection')
+
+    VERSION = 2
+
+    def __init__(self, path: str=None, max_size: int=64 << 20) -> None:
+        if path is None:
+            path = os.environ.get('MAZEX_CACHE') or 'off'
+
+        self.path, self.max_size, self.connection = path, max_size, None
+
+    @classmethod
+    def default_path(cls) -> str:
+        """
+        Returning the path of the database in the cache directory of the user.
+
+        :return: str
+        """
+
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(cache_home, 'mazex', 'cache.sqlite')
+
+    def connect(self):
+        """
+        Opening the database the first time it is needed.
+
+        :return: sqlite3.Connection (None if the cache is off or cannot be opened)
+        """
+
+        if self.connection is None:
+            self.connection = False
+            if self.path != 'off':
+                import sqlite3
+
+                try:
+                    Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                    connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+                    # The results can always be made again, so the writes of many processes are not synced to disk.
+                    connection.execute('PRAGMA journal_mode = WAL')
+                    connection.execute('PRAGMA synchronous = OFF')
+                    if connection.execute('PRAGMA user_version').fetchone()[0] != self.VERSION:
+                        connection.execute('DROP TABLE IF EXISTS results')
+                        connection.execute('DROP TABLE IF EXISTS files')
+                        connection.execute('CREATE TABLE results (hash TEXT, name TEXT, value TEXT, size INTEGER, '
+                                           'used REAL, PRIMARY KEY (hash, name))')
+                        connection.execute('CREATE INDEX results_used ON results (used)')
+                        connection.execute('CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, '
+                                           'hash TEXT)')
+                        connection.execute(f'PRAGMA user_version = {self.VERSION}')
+                    self.connection = connection
+                except (OSError, sqlite3.Error):
+                    pass
+
+        return self.connection or None
+
+    def file_hash(self, file_path: str) -> str:
+        """
+        Returning the hash of the content of a file, or None if the cache is off.
+        The hash that is kept for the same path, size and modification time is used without reading the file.
+
+        :param file_path: Path of the file in string format.
+        :return: str
+        """
+
+        if self.connect() is None:
+            return None
+
+        import sqlite3
+        import hashlib
+
+        path, status = os.path.abspath(file_path), os.stat(file_path)
+
+        try:
+            row = self.connection.execute('SELECT hash FROM files WHERE path = ? AND size = ? AND mtime = ?',
+                                          (path, status.st_size, status.st_mtime_ns)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is not None:
+            return row[0]
+
+        with open(file_path, 'rb') as file:
+            content_hash = hashlib.blake2b(file.read(), digest_size=20).hexdigest()
+
+        try:
+            self.connection.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                                    (path, status.st_size, status.st_mtime_ns, content_hash))
+        except sqlite3.Error:
+            pass
+
+        return content_hash
+
+    def get(self, content_hash: str, name: str) -> str:
+        """
+        Returning a result of a file and marking it as used now.
+
+        :param content_hash: The output of file_hash.
+        :param name: The name of the result.
+        :return: str or bytes (None if it is not in the cache)
+        """
+
+        import sqlite3
+
+        try:
+            row = self.connection.execute('SELECT value FROM results WHERE hash = ? AND name = ?',
+                                          (content_hash, name)).fetchone()
+            if row is not None:
+                self.connection.execute('UPDATE results SET used = ? WHERE hash = ? AND name = ?',
+                                        (time.time(), content_hash, name))
+        except sqlite3.Error:
+            return None
+
+        return row[0] if row is not None else None
+
+    def put(self, content_hash: str, name: str, value: str) -> None:
+        """
+        Keeping a result of a file, and removing the least recently used results if the cache is too big.
+
+        :param content_hash: The output of file_hash.
+        :param name: The name of the result.
+        :param value: The result in json format, or bytes.
+        :return: None
+        """
+
+        import sqlite3
+
+        try:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                                    (content_hash, name, value, len(value), time.time()))
+
+            total_size = self.connection.execute('SELECT SUM(size) FROM results').fetchone()[0]
+            if total_size > self.max_size:
+                # The cache is brought down to three quarters of its size, so it is not cleaned on every put.
+                excess, removed = total_size - self.max_size * 3 // 4, []
+                for rowid, size in self.connection.execute('SELECT rowid, size FROM results ORDER BY used'):
+                    if excess <= 0:
+                        break
+                    removed.append((rowid,))
+                    excess -= size
+
+                self.connection.executemany('DELETE FROM results WHERE rowid = ?', removed)
+        except sqlite3.Error:
+            pass
+
+
+@lru_cache(maxsize=None)
+def maze_cache() -> MazeCache:
+    """
+    Returning the cache of the process.
+
+    :return: MazeCache
+    """
+
+    return MazeCache()
+
+
+def scan_maze(maze_data: dict) -> MazeIndex:
+    """
+    This function checks the maze information with the rules of the game and finds its special cells.
+    The grid is not read cell by cell in Python: the cells of the player, the key, the goal, the points and the riddles
+    are found with byte searches, and the walls around the lines are checked on the first and last columns.
+    Every problem is collected instead of stopping at the first one.
+
+    :param maze_data: maze information in dict format.
+    :return: MazeIndex
+    """
+
+    index, errors = MazeIndex(), []
+    index.errors = errors
+
+    signs = set()
+    for key in ['maze', 'player', 'wall', 'goal', 'moves', 'key', 'door', 'point']:
+        if key not in maze_data.keys():
+            errors.append(f"The {key} key is one of the essential keys and must be there!")
+        elif key in ['player', 'wall', 'key', 'goal', 'point']:
+            if not isinstance(maze_data[key], str):
+                errors.append(f"The sign of the {key} key must be of the string type!")
+            elif len(maze_data[key]) != 1:
+                errors.append(f"The sign of the {key} key must be a character!")
+            else:
+                signs.add(maze_data[key])
+
+    if errors:
+        return index
+
+    if len(signs) != 5:
+        errors.append(f"One sign is used for two keys and this is unacceptable!")
+        return index
+
+    grid = maze_data['maze']
+    wall, specials = grid.codes.get(maze_data['wall'], 0), {}
+    for sign in [maze_data['player'], maze_data['key'], maze_data['goal'], maze_data['point'], '?']:
+        if sign in grid.codes:
+            specials[grid.codes[sign]] = []
+
+    cells, width, height = grid.cells, grid.width, grid.height
+    wall_errors = []
+
+    # bytearray.find runs at the speed of memory, which is much faster than reading the cells in Python.
+    # The walls around the lines are read with strided slices, only lines shorter than the widest one are read on their own.
+    for code, locations in specials.items():
+        location = cells.find(code)
+        while location != -1:
+            locations.append(location)
+            location = cells.find(code, location + 1)
+
+    for y in sorted({0, height - 1}) if height else []:
+        line = cells[y * width:(y + 1) * width].rstrip(b'\x00')
+        if line.count(wall) != len(line):
+            x = next(x for x, code in enumerate(line) if code != wall)
+            wall_errors.append(f'Lack of proper covering of the wall at [{y}, {x}]')
+
+    if height > 2:
+        first_column = cells[width:(height - 1) * width:width] if width else b''
+        last_column = cells[width * 2 - 1:(height - 1) * width:width] if width else b''
+
+        if first_column.count(wall) != height - 2 or last_column.count(wall) != height - 2:
+            for y in range(1, height - 1):
+                line = cells[y * width:(y + 1) * width].rstrip(b'\x00')
+                if not line or line[0] != wall or line[-1] != wall:
+                    wall_errors.append(f'Lack of proper covering of the wall in line {y}')
+
+    errors.extend(wall_errors[:10])
+    if len(wall_errors) > 10:
+        errors.append(f'The wall has problems in {len(wall_errors) - 10} more places!')
+
+    for key in ['player', 'key', 'goal']:
+        locations = specials.get(grid.codes.get(maze_data[key]), [])
+        if len(locations) != 1:
+            errors.append(f'The valid number of {key} in each maze is equal to one!')
+        else:
+            setattr(index, key, list(divmod(locations[0], width)))
+
+    index.points = specials.get(grid.codes.get(maze_data['point']), [])
+    riddle_cells = set(specials.get(grid.codes.get('?'), []))
+
+    door_location = maze_data['door']
+    if not isinstance(door_location, list) or len(door_location) != 2:
+        errors.append(f"The value provided for the door is not valid!")
+    elif not all(isinstance(value, int) for value in door_location):
+        errors.append(f"The door location must be integers!")
+    elif not 0 <= door_location[0] < grid.height or not 0 <= door_location[1] < grid.width:
+        errors.append(f"The door location was not found in the maze!")
+    elif grid[door_location[0], door_location[1]] != maze_data['wall']:
+        errors.append(f"The location intended for the door must be the location of a wall!")
+    elif door_location[0] in [0, grid.height - 1] or door_location[1] in [0, len(grid.line(door_location[0]))]:
+        errors.append(f"Really? do you like to run away? The door location cannot be one of the border walls!")
+    else:
+        index.door = door_location
+
+    if not isinstance(maze_data['moves'], int):
+        errors.append(f"The value of moves must be of integer type!")
+    elif maze_data['moves'] < 0:
+        errors.append(f"The value of moves must be a positive integer!")
+
+    for number, riddle in enumerate(maze_data.get('riddles', [])):
+        try:
+            question, answer, loc = riddle
+        except (TypeError, ValueError):
+            errors.append(f"Riddle number {number} is not properly packaged!")
+            continue
+
+        if not isinstance(question, str) or not isinstance(answer, str):
+            errors.append(f"The question and answer values of each riddle must be of string type!")
+        elif not isinstance(loc, list) or len(loc) != 2:
+            errors.append(f"The location of riddle number {number} is not valid!")
+        elif not all(isinstance(value, int) for value in loc):
+            errors.append(f"The location of riddle number {number} must be of integer type!")
+        elif not 0 <= loc[0] < grid.height or not 0 <= loc[1] < grid.width:
+            errors.append(f"The riddle location was not found in the maze!")
+        elif loc[0] * grid.width + loc[1] not in riddle_cells:
+            errors.append(f"The mismatch of riddle number {number} with its address!")
+        else:
+            index.riddles[loc[0] * grid.width + loc[1]] = (question, answer)
+
+    return index
+
+
+def solvability_validator(maze_data: dict, validated_result: tuple, file_path: str=None) -> bool:
+    """
+    This function makes sure that the maze can be won: the key can be reached, the goal can be reached
+    after the door opens and the number of moves is not less than the minimum number of moves needed.
+
+    :param maze_data: maze information in dict format.
+    :param validated_result: The output of maze_validator for this maze.
+    :param file_path: Path of the maze file that maze_data is loaded from, to use the cache, or None.
+    :return: bool
+    """
+
+    key_moves, min_moves = search_maze(maze_data=maze_data, validated_result=validated_result, file_path=file_path)
+
+    if min_moves is None:
+        if key_moves is None:
+            print("Error: The key cannot be reached from the location of the player!")
+        else:
+            print("Error: The goal cannot be reached after the door opens!")
+        return False
+
+    if maze_data['moves'] < min_moves:
+        print(f"Error: The number of moves ({maze_data['moves']}) is less than the minimum number of moves needed to win ({min_moves})!")
+        return False
+
+    return True
+
+
+class MazeEvents:
+    """
+    The event table of a validated maze, built once when a game starts.
+    It is a flat bytearray keyed by the cell index (y * width + x) like the grid, with the event of each cell:
+    EMPTY_EVENT, WALL_EVENT, POINT_EVENT, RIDDLE_EVENT, KEY_EVENT, DOOR_EVENT or GOAL_EVENT,
+    along with the number of the riddle of each riddle cell. Any move is resolved with one lookup in it.
+    The events that are used up, like the points taken and the door opened, become EMPTY_EVENT during the game.
+    """
+
+    __slots__ = ('width', 'cells', 'riddles')
+
+    def __init__(self, maze_data: dict, validated_result: MazeIndex) -> None:
+        grid = maze_data['maze']
+        self.width, self.riddles = grid.width, {}
+
+        wall_code = grid.codes.get(maze_data['wall'])
+        self.cells = grid.cells.translate(bytes(WALL_EVENT if code == wall_code else EMPTY_EVENT for code in range(256)))
+
+        for cell in validated_result.points:
+            self.cells[cell] = POINT_EVENT
+
+        for number, (question, answer, location) in enumerate(maze_data.get('riddles', [])):
+            cell = location[0] * self.width + location[1]
+            if cell in validated_result.riddles and cell not in self.riddles:
+                self.cells[cell], self.riddles[cell] = RIDDLE_EVENT, number
+
+        for event, location in [(KEY_EVENT, validated_result.key), (DOOR_EVENT, validated_result.door),
+                                (GOAL_EVENT, validated_result.goal)]:
+            if location is not None:
+                self.cells[location[0] * self.width + location[1]] = event
+
+
+class GameState:
+    """
+    The state of a game on a validated maze and the rules of the game, without any interface.
+    It does no printing and opens no dialogs: the answers of the riddles are given to step, or by the answer_riddle
+    function, which takes the question of a riddle and returns the answer of the player.
+    The direction of every counted move and the answer given to every riddle by move number are recorded in the
+    format of replay_actions, so a replay can be saved without finding them again from the logs.
+    The terminal game is one client of it, and so are the replays, the verify command and the bots.
+    """
+
+    __slots__ = ('maze_data', 'grid', 'events', 'player', 'key', 'goal', 'moves', 'point', 'total_point', 'is_key',
+                 'logs', 'result', 'answer_riddle', 'directions', 'answers')
+
+    def __init__(self, maze_data: dict, validated_result: MazeIndex, answer_riddle: callable=None) -> None:
+        self.maze_data, self.grid, self.answer_riddle = maze_data, maze_data['maze'], answer_riddle
+        self.events = MazeEvents(maze_data=maze_data, validated_result=validated_result)
+        self.player = [validated_result.player[0], validated_result.player[1]]
+        self.key, self.goal, self.total_point = validated_result.key, validated_result.goal, validated_result.total_point
+        self.moves, self.point, self.is_key, self.result = maze_data['moves'], 0, True, None
+        self.logs = {0: add_log(log_type='empty_loc', log=[[self.player[0], self.player[1]]])}
+        self.directions, self.answers = [], {}
+
+        if self.moves == 0:
+            self.logs[0] = add_log(log_type='lose', log=[[self.player[0], self.player[1]]])
+            self.result = 'lose'
+
+    def step(self, direction: list, answer: str=None) -> list:
+        """
+        Playing one move and applying its consequences: taking a point, answering a riddle, picking up the key
+        which opens the door, reaching the goal and running out of moves. A move into a wall is not counted.
+
+        :param direction: To move with binary values in a list like this: [up, down, left, right]
+                          Example: [1, 0, 0, 0] >>> up
+        :param answer: The answer to the riddle of the move, if there is one. By default, it is asked from answer_riddle.
+        :return: list of the events of the move in order, from 'wall', 'move', 'point', 'riddle', 'wrong_answer',
+                 'key', 'win' and 'lose'
+        """
+
+        if self.result:
+            raise ValueError('The game is over!')
+
+        grid, events, player, player_sign = self.grid, self.events, self.player, self.maze_data['player']
+        y, x = player
+        target_y, target_x = y - direction[0] + direction[1], x - direction[2] + direction[3]
+        cell = target_y * events.width + target_x
+        event = events.cells[cell]
+
+        if event == WALL_EVENT or event == DOOR_EVENT:
+            return ['wall']
+
+        self.moves -= 1
+        index = self.maze_data['moves'] - self.moves
+        self.directions.append(DIRECTIONS.index(list(direction)))
+
+        if event == RIDDLE_EVENT:
+            question, right_answer = self.maze_data['riddles'][events.riddles[cell]][:2]
+            if answer is None and self.answer_riddle is not None:
+                answer = self.answer_riddle(question)
+            self.answers[index] = answer
+
+            if answer != right_answer:
+                self.logs[index] = add_log(log_type='riddle', log=[[y, x], question, answer])
+                step_events, event = ['wrong_answer'], EMPTY_EVENT
+            else:
+                events.cells[cell] = EMPTY_EVENT
+                player[0], player[1] = target_y, target_x
+                grid[y, x], grid[target_y, target_x] = ' ', player_sign
+                self.logs[index] = add_log(log_type='riddle', log=[[target_y, target_x], question, answer])
+                step_events = ['riddle']
+
+        else:
+            player[0], player[1] = target_y, target_x
+            grid[y, x], grid[target_y, target_x] = ' ', player_sign
+
+            if event == POINT_EVENT:
+                events.cells[cell] = EMPTY_EVENT
+                self.point += 1
+                self.logs[index] = add_log(log_type='point', log=[[target_y, target_x]])
+                step_events = ['point']
+            else:
+                self.logs[index] = add_log(log_type='empty_loc', log=[[target_y, target_x]])
+                step_events = ['move']
+
+        if event == GOAL_EVENT:
+            self.logs[index] = add_log(log_type='win', log=[[player[0], player[1]]])
+            self.result = 'win'
+            step_events.append('win')
+            return step_events
+
+        if event == KEY_EVENT:
+            self.is_key = False
+            door_location = self.maze_data['door']
+            grid[door_location[0], door_location[1]] = ' '
+            events.cells[cell] = events.cells[door_location[0] * events.width + door_location[1]] = EMPTY_EVENT
+
+            self.logs[index] = add_log(log_type='key', log=[[player[0], player[1]]])
+            step_events.append('key')
+
+        if self.moves == 0:
+            self.logs[index] = add_log(log_type='lose', log=[[player[0], player[1]]])
+            self.result = 'lose'
+            step_events.append('lose')
+
+        return step_events
+
+    def time_out(self) -> list:
+        """
+        Ending the game when the time of the player runs out, which loses it like running out of moves.
+        The logs are kept as they are, so the replay of the game ends with the last move that was played.
+
+        :return: list of the events, ['lose']
+        """
+
+        if self.result:
+            raise ValueError('The game is over!')
+
+        self.result = 'lose'
+        return ['lose']
+
+
+class GameClock:
+    """
+    The clock of the timed modes of the game: a time limit for the whole game (time attack), and a time limit for
+    each move that starts again after every move. The game is lost when one of them runs out.
+    The clock runs as an asyncio task that sleeps until the displayed number of seconds changes or a move
+    starts the time of the next move, so it never busy-waits. It stops while a dialog is open over the maze.
+    """
+
+    __slots__ = ('time_limit', 'move_time', 'started', 'last_move', 'paused', 'wake')
+
+    def __init__(self, time_limit: float=None, move_time: float=None) -> None:
+        self.time_limit, self.move_time, self.paused, self.wake = time_limit, move_time, None, None
+        self.started = self.last_move = time.monotonic()
+
+    @property
+    def timed(self) -> bool:
+        return self.time_limit is not None or self.move_time is not None
+
+    def remaining(self) -> float:
+        """
+        Returning the seconds left before the first of the time limits runs out.
+
+        :return: float (None when the game is not timed)
+        """
+
+        deadlines = ([self.started + self.time_limit] if self.time_limit is not None else []) + \
+                    ([self.last_move + self.move_time] if self.move_time is not None else [])
+
+        now = self.paused if self.paused is not None else time.monotonic()
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    def moved(self) -> None:
+        """
+        Starting the time of the next move.
+
+        :return: None
+        """
+
+        self.last_move = time.monotonic()
+        if self.wake is not None:
+            self.wake.set()
+
+    def pause(self, paused: bool) -> None:
+        """
+        Stopping the clock, or starting it again with the time limits moved by the time it was stopped.
+
+        :param paused: Whether the clock is stopped.
+        :return: None
+        """
+
+        if paused and self.paused is None:
+            self.paused = time.monotonic()
+        elif not paused and self.paused is not None:
+            stopped, self.paused = time.monotonic() - self.paused, None
+            self.started, self.last_move = self.started + stopped, self.last_move + stopped
+            if self.wake is not None:
+                self.wake.set()
+
+    async def run(self, app: 'Application', on_time_out: callable) -> None:
+        """
+        Counting down until the time runs out, redrawing the application every second for the status line.
+        The dialogs are opened and closed by key presses, which redraw the application, so the clock is stopped
+        and started again after each render.
+
+        :param app: The application of the game.
+        :param on_time_out: A function that is called when the time runs out.
+        :return: None
+        """
+
+        import asyncio
+
+        self.started = self.last_move = time.monotonic()
+        self.wake = asyncio.Event()
+        app.after_render += lambda app: self.pause(paused=bool(app.layout.container.floats))
+
+        while True:
+            if self.paused is not None:
+                await self.wake.wait()
+                self.wake.clear()
+                continue
+
+            remaining = self.remaining()
+            if remaining <= 0:
+                on_time_out()
+                return
+
+            app.invalidate()
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=remaining - math.ceil(remaining) + 1)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+
+
+class GameBatch:
+    """
+    A batch of independent games on the same validated maze, played in lockstep with NumPy arrays and the rules of
+    GameState: the location of each player as a cell index, the remaining moves, the points, whether the key is
+    picked up, the points and the riddles that are used up, and the result of each game (0 playing, 1 win, 2 lose).
+    One step moves every game at once, without a Python loop over the games, and the finished games do not move.
+    There are no logs and nothing is drawn. NumPy is only needed by this class (python3 -m pip install mazex[batch]).
+    """
+
+    __slots__ = ('size', 'width', 'events', 'point_ids', 'riddle_ids', 'start', 'start_moves', 'offsets', 'positions',
+                 'moves', 'points', 'has_key', 'taken_points', 'solved_riddles', 'results')
+
+    def __init__(self, maze_data: dict, validated_result: MazeIndex, size: int) -> None:
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError('The batch of games needs numpy! (python3 -m pip install numpy)') from None
+
+        events = MazeEvents(maze_data=maze_data, validated_result=validated_result)
+        self.size, self.width, self.start_moves = size, events.width, maze_data['moves']
+        self.events = np.frombuffer(bytes(events.cells), dtype=np.uint8)
+        self.start = validated_result.player[0] * self.width + validated_result.player[1]
+        self.offsets = np.array([-self.width, self.width, -1, 1], dtype=np.int64)
+
+        self.point_ids = np.full(len(self.events), -1, dtype=np.int64)
+        self.point_ids[validated_result.points] = np.arange(len(validated_result.points))
+        self.riddle_ids = np.full(len(self.events), -1, dtype=np.int64)
+        self.riddle_ids[list(events.riddles)] = np.arange(len(events.riddles))
+
+        self.positions, self.moves = np.empty(size, dtype=np.int64), np.empty(size, dtype=np.int64)
+        self.points, self.results = np.empty(size, dtype=np.int64), np.empty(size, dtype=np.int8)
+        self.has_key = np.empty(size, dtype=bool)
+        self.taken_points = np.empty((size, max(len(validated_result.points), 1)), dtype=bool)
+        self.solved_riddles = np.empty((size, max(len(events.riddles), 1)), dtype=bool)
+        self.reset()
+
+    @property
+    def locations(self) -> tuple:
+        """
+        The locations of the players in the games as a (y, x) pair of arrays.
+        """
+
+        return self.positions // self.width, self.positions % self.width
+
+    def reset(self, games=None) -> None:
+        """
+        Starting some of the games again, all of them by default.
+
+        :param games: Indexes or a boolean mask of the games to start again, or None.
+        :return: None
+        """
+
+        games = slice(None) if games is None else games
+        self.positions[games], self.moves[games], self.points[games] = self.start, self.start_moves, 0
+        self.has_key[games], self.taken_points[games], self.solved_riddles[games] = False, False, False
+        self.results[games] = 2 if self.start_moves == 0 else 0
+
+    def step(self, actions, answers=None):
+        """
+        Playing one move in every game that is not finished. A move into a wall, or into the door before the key
+        is picked up, is not counted. A wrong answer to a riddle uses up the move and leaves the player in place.
+
+        :param actions: The directions of the moves, as an array of indexes of DIRECTIONS with one item per game.
+        :param answers: Whether each game answers the riddle of its move right, as a boolean array.
+                        By default, every answer is right.
+        :return: numpy array (the results of the games: 0 playing, 1 win, 2 lose)
+        """
+
+        import numpy as np
+
+        games = np.flatnonzero(self.results == 0)
+        positions = self.positions[games]
+        targets = positions + self.offsets[np.asarray(actions)[games]]
+        events = self.events[targets]
+
+        blocked = (events == WALL_EVENT) | ((events == DOOR_EVENT) & ~self.has_key[games])
+        games, targets, events = games[~blocked], targets[~blocked], events[~blocked]
+        self.moves[games] -= 1
+
+        riddles = self.riddle_ids[targets]
+        riddle = (events == RIDDLE_EVENT) & ~self.solved_riddles[games, riddles]
+        if answers is not None:
+            wrong = riddle & ~np.asarray(answers, dtype=bool)[games]
+            self.solved_riddles[games[riddle & ~wrong], riddles[riddle & ~wrong]] = True
+            games, targets, events = games[~wrong], targets[~wrong], events[~wrong]
+        else:
+            self.solved_riddles[games[riddle], riddles[riddle]] = True
+
+        self.positions[games] = targets
+
+        point_ids = self.point_ids[targets]
+        point = (events == POINT_EVENT) & ~self.taken_points[games, point_ids]
+        self.taken_points[games[point], point_ids[point]] = True
+        self.points[games[point]] += 1
+
+        self.has_key[games[events == KEY_EVENT]] = True
+        self.results[games[events == GOAL_EVENT]] = 1
+        self.results[(self.results == 0) & (self.moves == 0)] = 2
+
+        return self.results
+
+
+def get_riddle(maze_data: dict, riddle_location: list, events: MazeEvents=None) -> tuple:
+    """
+    A function to find the question and the answer of the riddle at a location.
+
+    :param maze_data: Information of maze in dict format.
+    :param riddle_location: Location of the riddle in [y, x] format.
+    :param events: The event table of the maze, to find the riddle with one lookup instead of searching the riddles.
+    :return: tuple (question, answer)
+    """
+
+    if events is not None:
+        cell = riddle_location[0] * events.width + riddle_location[1]
+        return tuple(maze_data['riddles'][events.riddles[cell]][:2]) if events.cells[cell] == RIDDLE_EVENT else None
+
+    for index in range(len(maze_data['riddles'])):
+        if maze_data['riddles'][index][2][0] == riddle_location[0] and \
+            maze_data['riddles'][index][2][1] == riddle_location[1]:
+            question = maze_data['riddles'][index][0]
+            answer = maze_data['riddles'][index][1]
+            return question, answer
+
+
+def interface_validator() -> bool:
+    """
+    The task of this function is to make sure that prompt_toolkit is installed.
+    It is only needed by the run and replay commands, so it is imported when one of them starts.
+
+    :return: bool
+    """
+
+    try:
+        import prompt_toolkit
+    except ImportError:
+        print("Error: The run and replay commands need prompt_toolkit! (python3 -m pip install prompt-toolkit)")
+        return False
+
+    return True
+
+
+def path_validator(path: str, suffix: str) -> bool:
+    """
+    The task of this function is to validate file paths.
+
+    :param path: Path of file in string format.
+    :param suffix: Suffix of the file.
+    :return: bool
+    """
+
+    return True if Path(path).exists() and Path(path).is_file() and path.endswith(suffix) else False
+
+
+def draw_maze(maze_mode: str, maze: list, remaining_moves: int, point: int, total_point: int, moves: int,
+              renderer: 'MazeRenderer'=None, camera: 'MazeCamera'=None) -> None:
+    """
+    A function to draw and display the maze.
+
+    :param maze_mode: Binary value, 'game' or 'replay'
+    :param maze: Maze in MazeGrid format.
+    :param remaining_moves: Number of moves left.
+    :param point: Total points earned.
+    :param total_point: The total number of points in the maze that can be achieved.
+    :param moves: Number of total moves in positive integer.
+    :param renderer: A MazeRenderer that keeps the last frame and only draws the changes. Without it, the whole maze is printed.
+    :param camera: A MazeCamera over the maze, to draw only its window instead of the whole maze.
+    :return: None
+    """
+
+    status = maze_status(maze_mode, remaining_moves, point, total_point, moves)
+    if camera is not None:
+        maze = camera.update()
+
+    if renderer is not None:
+        renderer.draw(status=status, grid=maze)
+        return
+
+    print(status)
+    for line in maze.lines():
+        print(line)
+
+
+def maze_status(maze_mode: str, remaining_moves: int, point: int, total_point: int, moves: int,
+                seconds: float=None) -> str:
+    """
+    A function to make the status line displayed above the maze.
+
+    :param maze_mode: Binary value, 'game' or 'replay'
+    :param remaining_moves: Number of moves left, or the number of the current move in 'replay' mode.
+    :param point: Total points earned.
+    :param total_point: The total number of points in the maze that can be achieved.
+    :param moves: Number of total moves in positive integer.
+    :param seconds: Seconds left in the timed modes of the game, or None.
+    :return: str
+    """
+
+    if maze_mode == 'game':
+        status = f"Remaining Moves: {remaining_moves} - Point: {point}/{total_point}"
+        return status if seconds is None else f'{status} - Time: {math.ceil(seconds)}s'
+
+    return f'Move: {remaining_moves}/{moves} - Point: {point}/{total_point}'
+
+
+def maze_control(grid: 'MazeGrid', camera: 'MazeCamera'=None, focus: callable=None) -> 'UIControl':
+    """
+    This function makes a prompt_toolkit control that displays a MazeGrid.
+    Lines are built only when prompt_toolkit asks for them, and the screen is updated by the
+    renderer of prompt_toolkit, which only draws what changed since the last frame.
+    With a camera, only the window of the camera that follows the focus is displayed, at the size of the control.
+
+    :param grid: Maze in MazeGrid format.
+    :param camera: A MazeCamera over the grid, or None to display the whole grid.
+    :param focus: A function that returns the location followed by the camera in [y, x] format.
+    :return: UIControl
+    """
+
+    from prompt_toolkit.layout.controls import UIContent, UIControl
+
+    class MazeControl(UIControl):
+        def create_content(self, width: int, height: int) -> UIContent:
+            view = grid
+
+            if camera is not None:
+                camera.resize(width=width, height=height)
+                camera.follow(location=focus())
+                view = camera.update()
+
+            return UIContent(get_line=lambda y: [('', view.line(y))], line_count=view.height)
+
+        def is_focusable(self) -> bool:
+            return True
+
+    return MazeControl()
+
+
+def maze_application(status: callable, grid: 'MazeGrid', toolbar: callable, key_bindings: 'KeyBindings',
+                     camera: 'MazeCamera'=None, focus: callable=None) -> 'Application':
+    """
+    This function makes the full-screen application of the game and the replay: the status line, the maze and the toolbar,
+    in a float container that displays the dialogs over the maze.
+    With a camera, the maze is displayed through its window and the m key shows and hides its minimap on the right.
+
+    :param status: A function that returns the status line.
+    :param grid: Maze in MazeGrid format.
+    :param toolbar: A function that returns the content of the toolbar.
+    :param key_bindings: Key bindings of the application.
+    :param camera: A MazeCamera over the grid, or None to display the whole grid.
+    :param focus: A function that returns the location followed by the camera in [y, x] format.
+    :return: Application
+    """
+
+    from prompt_toolkit.styles import Style
+    from prompt_toolkit.layout import Layout
+    from prompt_toolkit.filters import Condition
+    from prompt_toolkit.application import Application
+    from prompt_toolkit.layout.controls import FormattedTextControl
+    from prompt_toolkit.key_binding import KeyBindings, merge_key_bindings
+    from prompt_toolkit.layout.containers import ConditionalContainer, FloatContainer, HSplit, VSplit, Window
+
+    control = maze_control(grid, camera=camera, focus=focus)
+    control.create_content = profiled('draw', control.create_content)
+    maze = Window(control)
+
+    if camera is not None:
+        # The minimap is displayed on the right of the maze, not as a float, because the floats are the dialogs.
+        minimap = Window(FormattedTextControl(lambda: '\n'.join(camera.minimap())), style='class:minimap',
+                         dont_extend_width=True, dont_extend_height=True)
+        maze = VSplit([maze, ConditionalContainer(minimap, filter=Condition(lambda: camera.show_minimap))])
+
+        camera_bindings = KeyBindings()
+        camera_bindings.add('m', filter=~dialog_is_open())(lambda event: setattr(camera, 'show_minimap', not camera.show_minimap))
+        key_bindings = merge_key_bindings([key_bindings, camera_bindings])
+
+    body = HSplit([
+        Window(FormattedTextControl(status), height=1),
+        maze,
+        Window(FormattedTextControl(toolbar), height=1, style='class:bottom-toolbar')])
+
+    style = Style.from_dict({
+        'exit dialog frame.label': 'bg:#2c3e50 #cb4335',
+        'exit dialog.body': 'bg:#2c3e50 #cb4335',
+        'dialog shadow': 'bg:#17202a',
+        'minimap': 'bg:#2c3e50 #ffffff'})
+
+    app = Application(layout=Layout(FloatContainer(content=body, floats=[])), key_bindings=key_bindings,
+                      style=style, full_screen=True)
+
+    if PROFILER is not None:
+        PROFILER.attach(app)
+
+    return app
+
+
+def run_application(app: 'Application', tasks: list=()) -> object:
+    """
+    This function runs the application of the game or the replay on its asyncio event loop, with tasks next to the
+    input and the rendering of prompt_toolkit. Each task is a function that returns a coroutine, which is started
+    with the application and cancelled when it exits.
+
+    :param app: The application of the game or the replay.
+    :param tasks: Functions that return the coroutines of the tasks.
+    :return: The result of the application.
+    """
+
+    return app.run(pre_run=lambda: [app.create_background_task(task()) for task in tasks])
+
+
+def dialog_is_open() -> 'Condition':
+    """
+    A filter that is active while a dialog is displayed over the maze.
+
+    :return: Condition
+    """
+
+    from prompt_toolkit.filters import Condition
+    from prompt_toolkit.application import get_app
+
+    return Condition(lambda: bool(get_app().layout.container.floats))
+
+
+def show_dialog(app: 'Application', dialog: 'Dialog') -> callable:
+    """
+    The task of this function is to display a dialog as a float over the maze and focus it.
+
+    :param app: The application of the game or the replay.
+    :param dialog: The dialog to be displayed.
+    :return: A function that closes the dialog.
+    """
+
+    from prompt_toolkit.layout.containers import Float
+
+    container, previous_window = app.layout.container, app.layout.current_window
+    dialog_float = Float(content=dialog)
+    container.floats.append(dialog_float)
+    app.layout.focus(dialog)
+
+    def close() -> None:
+        container.floats.remove(dialog_float)
+        app.layout.focus(previous_window)
+
+    return close
+
+
+def riddle_dialog(app: 'Application', question: str, on_answer: callable) -> None:
+    """
+    This function asks the question of a riddle in a dialog over the maze and passes the answer to on_answer.
+    Cancelling the dialog passes None, like the cancel button of input_dialog.
+
+    :param app: The application of the game.
+    :param question: The question of the riddle.
+    :param on_answer: A function that takes the answer of the player.
+    :return: None
+    """
+
+    text_dialog(app=app, title='Riddle?', text=question, on_answer=on_answer)
+
+
+def text_dialog(app: 'Application', title: str, text: str, on_answer: callable) -> None:
+    """
+    This function asks for a text in a dialog over the maze and passes it to on_answer, or None if the dialog is cancelled.
+
+    :param app: The application of the game or the replay.
+    :param title: The title of the dialog.
+    :param text: The text displayed above the input.
+    :param on_answer: A function that takes the text entered by the user.
+    :return: None
+    """
+
+    from prompt_toolkit.layout.containers import HSplit
+    from prompt_toolkit.widgets import Button, Dialog, Label, TextArea
+
+    def answer(user_answer: str) -> None:
+        close()
+        on_answer(user_answer)
+
+    text_area = TextArea(multiline=False, accept_handler=lambda buffer: answer(buffer.text))
+    dialog = Dialog(title=title, body=HSplit([Label(text=text), text_area], padding=1),
+                    buttons=[Button(text='OK', handler=lambda: answer(text_area.text)),
+                             Button(text='Cancel', handler=lambda: answer(None))],
+                    with_background=False)
+
+    close = show_dialog(app=app, dialog=dialog)
+
+
+def exit_dialog(app: 'Application') -> None:
+    """
+    The task of this function is to exit the game or the replay after user confirmation in a dialog over the maze.
+
+    :param app: The application of the game or the replay.
+    :return: None
+    """
+
+    from prompt_toolkit.layout.containers import HSplit
+    from prompt_toolkit.widgets import Button, Dialog, Label
+
+    dialog = Dialog(title='EXIT', body=Label(text='Are you sure?'),
+                    buttons=[Button(text='Yes', handler=lambda: app.exit(result='exit')),
+                             Button(text='No', handler=lambda: close())],
+                    with_background=False)
+
+    close = show_dialog(app=app, dialog=HSplit([dialog], style='class:exit'))
+
+
+class MazeRenderer:
+    """
+    Drawing the frames of the game on the terminal with ANSI escape sequences.
+    The renderer keeps the last frame and sends only the cells that changed since then, with cursor addressing,
+    in one write per frame. The first frame clears the screen and draws everything.
+    """
+
+    __slots__ = ('stream', 'grid', 'frame', 'status')
+
+    def __init__(self, stream=None) -> None:
+        self.stream = sys.stdout if stream is None else stream
+        self.grid, self.frame, self.status = None, None, None
+
+    def draw(self, status: str, grid: 'MazeGrid') -> None:
+        """
+        Drawing a frame: the status line on the first line of the screen and the maze under it.
+        The cursor is left on the line after the maze, where the prompt is displayed.
+
+        :param status: The status line of the frame.
+        :param grid: Maze in MazeGrid format.
+        :return: None
+        """
+
+        if grid is not self.grid or grid.changes is None:
+            output = ['\x1b[H\x1b[2J', status, '\n', '\n'.join(grid.lines())]
+            self.grid, self.frame, self.status = grid, bytearray(grid.cells), status
+            grid.changes = []
+        else:
+            output = self.changes(status=status)
+
+        output.append(f'\x1b[{grid.height + 2};1H\x1b[J')
+        self.stream.write(''.join(output))
+        self.stream.flush()
+
+    def changes(self, status: str) -> list:
+        """
+        Returning the escape sequences that turn the last frame into the current one.
+        Signs wider than one column shift the rest of their line, so lines with them are drawn again completely.
+
+        :param status: The status line of the frame.
+        :return: list
+        """
+
+        grid, frame, output = self.grid, self.frame, []
+
+        if status != self.status:
+            output.append(f'\x1b[1;1H{status}\x1b[K')
+            self.status = status
+
+        changed = sorted(index for index in set(grid.changes) if frame[index] != grid.cells[index])
+        grid.changes.clear()
+
+        if any(unicodedata.east_asian_width(sign) in 'WF' for sign in grid.palette[1:]):
+            for y in sorted({index // grid.width for index in changed}):
+                output.append(f'\x1b[{y + 2};1H{grid.line(y)}\x1b[K')
+        else:
+            for index in changed:
+                y, x = divmod(index, grid.width)
+                output.append(f'\x1b[{y + 2};{x + 1}H{grid.palette[grid.cells[index]]}')
+
+        for index in changed:
+            frame[index] = grid.cells[index]
+
+        return output
+
+
+class CastWriter:
+    """
+    Writing frames to a terminal recording in the asciicast v2 format of asciinema: a json header line, then one
+    json line per frame with its time in seconds and its output. It is the stream of a MazeRenderer: what is written
+    between two frames is kept and written as one event by frame, so the file only holds the changes of each frame
+    and nothing builds up in memory.
+    """
+
+    __slots__ = ('cast_file', 'output')
+
+    def __init__(self, cast_file, width: int, height: int, title: str=None) -> None:
+        self.cast_file, self.output = cast_file, []
+        header = {'version': 2, 'width': width, 'height': height, 'env': {'TERM': 'xterm-256color'}}
+        if title is not None:
+            header['title'] = title
+        cast_file.write(json.dumps(header) + '\n')
+
+    def write(self, text: str) -> None:
+        # The output of a terminal has carriage returns before its line feeds, which the players expect.
+        self.output.append(text.replace('\n', '\r\n'))
+
+    def flush(self) -> None:
+        pass
+
+    def frame(self, seconds: float) -> None:
+        """
+        Writing the output of a frame as an event.
+
+        :param seconds: The time of the frame from the start of the recording.
+        :return: None
+        """
+
+        if self.output:
+            self.cast_file.write(json.dumps([round(seconds, 6), 'o', ''.join(self.output)], ensure_ascii=False) + '\n')
+            self.output.clear()
+
+
+class MazeCamera:
+    """
+    A window over a maze that follows the player, so mazes bigger than the screen can be played.
+    The window moves when the player comes closer than margin cells to one of its sides, and only the cells inside it
+    are copied to the view, a small MazeGrid that shares the palette of the maze. The cost of a frame depends on the
+    size of the screen, not on the size of the maze.
+    A minimap of the whole maze, with the player and the markers (the key and the goal) on it, can be displayed next to the window.
+    """
+
+    __slots__ = ('grid', 'view', 'x', 'y', 'focus', 'margin', 'wall', 'markers', 'overview', 'show_minimap')
+
+    def __init__(self, grid: 'MazeGrid', width: int, height: int, wall: str, markers: list=(), margin: int=8) -> None:
+        self.grid, self.view, self.margin, self.wall = grid, None, margin, wall
+        self.x, self.y, self.focus = 0, 0, None
+        self.markers, self.overview, self.show_minimap = list(markers), None, False
+        self.resize(width=width, height=height)
+
+    def resize(self, width: int, height: int) -> None:
+        """
+        Changing the size of the window, which is never bigger than the maze.
+
+        :param width: Width of the window in cells.
+        :param height: Height of the window in cells.
+        :return: None
+        """
+
+        width, height = max(1, min(width, self.grid.width)), max(1, min(height, self.grid.height))
+
+        if self.view is None or (self.view.width, self.view.height) != (width, height):
+            self.view = MazeGrid(width=width, height=height)
+            self.view.palette, self.view.codes, self.view.table = self.grid.palette, self.grid.codes, self.grid.table
+
+    def follow(self, location: list) -> None:
+        """
+        Moving the window so that a location is at least margin cells away from its sides, or at the center of
+        the window the first time.
+
+        :param location: Location of the player in [y, x] format.
+        :return: None
+        """
+
+        def axis(start: int, position: int, size: int, limit: int) -> int:
+            margin = min(self.margin, (size - 1) // 2)
+
+            if self.focus is None:
+                start = position - size // 2
+            elif position < start + margin:
+                start = position - margin
+            elif position >= start + size - margin:
+                start = position - size + margin + 1
+
+            return max(0, min(start, limit - size))
+
+        self.y = axis(self.y, location[0], self.view.height, self.grid.height)
+        self.x = axis(self.x, location[1], self.view.width, self.grid.width)
+        self.focus = [location[0], location[1]]
+
+    def update(self) -> 'MazeGrid':
+        """
+        Copying the cells inside the window to the view. The lines are compared first, so only the cells of
+        the lines that changed are searched for the changes of the view.
+
+        :return: MazeGrid
+        """
+
+        view, grid, x, y, changes = self.view, self.grid, self.x, self.y, self.view.changes
+
+        for line in range(view.height):
+            row, start = (y + line) * grid.width + x, line * view.width
+            cells = grid.cells[row:row + view.width]
+
+            if changes is not None and view.cells[start:start + view.width] != cells:
+                old = view.cells[start:start + view.width]
+                changes.extend(start + index for index in range(view.width) if old[index] != cells[index])
+
+            view.cells[start:start + view.width] = cells
+
+        return view
+
+    def minimap(self, width: int=32, height: int=12) -> list:
+        """
+        Returning the lines of the minimap: each character is a block of the maze, darker when it has more walls,
+        with the markers and the player drawn with their signs and the corners of the window drawn with dots.
+        The blocks are measured once, then only the markers are drawn again.
+
+        :param width: The largest width of the minimap.
+        :param height: The largest height of the minimap.
+        :return: list
+        """
+
+        grid = self.grid
+        block_width, block_height = -(-grid.width // width), -(-grid.height // height)
+
+        if self.overview is None:
+            wall = grid.codes.get(self.wall, 0)
+            shades, self.overview = ' ░▒▓█', []
+
+            for top in range(0, grid.height, block_height):
+                line = []
+                for left in range(0, grid.width, block_width):
+                    rows = [grid.cells[row + left:row + min(left + block_width, grid.width)]
+                            for row in range(top * grid.width, min(top + block_height, grid.height) * grid.width, grid.width)]
+                    walls = sum(cells.count(wall) for cells in rows) / max(1, sum(map(len, rows)))
+                    line.append(shades[min(4, int(walls * 5))])
+                self.overview.append(line)
+
+        lines = [list(line) for line in self.overview]
+
+        for y in [self.y, self.y + self.view.height - 1]:
+            for x in [self.x, self.x + self.view.width - 1]:
+                lines[y // block_height][x // block_width] = '·'
+
+        markers = self.markers + ([(grid[self.focus[0], self.focus[1]], self.focus)] if self.focus else [])
+        for sign, location in markers:
+            if location is not None and grid[location[0], location[1]] == sign:
+                lines[location[0] // block_height][location[1] // block_width] = sign
+
+        return [''.join(line) for line in lines]
+
+
+class LatencyHistogram:
+    """
+    A running histogram of durations with a fixed relative precision. Durations are counted in buckets that grow
+    by 2 ** (1 / 8), about 9%, from one microsecond, so the memory does not grow with the number of durations
+    and a percentile is found by adding up the counts of the buckets in order.
+    """
+
+    __slots__ = ('count', 'total', 'largest', 'buckets')
+
+    RESOLUTION = 8
+
+    def __init__(self) -> None:
+        self.count, self.total, self.largest, self.buckets = 0, 0.0, 0.0, {}
+
+    def add(self, seconds: float) -> None:
+        """
+        Counting a duration.
+
+        :param seconds: The duration in seconds.
+        :return: None
+        """
+
+        bucket = max(0, int(math.log2(max(seconds * 1e6, 1)) * self.RESOLUTION))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count, self.total, self.largest = self.count + 1, self.total + seconds, max(self.largest, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Returning the duration that the given fraction of the durations are not longer than,
+        as the upper bound of its bucket.
+
+        :param fraction: The fraction between 0 and 1, like 0.95 for the 95th percentile.
+        :return: float (seconds)
+        """
+
+        rank, counted = max(1, math.ceil(fraction * self.count)), 0
+
+        for bucket in sorted(self.buckets):
+            counted += self.buckets[bucket]
+            if counted >= rank:
+                return min(2 ** ((bucket + 1) / self.RESOLUTION) / 1e6, self.largest)
+
+        return self.largest
+
+
+class MazeProfiler:
+    """
+    Timing the stages of the frames of the run and replay commands: the key press handlers ('key'), the moves of the
+    game ('step') and of the replay ('seek'), the answer to a riddle dialog ('riddle'), building the lines of the
+    maze ('draw'), rendering the screen ('render') and the time from a key press to the end of the frame that
+    displays it ('frame').
+    Each stage keeps a running LatencyHistogram, and the durations can also be kept as events of the Chrome trace
+    format, which chrome://tracing and Perfetto open.
+    The profiler is used by setting PROFILER, which is what the profiling context manager does. Other code can time
+    its own stages with record and profiled, or subclass it to send the durations elsewhere.
+    """
+
+    __slots__ = ('histograms', 'events', 'origin', 'pressed', 'frame', 'rendering')
+
+    def __init__(self, trace: bool=False) -> None:
+        self.histograms, self.events, self.origin = {}, [] if trace else None, time.perf_counter()
+        self.pressed, self.frame, self.rendering = None, None, None
+
+    def record(self, stage: str, start: float, end: float=None) -> None:
+        """
+        Adding the duration of a stage to its histogram and to the trace.
+
+        :param stage: The name of the stage.
+        :param start: The start of the stage as a time.perf_counter value.
+        :param end: The end of the stage as a time.perf_counter value, by default now.
+        :return: None
+        """
+
+        end = time.perf_counter() if end is None else end
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.add(end - start)
+
+        if self.events is not None:
+            self.events.append({'name': stage, 'cat': 'mazex', 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                                'ts': round((start - self.origin) * 1e6, 1), 'dur': round((end - start) * 1e6, 1)})
+
+    def attach(self, app: 'Application') -> None:
+        """
+        Timing the key presses and the renders of a prompt_toolkit application with its events.
+        A frame starts with the first key press after the last render and ends when the next render ends.
+
+        :param app: The application of the game or the replay.
+        :return: None
+        """
+
+        def before_key_press(key_processor) -> None:
+            self.pressed = time.perf_counter()
+            self.frame = self.frame or self.pressed
+
+        def before_render(app) -> None:
+            self.rendering = time.perf_counter()
+
+        def after_render(app) -> None:
+            end = time.perf_counter()
+            self.record('render', self.rendering, end)
+            if self.frame is not None:
+                self.record('frame', self.frame, end)
+                self.frame = None
+
+        app.key_processor.before_key_press += before_key_press
+        app.key_processor.after_key_press += lambda key_processor: self.record('key', self.pressed)
+        app.before_render += before_render
+        app.after_render += after_render
+
+    def summary(self) -> list:
+        """
+        Returning the lines of a table of the stages with their count, mean, percentiles and maximum in milliseconds.
+
+        :return: list
+        """
+
+        lines = [f"{'stage':<8} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+
+        for stage, histogram in self.histograms.items():
+            timings = [histogram.total / histogram.count] + [histogram.percentile(fraction) for fraction in [0.5, 0.95, 0.99]]
+            lines.append(f'{stage:<8} {histogram.count:>7} ' + ' '.join(f'{seconds * 1000:>9.3f}' for seconds in timings) +
+                         f' {histogram.largest * 1000:>9.3f}')
+
+        return lines
+
+    def save_trace(self, trace_file_path: str) -> None:
+        """
+        Saving the durations in a json file of the Chrome trace format.
+
+        :param trace_file_path: Path of the trace file in string.
+        :return: None
+        """
+
+        with open(trace_file_path, 'w') as trace_file:
+            json.dump({'traceEvents': self.events or [], 'displayTimeUnit': 'ms'}, trace_file)
+
+
+def profiled(stage: str, function: callable) -> callable:
+    """
+    This function returns a function that records each call of the given function as a stage of PROFILER.
+    Without a profiler, the function itself is returned, so code that is not profiled pays nothing.
+
+    :param stage: The name of the stage.
+    :param function: The function to be timed.
+    :return: callable
+    """
+
+    profiler = PROFILER
+    if profiler is None:
+        return function
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profiler.record(stage, start)
+
+    return timed
+
+
+@contextlib.contextmanager
+def profiling(enabled: bool=True, trace_file_path: str=None) -> 'MazeProfiler':
+    """
+    A context manager that sets PROFILER while the run or replay command is running, then displays the summary
+    of the stages and saves the trace file.
+
+    :param enabled: Whether the stages are timed. When False, nothing is done and None is given.
+    :param trace_file_path: Path of the trace file in string, or None to keep no trace.
+    :return: MazeProfiler
+    """
+
+    global PROFILER
+
+    if not enabled:
+        yield None
+        return
+
+    previous, PROFILER = PROFILER, MazeProfiler(trace=trace_file_path is not None)
+    profiler = PROFILER
 
+    try:
+        yield profiler
+    finally:
+        PROFILER = previous
 
-def game_toolbar() -> HTML:
+        if profiler.histograms:
+            print('\n'.join(profiler.summary()))
+        if trace_file_path is not None:
+            profiler.save_trace(trace_file_path)
+
+
+def game_over(mode: str, logs: dict, details: list=[], actions: tuple=None) -> None:
+    """
+    This function will be called at the end of the game and is responsible for the end state and
+    the end message depending on the end mode of the game.
+
+    :param mode: In two situations, lose or win.
+    :param logs: Movement logs in dict format.
+    :param details: Details containing information necessary for display in 'win' mode.
+    :param actions: The directions and the answers of the moves recorded by GameState, for the replay file.
+    :return: None
+    """
+
+    from prompt_toolkit.styles import Style
+    from prompt_toolkit.shortcuts import yes_no_dialog
+
+    lose_style = Style.from_dict({
+        'dialog': 'bg:#cb4335',
+        'dialog frame.label': 'bg:#2c3e50 #cb4335',
+        'dialog.body': 'bg:#2c3e50 #cb4335',
+        'dialog shadow': 'bg:#17202a'})
+
+    win_style = Style.from_dict({
+        'dialog': 'bg:#229954',
+        'dialog frame.label': 'bg:#2c3e50 #229954',
+        'dialog.body': 'bg:#2c3e50 #229954',
+        'dialog shadow': 'bg:#17202a'})
+
+    if mode == 'lose':
+        user_answer = yes_no_dialog(title='GAME OVER', text='Unfortunately, you lost the game!\nDo you want to save the replay file?', style=lose_style).run()
+        if user_answer:
+            save_replay(logs=logs, actions=actions)
+
+    else:
+        best = f' (most points within the moves: {details[3]})' if len(details) > 3 and details[3] is not None else ''
+        user_answer = yes_no_dialog(title='GAME OVER', text=f'Congratulations, you won!\nRemaining moves: {details[0]}\nPoint: {details[1]}/{details[2]}{best}\nDo you want to save the replay file?',
+                       style=win_style).run()
+        if user_answer:
+            save_replay(logs=logs, actions=actions)
+
+
+def game_toolbar() -> 'HTML':
     """
     This function returns an html string containing a simple game guide that can be seen at the bottom of the screen.
 
     :return: HTML
     """
 
-    return HTML('control+c to exit and moving with &#x2191; &#x2193; &#x2190; &#x2192;')
+    from prompt_toolkit.formatted_text import HTML
 
+    return HTML('control+c to exit and moving with &#x2191; &#x2193; &#x2190; &#x2192; - m to show the minimap - h for a hint')
 
-game_bindings = load_basic_bindings()
 
-@game_bindings.add('up')
-def _(event):
+def get_maze_info(maze_file_path: str) -> bool:
     """
-    Read the up arrow key to move the player up.
+    This function Displaying complete information of the maze file.
 
-    :param event:
-    :return:
+    :param maze_file_path: Path of maze file in string format.
+    :return: bool (whether the maze is valid)
     """
 
-    event.current_buffer.insert_text('up')
-    event.app.exit(result=event.app.current_buffer.text)
+    if path_validator(path=maze_file_path, suffix='.mzx'):
+        maze_data = load_maze(maze_file_path)
+        validated_result = maze_validator(maze_data=maze_data, file_path=maze_file_path)
+
+        if validated_result:
+            print(f"Player sign: {maze_data['player']}")
+            print(f"Wall sign: {maze_data['wall']}")
+            print(f"Key sign: {maze_data['key']}")
+            print(f"Goal sign: {maze_data['goal']}")
+            print(f"Point sign: {maze_data['point']}")
+            print(f"Number of moves: {maze_data['moves']}")
+            print(f"Number of riddles: {len(validated_result.riddles)}")
+            print(f"Number of points: {validated_result.total_point}")
+
+        return bool(validated_result)
+    else:
+        print(f"Error: '{maze_file_path}' is not valid!")
+        return False
 
 
-@game_bindings.add('down')
-def _(event):
+def collect_paths(paths: list, suffix: str) -> list:
     """
-    Read the down arrow key to move the player down.
+    This function finds the files of the given paths: files as they are, the files with the suffix in directories and
+    their subdirectories, and the files that match glob patterns like mazes/**/*.mzx.
 
-    :param event: The event that is automatically passed to this binder.
-    :return: str
+    :param paths: Paths of files or directories, or glob patterns, in string format.
+    :param suffix: Suffix of the files found in directories.
+    :return: list of paths without repeats
     """
 
-    event.current_buffer.insert_text('down')
-    event.app.exit(result=event.app.current_buffer.text)
+    import glob
 
+    found = []
+    for path in paths:
+        if glob.has_magic(path):
+            found.extend(sorted(match for match in glob.glob(path, recursive=True) if Path(match).is_file()))
+        elif Path(path).is_dir():
+            found.extend(sorted(str(file_path) for file_path in Path(path).rglob(f'*{suffix}')))
+        else:
+            found.append(path)
+
+    return list(dict.fromkeys(found))
 
-@game_bindings.add('left')
-def _(event):
+
+def inspect_maze_files(paths: list, lint: bool=False, jobs: int=None, json_output: bool=False) -> bool:
+    """
+    This function checks the maze files of files, directories and glob patterns in a pool of processes and displays
+    the information or the problems of each maze as soon as it is checked, as a line of text or a json object.
+
+    :param paths: Paths of maze files or directories, or glob patterns, in string format.
+    :param lint: Whether to check that the mazes can be won, as well.
+    :param jobs: Number of worker processes, by default the number of cores.
+    :param json_output: Whether to write json objects instead of text.
+    :return: bool (whether every maze is valid)
     """
-    Read the left arrow key to move the player left.
 
-    :param event: The event that is automatically passed to this binder.
-    :return: str
+    maze_paths = collect_paths(paths=paths, suffix='.mzx')
+    if not maze_paths:
+        print("Error: No maze file was found!")
+        return False
+
+    jobs = min(jobs or os.cpu_count() or 1, len(maze_paths)) or 1
+    chunk_size = max(1, min(64, len(maze_paths) // (jobs * 8)))
+    chunks = [maze_paths[index:index + chunk_size] for index in range(0, len(maze_paths), chunk_size)]
+    all_valid, counter = True, 0
+
+    with contextlib.ExitStack() as stack:
+        if jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            futures = [executor.submit(inspect_mazes, chunk, lint) for chunk in chunks]
+            reports = chain.from_iterable(future.result() for future in as_completed(futures))
+        else:
+            reports = chain.from_iterable(inspect_mazes(chunk, lint) for chunk in chunks)
+
+        for report in reports:
+            all_valid, counter = all_valid and report['valid'], counter + report['valid']
+
+            if json_output:
+                print(json.dumps(report), flush=True)
+            elif report['valid'] and not lint:
+                print(f"OK {report['path']}: {report['width']}x{report['height']}, {report['moves']} moves, "
+                      f"{report['points']} points, {report['riddles']} riddles")
+            else:
+                print(f"{'OK' if report['valid'] else 'FAIL'} {report['path']}")
+                for error in report['errors']:
+                    print(f"  Error: {error}")
+
+    if not json_output:
+        print(f"{len(maze_paths)} mazes checked: {counter} valid, {len(maze_paths) - counter} invalid.")
+
+    return all_valid
+
+
+def inspect_mazes(maze_paths: list, lint: bool=False) -> list:
+    """
+    This function checks a group of maze files in one task of the pool of processes.
+
+    :param maze_paths: Paths of maze files in string format.
+    :param lint: Whether to check that the mazes can be won, as well.
+    :return: list of reports
+    """
+
+    return [inspect_maze(maze_file_path=maze_file_path, lint=lint) for maze_file_path in maze_paths]
+
+
+def inspect_maze(maze_file_path: str, lint: bool=False) -> dict:
+    """
+    This function checks a maze file and reports its information and every problem found in it.
+    The error messages of the validators are collected in the report instead of being displayed.
+
+    :param maze_file_path: Path of maze file in string format.
+    :param lint: Whether to check that the maze can be won, as well.
+    :return: dict (path, valid, width, height, signs, moves, points, riddles, errors)
+    """
+
+    report = {'path': maze_file_path, 'valid': False, 'width': None, 'height': None, 'signs': None, 'moves': None,
+              'points': 0, 'riddles': 0, 'errors': []}
+    output = io.StringIO()
+
+    try:
+        with contextlib.redirect_stdout(output):
+            maze_errors = check_maze(maze_file_path=maze_file_path, lint=lint, report=report)
+    except Exception as error:
+        maze_errors = [f"The maze file is damaged! ({type(error).__name__}: {error})"]
+
+    messages = [line[len('Error: '):] if line.startswith('Error: ') else line for line in output.getvalue().splitlines()]
+    report['errors'] = messages + maze_errors
+    report['valid'] = not report['errors']
+
+    return report
+
+
+def check_maze(maze_file_path: str, lint: bool, report: dict) -> list:
+    """
+    This function loads a maze file, validates it and fills the report with its information.
+
+    :param maze_file_path: Path of maze file in string format.
+    :param lint: Whether to check that the maze can be won, as well.
+    :param report: The report of the maze in dict format.
+    :return: list of errors
+    """
+
+    if not path_validator(path=maze_file_path, suffix='.mzx'):
+        return [f"'{maze_file_path}' is not valid!"]
+
+    maze_data = load_maze(maze_file_path=maze_file_path)
+    report['width'], report['height'] = maze_data['maze'].width, maze_data['maze'].height
+    report['signs'] = {key: maze_data.get(key) for key in ['player', 'wall', 'key', 'goal', 'point']}
+    report['moves'] = maze_data.get('moves')
+
+    validated_result = maze_validator(maze_data=maze_data, file_path=maze_file_path)
+    if validated_result:
+        report['points'], report['riddles'] = validated_result.total_point, len(validated_result.riddles)
+        if lint:
+            solvability_validator(maze_data=maze_data, validated_result=validated_result, file_path=maze_file_path)
+
+    return []
+
+
+def solve_maze_file(maze_file_path: str, points: bool=False) -> None:
+    """
+    This function checks the maze file and displays the minimum number of moves needed to win it.
+
+    :param maze_file_path: Path of maze file in string format.
+    :param points: Whether the most points that can be taken within the moves and a route are displayed too.
+    :return: None
+    """
+
+    if path_validator(path=maze_file_path, suffix='.mzx'):
+        maze_data = load_maze(maze_file_path)
+        validated_result = maze_validator(maze_data=maze_data, file_path=maze_file_path)
+
+        if validated_result:
+            min_moves = solve_maze(maze_data=maze_data, validated_result=validated_result, file_path=maze_file_path)
+
+            if min_moves is None:
+                print("Error: The goal of this maze cannot be reached!")
+            else:
+                print(f"Minimum number of moves: {min_moves}")
+                print(f"Number of moves: {maze_data['moves']}")
+
+                if points:
+                    route = point_route(maze_data=maze_data, validated_result=validated_result, file_path=maze_file_path)
+                    if route is None:
+                        print("Error: The goal of this maze cannot be reached within the moves!")
+                    else:
+                        print(f"Most points within the moves: {route['points']}/{validated_result.total_point} "
+                              f"in {route['moves']} moves{'' if route['exact'] else ' (heuristic, there can be more)'}")
+                        print('Route: ' + ' -> '.join(f'{kind} {location}' for kind, location in route['route']))
+    else:
+        print(f"Error: '{maze_file_path}' is not valid!")
+
+
+def passable_cells(maze_data: dict) -> tuple:
+    """
+    This function maps the grid of the maze to a flat bytearray of the same shape in which
+    walls are 0, open cells are 1 and the door is 2. The padding of short lines is blocked like a wall,
+    so every open cell has four neighbours inside the buffer.
+
+    :param maze_data: Information of maze in dict format.
+    :return: tuple (cells, width)
+    """
+
+    maze = maze_data['maze']
+    table = bytes(0 if sign in ['', maze_data['wall']] else 1 for sign in maze.palette).ljust(256, b'\x00')
+    cells = maze.cells.translate(table)
+
+    door_y, door_x = maze_data['door']
+    cells[door_y * maze.width + door_x] = 2
+
+    return cells, maze.width
+
+
+def solve_maze(maze_data: dict, validated_result: tuple=None, file_path: str=None) -> int:
+    """
+    The task of this function is to find the minimum number of moves needed to reach the goal.
+    When the maze is loaded from a file, the result is kept in the cache and found again for the same file content.
+
+    :param maze_data: Information of maze in dict format.
+    :param validated_result: The output of maze_validator for this maze, to avoid validating it again.
+    :param file_path: Path of the maze file that maze_data is loaded from, or None.
+    :return: int (None if the goal cannot be reached)
+    """
+
+    if validated_result is None:
+        validated_result = maze_validator(maze_data=maze_data, file_path=file_path)
+        if not validated_result:
+            return None
+
+    return search_maze(maze_data=maze_data, validated_result=validated_result, file_path=file_path)[1]
+
+
+def search_maze(maze_data: dict, validated_result: tuple, file_path: str=None) -> tuple:
+    """
+    A breadth-first search over (location, has key) states with the rules of GameState:
+    walls stop the player, the door is a wall until the key is picked up and riddles are passable.
+    The key is the only way from the states without the key to the states with it, so the two layers are searched in turn.
+    Each layer is visited at most once, so the search is linear in the number of cells.
+    When the maze is loaded from a file, the result is kept in the cache and found again for the same file content.
+
+    :param maze_data: Information of maze in dict format.
+    :param validated_result: The output of maze_validator for this maze.
+    :param file_path: Path of the maze file that maze_data is loaded from, or None.
+    :return: tuple (moves to the key, minimum moves to the goal), None for the one that cannot be reached
+    """
+
+    cache = maze_cache() if file_path is not None else None
+    content_hash = cache.file_hash(file_path) if cache else None
+    cached_moves = cache.get(content_hash, 'search') if content_hash else None
+
+    if cached_moves is not None:
+        return tuple(json.loads(cached_moves))
+
+    key_moves, min_moves = search_layers(maze_data=maze_data, validated_result=validated_result)
+    if content_hash:
+        cache.put(content_hash, 'search', json.dumps([key_moves, min_moves]))
+
+    return key_moves, min_moves
+
+
+def search_layers(maze_data: dict, validated_result: tuple) -> tuple:
+    """
+    The search of search_maze, without the cache.
+
+    :param maze_data: Information of maze in dict format.
+    :param validated_result: The output of maze_validator for this maze.
+    :return: tuple (moves to the key, minimum moves to the goal)
+    """
+
+    player_location, key_location, goal_location, total_point = validated_result
+    cells, width = passable_cells(maze_data)
+
+    start = player_location[0] * width + player_location[1]
+    key = key_location[0] * width + key_location[1]
+    goal = goal_location[0] * width + goal_location[1]
+
+    closed_door = cells.translate(bytes([0, 1, 0]) + bytes(253))
+    distances = shortest_distances(cells=closed_door, width=width, sources=[start], targets=[key, goal])
+    key_moves, min_moves = distances.get(key), distances.get(goal)
+
+    if key_moves is not None and (min_moves is None or key_moves < min_moves):
+        open_door = cells.translate(bytes([0, 1, 1]) + bytes(253))
+        after_key = shortest_distances(cells=open_door, width=width, sources=[key], targets=[goal])
+
+        if goal in after_key and (min_moves is None or key_moves + after_key[goal] < min_moves):
+            min_moves = key_moves + after_key[goal]
+
+    return key_moves, min_moves
+
+
+def shortest_distances(cells: bytearray, width: int, sources: list, targets: list) -> dict:
+    """
+    A breadth-first search on a flat grid of passable cells that stops as soon as all the targets are reached.
+    Narrow frontiers, like the corridors of a perfect maze, are moved one cell at a time. When the frontier gets wide,
+    as in the open parts of braided and sidewinder mazes, it is moved with NumPy arrays like in frontier_search,
+    on a view of the same buffer, until it gets narrow again. Without numpy, every frontier is moved one cell at a time.
+
+    :param cells: Flat grid in bytearray format, zero for blocked cells and non-zero for passable cells.
+                  The buffer is consumed by the search, pass a copy if it is needed later.
+    :param width: Row stride of the grid.
+    :param sources: Cell indexes where the search starts, at distance zero.
+    :param targets: Cell indexes whose distances are wanted.
+    :return: dict {target: distance} for the targets that can be reached
+    """
+
+    distances, pending = {}, set(targets)
+    frontier, steps, unvisited = [], 0, None
+
+    for source in sources:
+        if cells[source]:
+            cells[source] = 0
+            frontier.append(source)
+
+    for target in pending & set(frontier):
+        distances[target] = 0
+    pending -= set(frontier)
+
+    while len(frontier) and pending:
+        if len(frontier) >= WIDE_FRONTIER and unvisited is None:
+            try:
+                import numpy as np
+                unvisited = np.frombuffer(cells, dtype=np.uint8)
+                offsets = np.array([-width, width, -1, 1], dtype=np.int64)
+            except ImportError:
+                unvisited = False
+
+        if len(frontier) >= WIDE_FRONTIER and unvisited is not False:
+            frontier = np.asarray(frontier, dtype=np.int64)
+
+            while len(frontier) >= WIDE_FRONTIER // 4 and pending:
+                steps += 1
+                neighbours = (frontier[:, None] + offsets).ravel()
+                neighbours = neighbours[unvisited[neighbours] != 0]
+
+                # Two cells of the frontier can share a neighbour where the maze has loops.
+                neighbours.sort()
+                frontier = neighbours[np.concatenate((neighbours[:1] >= 0, neighbours[1:] != neighbours[:-1]))]
+                unvisited[frontier] = 0
+
+                for target in [target for target in pending if not cells[target]]:
+                    distances[target] = steps
+                    pending.discard(target)
+
+            frontier = frontier.tolist()
+            continue
+
+        steps += 1
+        next_frontier = []
+        append = next_frontier.append
+
+        for location in frontier:
+            neighbour = location - width
+            if cells[neighbour]:
+                cells[neighbour] = 0
+                append(neighbour)
+            neighbour = location + width
+            if cells[neighbour]:
+                cells[neighbour] = 0
+                append(neighbour)
+            neighbour = location - 1
+            if cells[neighbour]:
+                cells[neighbour] = 0
+                append(neighbour)
+            neighbour = location + 1
+            if cells[neighbour]:
+                cells[neighbour] = 0
+                append(neighbour)
+
+        for target in [target for target in pending if not cells[target]]:
+            distances[target] = steps
+            pending.discard(target)
+
+        frontier = next_frontier
+
+    return distances
+
+
+def distance_field(cells: bytearray, width: int, source: int) -> array:
+    """
+    A breadth-first search from one cell to all the cells it can reach on a flat grid of passable cells.
+    Every move can be played back, so it is also the number of moves from every cell to the source.
+
+    :param cells: Flat grid in bytearray format, zero for blocked cells and non-zero for passable cells.
+                  The buffer is consumed by the search, pass a copy if it is needed later.
+    :param width: Row stride of the grid.
+    :param source: Cell index where the search starts.
+    :return: array of the distances of the cells, -1 for the cells that cannot be reached
+    """
+
+    field, frontier, steps = array('i', [-1]) * len(cells), [], 0
+
+    if cells[source]:
+        cells[source] = 0
+        frontier.append(source)
+
+    while frontier:
+        next_frontier = []
+        append = next_frontier.append
+
+        for location in frontier:
+            field[location] = steps
+
+            neighbour = location - width
+            if cells[neighbour]:
+                cells[neighbour] = 0
+                append(neighbour)
+            neighbour = location + width
+            if cells[neighbour]:
+                cells[neighbour] = 0
+                append(neighbour)
+            neighbour = location - 1
+            if cells[neighbour]:
+                cells[neighbour] = 0
+                append(neighbour)
+            neighbour = location + 1
+            if cells[neighbour]:
+                cells[neighbour] = 0
+                append(neighbour)
+
+        frontier, steps = next_frontier, steps + 1
+
+    return field
+
+
+class MazeDistances:
+    """
+    The distance fields of a maze: the moves from every cell to the key and to the goal while the door is closed,
+    and to the goal once the key has opened it, with riddles passable like in search_maze.
+    They are found once with a breadth-first search from the key and two from the goal, and are kept in the cache for
+    maze files, so the fewest moves needed to win from any cell, the best next move (a hint) and the moves wasted by
+    each move of a game are found with a few lookups, without searching the maze again.
+    """
+
+    __slots__ = ('width', 'key', 'to_key', 'to_goal', 'to_goal_open')
+
+    def __init__(self, maze_data: dict, validated_result: MazeIndex, file_path: str=None) -> None:
+        cells, self.width = passable_cells(maze_data)
+        self.key = validated_result.key[0] * self.width + validated_result.key[1]
+        goal = validated_result.goal[0] * self.width + validated_result.goal[1]
+
+        cache = maze_cache() if file_path is not None else None
+        content_hash = cache.file_hash(file_path) if cache else None
+        cached_fields = cache.get(content_hash, 'distances') if content_hash else None
+
+        if cached_fields is not None:
+            fields = array('i', zlib.decompress(cached_fields))
+            self.to_key, self.to_goal, self.to_goal_open = (fields[index * len(cells):(index + 1) * len(cells)]
+                                                            for index in range(3))
+            return
+
+        closed_door = cells.translate(bytes([0, 1, 0]) + bytes(253))
+        self.to_key = distance_field(cells=bytearray(closed_door), width=self.width, source=self.key)
+        self.to_goal = distance_field(cells=closed_door, width=self.width, source=goal)
+        self.to_goal_open = distance_field(cells=cells.translate(bytes([0, 1, 1]) + bytes(253)), width=self.width, source=goal)
+
+        if content_hash:
+            fields = zlib.compress((self.to_key + self.to_goal + self.to_goal_open).tobytes(), 1)
+            # Fields too big for the cache would only push the other results out of it.
+            if len(fields) <= cache.max_size // 4:
+                cache.put(content_hash, 'distances', fields)
+
+    def remaining(self, location: list, has_key: bool) -> int:
+        """
+        Returning the fewest moves needed to win from a location.
+
+        :param location: Location of the player in [y, x] format.
+        :param has_key: Whether the key has been picked up and the door is open.
+        :return: int (None if the goal cannot be reached)
+        """
+
+        cell = location[0] * self.width + location[1]
+
+        if has_key:
+            return self.to_goal_open[cell] if self.to_goal_open[cell] >= 0 else None
+
+        moves = [self.to_goal[cell]]
+        if self.to_key[cell] >= 0 and self.to_goal_open[self.key] >= 0:
+            moves.append(self.to_key[cell] + self.to_goal_open[self.key])
+
+        moves = [move for move in moves if move >= 0]
+        return min(moves) if moves else None
+
+    def hint(self, location: list, has_key: bool) -> int:
+        """
+        Returning the direction of a move that brings the player one move closer to winning.
+
+        :param location: Location of the player in [y, x] format.
+        :param has_key: Whether the key has been picked up and the door is open.
+        :return: int (an index of DIRECTIONS, None if the goal cannot be reached)
+        """
+
+        moves = self.remaining(location=location, has_key=has_key)
+        if not moves:
+            return None
+
+        for direction, (up, down, left, right) in enumerate(DIRECTIONS):
+            target = [location[0] - up + down, location[1] - left + right]
+            target_has_key = has_key or target[0] * self.width + target[1] == self.key
+            if self.remaining(location=target, has_key=target_has_key) == moves - 1:
+                return direction
+
+    def wasted_moves(self, logs: dict) -> dict:
+        """
+        Returning the moves wasted by each move of a game: the moves it added to the fewest moves needed to win.
+        A move towards the goal wastes none, a move away from it wastes two and a wrong answer to a riddle wastes one.
+
+        :param logs: Movement logs in dict format, like the logs of GameState.
+        :return: dict {move number: wasted moves}, None for the moves made when the goal could not be reached
+        """
+
+        wasted, has_key = {}, False
+        before = self.remaining(location=logs[0]['loc'], has_key=has_key)
+
+        for index in range(1, max(key for key in logs.keys() if isinstance(key, int)) + 1):
+            log = logs[index]
+            has_key = has_key or log['log_type'] == 'key'
+            after = 0 if log['log_type'] == 'win' else self.remaining(location=log['loc'], has_key=has_key)
+
+            wasted[index] = after + 1 - before if before is not None and after is not None else None
+            before = after
+
+        return wasted
+
+
+def wasted_moves_report(distances: MazeDistances, logs: dict) -> list:
+    """
+    This function returns the lines of the report displayed after a game: the fewest moves needed to win,
+    the moves played and the moves wasted, then each move that wasted moves with its log.
+
+    :param distances: The distance fields of the maze.
+    :param logs: Movement logs in dict format.
+    :return: list
+    """
+
+    wasted = distances.wasted_moves(logs=logs)
+    lines = [f"Minimum number of moves: {distances.remaining(location=logs[0]['loc'], has_key=False)} - "
+             f"Moves played: {len(wasted)} - Wasted moves: {sum(moves for moves in wasted.values() if moves)}"]
+
+    for index, moves in wasted.items():
+        if moves:
+            lines.append(f"Move {index}: {moves} wasted move{'s' if moves > 1 else ''} ({replay_message(log=logs[index])})")
+
+    return lines
+
+
+def point_route(maze_data: dict, validated_result: MazeIndex, file_path: str=None, exact_limit: int=12,
+                search: bool=True) -> dict:
+    """
+    The task of this function is to find the most points that can be taken on the way to the goal within the moves
+    of the maze, and a route that takes them. When the maze is loaded from a file, the result is kept in the cache
+    and found again for the same file content.
+
+    :param maze_data: Information of maze in dict format.
+    :param validated_result: The output of maze_validator for this maze.
+    :param file_path: Path of the maze file that maze_data is loaded from, or None.
+    :param exact_limit: The largest number of points for which the best route is searched exactly,
+                        above it the route is found by a heuristic.
+    :param search: When False, only a route kept in the cache is returned and None is returned without it.
+    :return: dict {'points', 'moves', 'route', 'exact'}, the route is a list of [kind, [y, x]]
+             from 'start', 'point', 'key' and 'goal' (None if the goal cannot be reached within the moves)
+    """
+
+    cache = maze_cache() if file_path is not None else None
+    content_hash = cache.file_hash(file_path) if cache else None
+    cached_route = cache.get(content_hash, f'points {exact_limit}') if content_hash else None
+
+    if cached_route is not None:
+        return json.loads(cached_route)
+    if not search:
+        return None
+
+    result = search_points(maze_data=maze_data, validated_result=validated_result, exact_limit=exact_limit)
+    if content_hash:
+        cache.put(content_hash, f'points {exact_limit}', json.dumps(result))
+
+    return result
+
+
+def search_points(maze_data: dict, validated_result: MazeIndex, exact_limit: int=12) -> dict:
+    """
+    The search of point_route, without the cache.
+    The route goes from the start through some points, maybe the key and more points, to the goal. The door is closed
+    before the key and open after it, so the moves between these places are measured twice, with the door closed and
+    open. Each of them is one breadth-first search from the place that stops when all the others are reached, with the
+    goal blocked because reaching it ends the game, and two searches from the goal give the moves to it.
+    With up to exact_limit points, a dynamic programming over the sets of points taken, the last place and whether the
+    key is taken finds the best route. Above it, the points are inserted into the route where they add the fewest moves
+    while the route fits in the moves, and then moved to better places in it, until nothing changes.
+
+    :param maze_data: Information of maze in dict format.
+    :param validated_result: The output of maze_validator for this maze.
+    :param exact_limit: The largest number of points for which the best route is searched exactly.
+    :return: dict {'points', 'moves', 'route', 'exact'} (None if the goal cannot be reached within the moves)
+    """
+
+    cells, width = passable_cells(maze_data)
+    locations = [validated_result.player] + [[cell // width, cell % width] for cell in sorted(validated_result.points)] + \
+                [validated_result.key]
+    places, count, budget = [y * width + x for y, x in locations], len(locations) - 2, maze_data['moves']
+    key, goal, infinity = count + 1, validated_result.goal[0] * width + validated_result.goal[1], 1 << 60
+
+    closed_door = cells.translate(bytes([0, 1, 0]) + bytes(253))
+    open_door = cells.translate(bytes([0, 1, 1]) + bytes(253))
+
+    def sweep(grid: bytearray, source: int, block_goal: bool=True) -> list:
+        grid = bytearray(grid)
+        if block_goal:
+            grid[goal] = 0
+        distances = shortest_distances(cells=grid, width=width, sources=[source], targets=places)
+        return [distances.get(place, infinity) for place in places]
+
+    # The places are the start (0), the points (1 to count) and the key (count + 1), with the door closed or open.
+    # The start is never visited with the door open and nothing is visited after the key with the door closed.
+    between = [[sweep(closed_door, place) for place in places[:-1]] + [None],
+               [None] + [sweep(open_door, place) for place in places[1:]]]
+    to_goal = [sweep(closed_door, goal, block_goal=False), sweep(open_door, goal, block_goal=False)]
+    finish = [[min(to_goal[0][place], between[0][place][key] + to_goal[1][key]) for place in range(count + 1)] + [infinity],
+              to_goal[1]]
+
+    if finish[0][0] > budget:
+        return None
+
+    if count <= exact_limit:
+        route, exact = exact_point_route(between=between, to_goal=to_goal, finish=finish, count=count, budget=budget), True
+    else:
+        route, exact = greedy_point_route(between=between, to_goal=to_goal, count=count, budget=budget), False
+
+    moves = sum(between[is_open][place][next_place] for is_open, place, next_place in route_legs(route, key)) + \
+        to_goal[key in route][route[-1]]
+    kinds = ['start'] + ['point'] * count + ['key']
+
+    return {'points': sum(1 for place in route if 0 < place < key), 'moves': moves, 'exact': exact,
+            'route': [[kinds[place], list(locations[place])] for place in route] + [['goal', list(validated_result.goal)]]}
+
+
+def route_legs(route: list, key: int) -> list:
+    """
+    Returning the legs of a route of point_route with whether the door is open during each of them.
+
+    :param route: The places of the route in order, from the start to the last place before the goal.
+    :param key: The number of the key among the places.
+    :return: list of tuple (door is open, from place, to place)
+    """
+
+    legs, is_open = [], 0
+    for place, next_place in zip(route, route[1:]):
+        legs.append((is_open, place, next_place))
+        is_open = is_open or int(next_place == key)
+
+    return legs
+
+
+def exact_point_route(between: list, to_goal: list, finish: list, count: int, budget: int) -> list:
+    """
+    The dynamic programming of search_points: the fewest moves to take each set of points and stop at each place,
+    with the door closed or open. States that cannot reach the goal within the budget are not extended.
+
+    :param between: Moves between the places, with the door closed and open.
+    :param to_goal: Moves from the places to the goal, with the door closed and open.
+    :param finish: The fewest moves from each place to the goal, with the door closed and open.
+    :param count: Number of points.
+    :param budget: The moves of the maze.
+    :return: list of the places of the best route, from the start to the last place before the goal
+    """
+
+    key, infinity, size = count + 1, 1 << 60, count + 2
+    costs = [[[infinity] * size for _ in range(1 << count)] for _ in range(2)]
+    parents = [[[None] * size for _ in range(1 << count)] for _ in range(2)]
+    costs[0][0][0], best, best_state = 0, (-1, 0), None
+
+    for mask in range(1 << count):
+        for is_open in range(2):
+            mask_costs, distances = costs[is_open][mask], between[is_open]
+
+            for place in range(size):
+                cost = mask_costs[place]
+                if cost + finish[is_open][place] > budget:
+                    continue
+
+                if cost + to_goal[is_open][place] <= budget:
+                    score = (bin(mask).count('1'), -(cost + to_goal[is_open][place]))
+                    if score > best:
+                        best, best_state = score, (is_open, mask, place)
+
+                for point in range(1, count + 1):
+                    bit = 1 << (point - 1)
+                    if not mask & bit:
+                        new_cost = cost + distances[place][point]
+                        if new_cost < costs[is_open][mask | bit][point]:
+                            costs[is_open][mask | bit][point] = new_cost
+                            parents[is_open][mask | bit][point] = (is_open, mask, place)
+
+                if not is_open and cost + distances[place][key] < costs[1][mask][key]:
+                    costs[1][mask][key] = cost + distances[place][key]
+                    parents[1][mask][key] = (0, mask, place)
+
+    route, state = [], best_state
+    while state is not None:
+        route.append(state[2])
+        state = parents[state[0]][state[1]][state[2]]
+
+    return route[::-1]
+
+
+def greedy_point_route(between: list, to_goal: list, count: int, budget: int) -> list:
+    """
+    The heuristic of search_points for many points. Starting from the shorter of the routes to the goal with and
+    without the key, the point that adds the fewest moves is inserted where it adds them while the route fits in the
+    budget. Then each point is taken out and put back where it adds the fewest moves, which can make room for more
+    points, until no point is inserted or moved. Both starting routes are tried and the one with more points is kept.
+
+    :param between: Moves between the places, with the door closed and open.
+    :param to_goal: Moves from the places to the goal, with the door closed and open.
+    :param count: Number of points.
+    :param budget: The moves of the maze.
+    :return: list of the places of the route, from the start to the last place before the goal
     """
 
-    event.current_buffer.insert_text('left')
-    event.app.exit(result=event.app.current_buffer.text)
+    key, infinity = count + 1, 1 << 60
+
+    def route_moves(route: list) -> int:
+        return sum(between[is_open][place][next_place] for is_open, place, next_place in route_legs(route, key)) + \
+            to_goal[key in route][route[-1]]
+
+    def cheapest_insertion(route: list, point: int) -> tuple:
+        best, key_index = (infinity, None), route.index(key) if key in route else len(route)
+        for index in range(1, len(route) + 1):
+            is_open = int(index > key_index)
+            before = between[is_open][route[index - 1]][point]
+            if index < len(route):
+                added = before + between[is_open][point][route[index]] - between[is_open][route[index - 1]][route[index]]
+            else:
+                added = before + to_goal[is_open][point] - to_goal[is_open][route[-1]]
+            best = min(best, (added, index))
+        return best
+
+    def fill(route: list, moves: int, skipped: int=None) -> tuple:
+        changed = True
+        while changed:
+            changed = False
+            while True:
+                insertions = [cheapest_insertion(route, point) + (point,) for point in range(1, count + 1)
+                              if point not in route and point != skipped]
+                added, index, point = min(insertions, default=(infinity, None, None))
+                if moves + added > budget:
+                    break
+                route.insert(index, point)
+                moves, changed = moves + added, True
+
+            for point in [place for place in route if 0 < place < key]:
+                shorter = [place for place in route if place != point]
+                added, index = cheapest_insertion(shorter, point)
+                if route_moves(shorter) + added < moves:
+                    shorter.insert(index, point)
+                    route, moves, changed = shorter, route_moves(shorter), True
+
+        return (sum(1 for place in route if 0 < place < key), -moves), route
+
+    results = []
+    for route in [[0], [0, key]]:
+        if route_moves(route) <= budget:
+            score, route = fill(route=route, moves=route_moves(route))
+
+            # A point that is taken out can make room for more points elsewhere.
+            improved = True
+            while improved:
+                improved = False
+                for point in [place for place in route if 0 < place < key]:
+                    shorter = [place for place in route if place != point]
+                    new_score, new_route = fill(route=shorter, moves=route_moves(shorter), skipped=point)
+                    if new_score > score:
+                        score, route, improved = new_score, new_route, True
+                        break
+
+            results.append((score, route))
+
+    return max(results)[1]
 
 
-@game_bindings.add('right')
-def _(event):
+def run_replay(replay_file_path: str, autoplay: bool=False, fps: float=10.0, annotate: bool=False) -> None:
     """
-    Read the right arrow key to move the player right.
+    This function is responsible for executing the replay file and manages the movements.
+    The moves can also be played one after another at a fixed frame rate by a task on the asyncio event loop of
+    the application. Each frame is scheduled from the start of the playback instead of the last frame, so the
+    frame time does not drift, and when drawing cannot keep up, the playback goes straight to the move it should show.
 
-    :param event: The event that is automatically passed to this binder.
-    :return: str
+    :param replay_file: Path of replay file in string format.
+    :param autoplay: Whether the moves are played from the start, which the space key also starts and pauses.
+    :param fps: Number of moves played per second.
+    :param annotate: Whether the moves wasted by each move are displayed in the toolbar.
+    :return: None
     """
 
-    event.current_buffer.insert_text('right')
-    event.app.exit(result=event.app.current_buffer.text)
-
+    if not interface_validator():
+        return
 
-@game_bindings.add('c-c')
-def _(event):
-    """
-    Reading Control+C (^C) to create a command to quit the game.
+    if not fps > 0:
+        print("Error: The number of moves played per second must be positive!")
+        return
 
-    :param event: The event that is automatically passed to this binder.
-    :return: str
-    """
+    if path_validator(path=replay_file_path, suffix='.rmzx'):
+        replay_data, actions = load_replay_actions(replay_file_path)
+        validated_result = replay_validator(replay_data, file_path=replay_file_path)
 
-    event.current_buffer.insert_text('exit')
-    event.app.exit(result=event.app.current_buffer.text)
+        if validated_result:
+            replay_index = ReplayIndex(replay_data=replay_data, validated_result=validated_result, actions=actions)
+            seek = profiled('seek', replay_index.seek)
+            wasted = {}
+            if annotate:
+                wasted = MazeDistances(maze_data=replay_data, validated_result=validated_result,
+                                       file_path=replay_file_path).wasted_moves(logs=replay_index.logs)
+            toolbar_message = 'control+c to exit - next move with &#x2192; and previous move with &#x2190; - ' \
+                              'first and last move with home and end - 100 moves with page up and page down - ' \
+                              'g to go to a move - r and R to go to the next and previous riddle - m to show the minimap - ' \
+                              'space to play and pause'
+            playing, resume = autoplay, None
+
+            def go_to(index: int, edge_message: str) -> None:
+                nonlocal toolbar_message
+
+                if not 0 <= index <= replay_index.moves or index == replay_index.current:
+                    toolbar_message = edge_message
+                    return
+
+                seek(index)
+                toolbar_message = replay_message(log=replay_index.logs.get(index, {}), wasted=wasted.get(index))
+
+            def go_to_riddle(step: int) -> None:
+                riddles = [index for index in replay_index.riddles if (index - replay_index.current) * step > 0]
+                go_to(riddles[0 if step > 0 else -1] if riddles else -1, 'There is no other riddle in this direction!')
+
+            def ask_move() -> None:
+                def answer(text: str) -> None:
+                    if text is not None and text.strip().isdigit():
+                        go_to(int(text), f'The move must be between 0 and {replay_index.moves}!')
+
+                text_dialog(app=app, title='Go to move', text=f'Move number (0-{replay_index.moves}):', on_answer=answer)
+
+            def toggle_playing() -> None:
+                nonlocal playing
+
+                playing = not playing
+                if playing and replay_index.current == replay_index.moves:
+                    go_to(0, '')
+                if resume is not None:
+                    resume.set()
+
+            def dialog_open() -> bool:
+                return bool(app.layout.container.floats)
+
+            async def play() -> None:
+                import asyncio
+                nonlocal playing, resume
+
+                resume = asyncio.Event()
+                # The dialogs are closed by key presses, which redraw the application, so the playback can go on then.
+                app.after_render += lambda app: None if dialog_open() else resume.set()
+
+                while True:
+                    if not playing or replay_index.current == replay_index.moves:
+                        playing = False
+                        await resume.wait()
+                        resume.clear()
+                        continue
+
+                    if dialog_open():
+                        await resume.wait()
+                        resume.clear()
+                        continue
+
+                    start, first = time.monotonic(), replay_index.current
+                    while playing and replay_index.current < replay_index.moves:
+                        current = replay_index.current
+                        await asyncio.sleep(max(0.0, start + (current - first + 1) / fps - time.monotonic()))
+
+                        if replay_index.current != current or dialog_open():
+                            break
+                        if playing:
+                            go_to(min(max(current + 1, first + int((time.monotonic() - start) * fps)), replay_index.moves), '')
+                            app.invalidate()
+
+            from prompt_toolkit.key_binding import KeyBindings
+
+            bindings, watching = KeyBindings(), ~dialog_is_open()
+            bindings.add('right', filter=watching)(lambda event: go_to(replay_index.current + 1, 'This is the last move!'))
+            bindings.add('left', filter=watching)(lambda event: go_to(replay_index.current - 1, 'This is the first location!'))
+            bindings.add('home', filter=watching)(lambda event: go_to(0, 'This is the first location!'))
+            bindings.add('end', filter=watching)(lambda event: go_to(replay_index.moves, 'This is the last move!'))
+            bindings.add('pagedown', filter=watching)(lambda event: go_to(min(replay_index.current + 100, replay_index.moves), 'This is the last move!'))
+            bindings.add('pageup', filter=watching)(lambda event: go_to(max(replay_index.current - 100, 0), 'This is the first location!'))
+            bindings.add('g', filter=watching)(lambda event: ask_move())
+            bindings.add('r', filter=watching)(lambda event: go_to_riddle(1))
+            bindings.add('R', filter=watching)(lambda event: go_to_riddle(-1))
+            bindings.add('space', filter=watching)(lambda event: toggle_playing())
+            bindings.add('c-c', filter=watching)(lambda event: exit_dialog(app=app))
+
+            camera = MazeCamera(grid=replay_index.grid, width=80, height=24, wall=replay_data['wall'],
+                                markers=[(replay_data['key'], validated_result.key), (replay_data['goal'], validated_result.goal)])
+            app = maze_application(status=lambda: maze_status('replay', replay_index.current, replay_index.points[replay_index.current],
+                                                              validated_result.total_point, replay_data['moves']),
+                                   grid=replay_index.grid, toolbar=lambda: replay_toolbar(toolbar_message), key_bindings=bindings,
+                                   camera=camera, focus=lambda: replay_index.logs[replay_index.current]['loc'])
+            run_application(app=app, tasks=[play])
+    else:
+        print(f"Error: '{replay_file_path}' is not valid!")
 
 
-def get_maze_info(maze_file_path: str) -> None:
+def export_replay(replay_file_path: str, cast_file_path: str, fps: float=10.0, width: int=80, height: int=24,
+                  annotate: bool=False) -> None:
     """
-    This function Displaying complete information of the maze file.
-
-    :param maze_file_path: Path of maze file in string format.
+    This function exports a replay file to a terminal recording in the asciicast v2 format, which asciinema plays.
+    The frames are the ones the replay command displays for each move: the status line, the window of the maze that
+    follows the player and the message of the move, on a terminal of the given size, at fps moves per second.
+    The moves are played without any terminal and each frame is written when it is drawn, with only its changes.
+
+    :param replay_file_path: Path of replay file in string format.
+    :param cast_file_path: Path of output file with .cast suffix in string.
+    :param fps: Number of moves per second of the recording.
+    :param width: Width of the terminal of the recording in columns.
+    :param height: Height of the terminal of the recording in lines.
+    :param annotate: Whether the moves wasted by each move are displayed with its message.
     :return: None
     """
 
-    if path_validator(path=maze_file_path, suffix='.mzx'):
-        maze_data = load_maze(maze_file_path)
-        validated_result = maze_validator(maze_data=maze_data)
+    if not cast_file_path.endswith('.cast'):
+        print("Error: The output file must have the .cast suffix!")
+        return
+    if Path(cast_file_path).exists():
+        print(f"Error: '{cast_file_path}' already exists!")
+        return
+    if not fps > 0 or width < 10 or height < 3:
+        print("Error: The number of moves per second must be positive and the terminal at least 10x3!")
+        return
+    if not path_validator(path=replay_file_path, suffix='.rmzx'):
+        print(f"Error: '{replay_file_path}' is not valid!")
+        return
 
-        if validated_result:
-            print(f"Player sign: {maze_data['player']}")
-            print(f"Wall sign: {maze_data['wall']}")
-            print(f"Key sign: {maze_data['key']}")
-            print(f"Goal sign: {maze_data['goal']}")
-            print(f"Point sign: {maze_data['point']}")
-            print(f"Number of moves: {maze_data['moves']}")
-            print(f"Number of riddles: {len(maze_data['riddles'])}")
-            print(f"Number of points: {validated_result[-1]}")
-    else:
-        print(f"Error: '{maze_file_path}' is not valid!")
+    replay_data, actions = load_replay_actions(replay_file_path)
+    validated_result = replay_validator(replay_data, file_path=replay_file_path)
+    if not validated_result:
+        return
 
+    maze_data = {key: value for key, value in replay_data.items() if not isinstance(key, int)}
+    maze_data['maze'] = replay_data['maze'].copy()
+    directions, answers = actions or replay_actions(replay_data=replay_data)
+    game = GameState(maze_data=maze_data, validated_result=validated_result)
+    wasted = {}
+    if annotate:
+        wasted = MazeDistances(maze_data=maze_data, validated_result=validated_result,
+                               file_path=replay_file_path).wasted_moves(logs=replay_data)
+
+    # Signs wider than one column take two columns of the terminal for each cell.
+    sign_width = 2 if any(unicodedata.east_asian_width(sign) in 'WF' for sign in maze_data['maze'].palette[1:]) else 1
+    camera = MazeCamera(grid=game.grid, width=width // sign_width, height=height - 2, wall=maze_data['wall'])
+
+    with open(cast_file_path, 'w', encoding='utf-8') as cast_file:
+        writer = CastWriter(cast_file=cast_file, width=width, height=height, title=Path(replay_file_path).name)
+        renderer = MazeRenderer(stream=writer)
+
+        for index in range(len(directions) + 1):
+            if index > 0:
+                if game.result:
+                    break
+                game.step(direction=DIRECTIONS[directions[index - 1]], answer=answers.get(index))
 
-def run_replay(replay_file_path: str) -> None:
-    """
-    This function is responsible for executing the replay file and manages the movements.
+            camera.follow(location=game.player)
+            renderer.draw(status=maze_status('replay', index, game.point, game.total_point, replay_data['moves']),
+                          grid=camera.update())
+            writer.write(replay_message(log=replay_data.get(index, {}), wasted=wasted.get(index))[:width])
+            writer.frame(seconds=index / fps)
 
-    :param replay_file: Path of replay file in string format.
-    :return: None
+    print(f"The replay was exported successfully! ({len(directions)} moves, {len(directions) / fps:.1f} seconds)")
+
+
+def replay_message(log: dict, wasted: int=None) -> str:
     """
+    This function returns the message displayed in the toolbar of the replay for the log of a move.
 
-    if path_validator(path=replay_file_path, suffix='.rmzx'):
-        replay_data = load_replay(replay_file_path)
-        validated_result_with_total_point = replay_validator(replay_data)
+    :param log: The log of a move in dict format.
+    :param wasted: The moves wasted by the move, compared to the fewest moves needed to win, or None.
+    :return: str
+    """
 
-        if validated_result_with_total_point:
-            session = PromptSession()
-            current_location, point = 0, 0
-            base_maze = load_replay(replay_file_path)['maze']
-            toolbar_message = 'control+c to exit - next move with &#x2192; and previous move with &#x2190;'
+    if log.get('log_type') == 'point':
+        message = f'{log["log_type"]} {log["loc"]} Point: {log["point"]}'
+    elif log.get('log_type') == 'riddle':
+        message = f'{log["log_type"]} {log["loc"]} q:{log["question"]} a:{log["answer"]}'
+    elif 'log_type' in log:
+        message = f'{log["log_type"]} {log["loc"]}'
+    else:
+        return ''
 
-            while True:
-                clear_screen()
-                draw_maze('replay', replay_data['maze'], current_location, point, validated_result_with_total_point, replay_data['moves'])
+    return message if wasted is None else f'{message} - Wasted moves: {wasted}'
 
-                prompt = session.prompt(key_bindings=replay_bindings, bottom_toolbar=replay_toolbar(toolbar_message))
 
-                if prompt == 'next':
-                    try:
-                        if current_location + 1 not in replay_data.keys():
-                            raise KeyError
+class ReplayIndex:
+    """
+    An index of a replay for moving to any move at once. The moves are played once without any interface,
+    keeping the cells changed by each move with their old and new values, and a snapshot of the grid every
+    interval moves. Going to a move starts from the current move or from the nearest snapshot before it,
+    whichever is closer, so it never applies more than interval moves of changes.
+    The moves are the actions read from a replay file of version 2 when they are given, see load_replay_actions,
+    and are found from the movement logs otherwise.
+    """
 
-                        replay_data[current_location + 1]
+    __slots__ = ('grid', 'logs', 'points', 'deltas', 'keyframes', 'interval', 'riddles', 'current')
 
-                        player_location = [replay_data[current_location]['loc'][0], replay_data[current_location]['loc'][1]]
-                        replay_data['maze'][player_location[0]].pop(player_location[1])
-                        replay_data['maze'][player_location[0]].insert(player_location[1], ' ')
-                        last_maze = replay_data['maze']
+    def __init__(self, replay_data: dict, interval: int=None, validated_result: MazeIndex=None,
+                 actions: tuple=None) -> None:
+        maze_data = {key: value for key, value in replay_data.items() if not isinstance(key, int)}
+        maze_data['maze'] = grid = replay_data['maze'].copy()
+        directions, answers = actions or replay_actions(replay_data=replay_data)
 
-                        current_location += 1
+        if interval is None:
+            # Snapshots of big grids are taken less often, to keep them under about 64 MB in total.
+            interval = max(64, len(grid.cells) * len(directions) // (64 << 20) + 1)
 
-                        player_location = [replay_data[current_location]['loc'][0], replay_data[current_location]['loc'][1]]
-                        sign = base_maze[player_location[0]][player_location[1]]
+        self.interval, self.keyframes, self.deltas, self.points = interval, {0: bytes(grid.cells)}, [[]], [0]
+        last_cells, grid.changes = bytearray(grid.cells), []
 
-                        if sign == replay_data['key']:
-                            replay_data['maze'][replay_data['door'][0]].pop(replay_data['door'][1])
-                            replay_data['maze'][replay_data['door'][0]].insert(replay_data['door'][1], ' ')
+        validated_result = validated_result or maze_validator(maze_data=maze_data)
+        game = GameState(maze_data=maze_data, validated_result=validated_result)
+        self.logs = game.logs
 
-                        elif sign == replay_data['point']:
-                            point += 1
+        for index, direction in enumerate(directions, start=1):
+            if game.result:
+                break
 
-                        replay_data['maze'][player_location[0]].pop(player_location[1])
-                        replay_data['maze'][player_location[0]].insert(player_location[1], replay_data['player'])
+            game.step(direction=DIRECTIONS[direction], answer=answers.get(index))
 
-                        if replay_data[current_location]['log_type'] in ['empty_loc', 'key', 'goal', 'win', 'lose']:
-                            toolbar_message = f'{replay_data[current_location]["log_type"]} {replay_data[current_location]["loc"]}'
-                        elif replay_data[current_location]['log_type'] == 'point':
-                            toolbar_message = f'{replay_data[current_location]["log_type"]} {replay_data[current_location]["loc"]} Point: {replay_data[current_location]["point"]}'
-                        elif replay_data[current_location]['log_type'] == 'riddle':
-                            toolbar_message = f'{replay_data[current_location]["log_type"]} {replay_data[current_location]["loc"]} q:{replay_data[current_location]["question"]} a:{replay_data[current_location]["answer"]}'
+            delta = [(cell, last_cells[cell], grid.cells[cell]) for cell in sorted(set(grid.changes))
+                     if last_cells[cell] != grid.cells[cell]]
+            for cell, old, new in delta:
+                last_cells[cell] = new
+            grid.changes.clear()
 
-                    except KeyError:
-                        toolbar_message = 'This is the last move!'
+            self.deltas.append(delta)
+            self.points.append(game.point)
+            if index % interval == 0:
+                self.keyframes[index] = bytes(grid.cells)
 
-                elif prompt == 'previous':
-                    try:
-                        if current_location - 1 not in replay_data.keys():
-                            raise KeyError
+        grid.changes = None
+        grid.cells[:] = self.keyframes[0]
+        self.grid, self.current = grid, 0
+        self.riddles = [index for index in range(1, self.moves + 1) if self.logs.get(index, {}).get('log_type') == 'riddle']
 
-                        player_location = [replay_data[current_location]['loc'][0], replay_data[current_location]['loc'][1]]
-                        replay_data['maze'][player_location[0]].pop(player_location[1])
+    @property
+    def moves(self) -> int:
+        """
+        Number of moves of the replay.
 
-                        sign = base_maze[player_location[0]][player_location[1]]
+        :return: int
+        """
 
-                        if sign in [replay_data['point'], replay_data['goal']]:
-                            replay_data['maze'][player_location[0]].insert(player_location[1], sign)
-                            if sign == replay_data['point']:
-                                point -= 1
+        return len(self.deltas) - 1
 
-                        elif sign == '?' and replay_data[current_location]['log_type'] == 'riddle':
-                            replay_data['maze'][player_location[0]].insert(player_location[1], sign)
-                        elif sign == replay_data['key']:
-                            replay_data['maze'][player_location[0]].insert(player_location[1], sign)
-                            replay_data['maze'][replay_data['door'][0]].pop(replay_data['door'][1])
-                            replay_data['maze'][replay_data['door'][0]].insert(replay_data['door'][1], replay_data['wall'])
-                        else:
-                            replay_data['maze'][player_location[0]].insert(player_location[1], ' ')
+    def seek(self, index: int) -> None:
+        """
+        Changing the grid to its state after a move.
 
-                        current_location -= 1
+        :param index: Number of the move, from 0 to the number of moves.
+        :return: None
+        """
 
-                        player_location = [replay_data[current_location]['loc'][0], replay_data[current_location]['loc'][1]]
-                        replay_data['maze'][player_location[0]].pop(player_location[1])
-                        replay_data['maze'][player_location[0]].insert(player_location[1], replay_data['player'])
-                        toolbar_message = f'{replay_data[current_location]["log_type"]} {replay_data[current_location]["loc"]}'
+        index = min(max(index, 0), self.moves)
+        keyframe = index - index % self.interval
+        cells, changes = self.grid.cells, self.grid.changes
 
-                        if replay_data[current_location]['log_type'] in ['empty_loc', 'key', 'goal', 'win', 'lose']:
-                            toolbar_message = f'{replay_data[current_location]["log_type"]} {replay_data[current_location]["loc"]}'
-                        elif replay_data[current_location]['log_type'] == 'point':
-                            toolbar_message = f'{replay_data[current_location]["log_type"]} {replay_data[current_location]["loc"]} Point: {replay_data[current_location]["point"]}'
-                        elif replay_data[current_location]['log_type'] == 'riddle':
-                            toolbar_message = f'{replay_data[current_location]["log_type"]} {replay_data[current_location]["loc"]} q:{replay_data[current_location]["question"]} a:{replay_data[current_location]["answer"]}'
+        if abs(index - self.current) > index - keyframe:
+            cells[:] = self.keyframes[keyframe]
+            self.current = keyframe
+            if changes is not None:
+                changes.extend(range(len(cells)))
 
-                    except KeyError:
-                        toolbar_message = 'This is the first location!'
+        while self.current < index:
+            self.current += 1
+            for cell, old, new in self.deltas[self.current]:
+                cells[cell] = new
+            if changes is not None:
+                changes.extend(cell for cell, old, new in self.deltas[self.current])
 
-                elif prompt == 'exit':
-                    exit_code = exit_the_replay()
-                    if exit_code:
-                        clear_screen()
-                        break
-    else:
-        print(f"Error: '{replay_file_path}' is not valid!")
+        while self.current > index:
+            for cell, old, new in self.deltas[self.current]:
+                cells[cell] = old
+            if changes is not None:
+                changes.extend(cell for cell, old, new in self.deltas[self.current])
+            self.current -= 1
 
 
-def replay_validator(replay_data: dict) -> bool:
+def replay_validator(replay_data: dict, file_path: str=None) -> bool:
     """
     The task of this function is to evaluate and confirm the replay file and the information inside it.
 
     :param replay_data: The replay file information in dict format.
-    :return: bool
+    :param file_path: Path of the replay file, to find the result of the maze validator in the cache, or None.
+    :return: MazeIndex of the maze of the replay (False if the replay is rejected)
     """
 
     special_keys = ['maze', 'player', 'wall', 'key', 'goal', 'point', 'moves', 'door', 'riddles']
-    validated_maze = maze_validator(replay_data)
+    validated_maze = maze_validator(replay_data, file_path=file_path)
 
     if validated_maze:
-        player_location, key_location, goal_location, total_point = validated_maze
-
         for key in replay_data.keys():
             if key not in special_keys and not isinstance(key, int):
                 print('Error: The replay file has a problem. This file is probably manipulated!')
                 return False
 
-        return total_point
+        return validated_maze
 
     return False
 
 
-def replay_toolbar(message: str) -> HTML:
+def replay_toolbar(message: str) -> 'HTML':
     """
     This function manages the messages related to each location during
     the execution of the replay file and displays it at the bottom of the screen.
@@ -891,6 +3677,8 @@ def replay_toolbar(message: str) -> HTML:
     :return: HTML
     """
 
+    from prompt_toolkit.formatted_text import HTML
+
     return HTML(message)
 
 
@@ -905,14 +3693,18 @@ def add_log(log_type: str, log: list) -> dict:
         return {'log_type': log_type, 'loc': log[0], 'question': log[1], 'answer': log[2]}
 
 
-def save_replay(logs: dict) -> None:
+def save_replay(logs: dict, actions: tuple=None) -> None:
     """
     The task of this function is to save game movements and logs in the replay file.
 
     :param logs: Movement logs in dict format.
+    :param actions: The directions and the answers of the moves recorded by GameState, or None to find them from the logs.
     :return: None
     """
 
+    from prompt_toolkit.shortcuts import input_dialog
+    from prompt_toolkit.completion import PathCompleter
+
     error_message, success = '', False
 
     while not success:
@@ -924,7 +3716,7 @@ def save_replay(logs: dict) -> None:
                     if not Path(replay_path).exists():
                         try:
                             with open(replay_path, 'wb') as replay_file:
-                                pickle.dump(logs, replay_file)
+                                replay_file.write(encode_replay(replay_data=logs, actions=actions))
 
                             error_message, success = '', True
 
@@ -943,73 +3735,692 @@ def save_replay(logs: dict) -> None:
 def load_replay(replay_path: str) -> dict:
     """
     The task of this function is to load the information in the replay file.
+    Both the current format and the pickle files of version 1 are supported.
 
     :param replay_path: Path of replay file in string format.
     :return: dict
     """
 
+    return load_replay_actions(replay_path=replay_path)[0]
+
+
+def load_replay_actions(replay_path: str) -> tuple:
+    """
+    This function loads a replay file like load_replay, along with the directions and the answers of its moves in the
+    format of replay_actions. They are the ones recorded in the files of version 2, and None for the pickle files of
+    version 1, which only have the movement logs.
+
+    :param replay_path: Path of replay file in string format.
+    :return: tuple (replay_data, actions)
+    """
+
     with open(replay_path, 'rb') as replay_file:
-        replay_data = pickle.load(replay_file)
+        if replay_file.read(4) == REPLAY_MAGIC:
+            return decode_replay(replay_file=replay_file, file_path=replay_path)
+
+        replay_file.seek(0)
+        replay_data = SafeUnpickler(replay_file).load()
 
-    return replay_data
+    replay_data['maze'] = MazeGrid.from_lines(replay_data['maze'])
+    return replay_data, None
 
 
-def exit_the_replay() -> bool:
+def encode_replay(replay_data: dict, actions: tuple=None) -> bytes:
+    """
+    This function encodes a replay in the .rmzx format version 2:
+    the magic bytes and the version, the size of the header, a json header that keeps the information of the maze and
+    the answers given to the riddles by move number, and a zlib payload with the grid of the maze followed by
+    the directions of the moves at two bits per move. Everything else in the logs is found again by playing the moves.
+
+    :param replay_data: Movement logs merged with the information of the maze, in dict format.
+    :param actions: The directions and the answers of the moves in the format of replay_actions, when they are known.
+                    By default, they are found from the movement logs.
+    :return: bytes
     """
-    The task of this function is to exit the replay after user confirmation.
 
-    :return: bool
+    directions, answers = actions or replay_actions(replay_data=replay_data)
+    grid = replay_data['maze']
+
+    header = {key: value for key, value in replay_data.items() if not isinstance(key, int) and key != 'maze'}
+    header['grid'] = {'width': grid.width, 'height': grid.height, 'palette': grid.palette}
+    header['replay'] = {'moves': len(directions), 'answers': {str(index): answer for index, answer in answers.items()}}
+    encoded_header = json.dumps(header).encode('utf-8')
+
+    packed_directions = bytearray((len(directions) + 3) // 4)
+    for index, direction in enumerate(directions):
+        packed_directions[index >> 2] |= direction << ((index & 3) * 2)
+
+    return struct.pack('<4sHHI', REPLAY_MAGIC, REPLAY_VERSION, 0, len(encoded_header)) + encoded_header + \
+        zlib.compress(bytes(grid.cells) + packed_directions)
+
+
+def decode_replay(replay_file, file_path: str=None) -> tuple:
     """
+    This function decodes a replay in the .rmzx format version 2 and plays its moves again
+    to rebuild the movement logs, in the same dict format as the replay files of version 1.
 
-    exit_style = Style.from_dict({
-        'dialog': 'bg:#cb4335',
-        'dialog frame.label': 'bg:#2c3e50 #cb4335',
-        'dialog.body': 'bg:#2c3e50 #cb4335',
-        'dialog shadow': 'bg:#17202a'})
+    :param replay_file: The replay file opened in binary mode, after the magic bytes.
+    :param file_path: Path of the replay file, to find the result of the maze validator in the cache, or None.
+    :return: tuple (replay_data, (directions, answers))
+    """
 
-    exit_code = yes_no_dialog(title='EXIT', text='Are you sure?', style=exit_style).run()
-    return True if exit_code else False
+    header, grid, directions, answers = read_replay(replay_file=replay_file)
 
+    replay_data = simulate_replay(maze_data=dict(header, maze=grid.copy()), directions=directions, answers=answers,
+                                  file_path=file_path)
+    replay_data.update(header)
+    replay_data['maze'] = grid
 
-replay_bindings = load_basic_bindings()
+    return replay_data, (directions, answers)
 
-@replay_bindings.add('left')
-def _(event):
+
+def read_replay(replay_file) -> tuple:
     """
-    Read the left arrow key to previous move.
+    This function reads the parts of a replay in the .rmzx format version 2 without playing its moves.
 
-    :param event: The event that is automatically passed to this binder.
-    :return: str
+    :param replay_file: The replay file opened in binary mode, after the magic bytes.
+    :return: tuple (header, grid, directions, answers)
     """
 
-    event.current_buffer.insert_text('previous')
-    event.app.exit(result=event.app.current_buffer.text)
+    version, _, header_size = struct.unpack('<HHI', replay_file.read(8))
+    if version != REPLAY_VERSION:
+        raise ValueError(f"Version {version} of the replay file format is not supported!")
+
+    header = json.loads(replay_file.read(header_size).decode('utf-8'))
+    grid_info, replay_info = header.pop('grid'), header.pop('replay')
+    payload = zlib.decompress(replay_file.read())
+
+    grid = MazeGrid(width=grid_info['width'], height=grid_info['height'])
+    for sign in grid_info['palette'][1:]:
+        grid.code(sign)
+    grid.cells[:] = payload[:len(grid.cells)]
+
+    packed_directions = payload[len(grid.cells):]
+    if len(packed_directions) != (replay_info['moves'] + 3) // 4:
+        raise ValueError("The size of the moves does not match the header of the replay file!")
+
+    directions = [(packed_directions[index >> 2] >> ((index & 3) * 2)) & 3 for index in range(replay_info['moves'])]
+    answers = {int(index): answer for index, answer in replay_info['answers'].items()}
 
+    return header, grid, directions, answers
 
-@replay_bindings.add('right')
-def _(event):
+
+def replay_actions(replay_data: dict) -> tuple:
     """
-    Read the right arrow key to next move.
+    This function finds the actions of the player from the movement logs: the direction of each move,
+    as an index of DIRECTIONS, and the answers given to the riddles by move number.
+    A move that does not change the location is a wrong answer to the riddle next to the player.
 
-    :param event: The event that is automatically passed to this binder.
-    :return: str
+    :param replay_data: Movement logs merged with the information of the maze, in dict format.
+    :return: tuple (directions, answers)
+    """
+
+    grid, directions, answers = replay_data['maze'], [], {}
+    events = MazeEvents(maze_data=replay_data, validated_result=scan_maze(maze_data=replay_data))
+    steps = {(-1, 0): 0, (1, 0): 1, (0, -1): 2, (0, 1): 3}
+    last_index = max(key for key in replay_data.keys() if isinstance(key, int))
+
+    for index in range(1, last_index + 1):
+        log, (y, x) = replay_data[index], replay_data[index - 1]['loc']
+        step = (log['loc'][0] - y, log['loc'][1] - x)
+
+        if step in steps:
+            direction = steps[step]
+        else:
+            riddles = [direction for direction, (dy, dx) in enumerate([(-1, 0), (1, 0), (0, -1), (0, 1)])
+                       if grid[y + dy, x + dx] == '?' and
+                       (log['log_type'] != 'riddle' or get_riddle(replay_data, [y + dy, x + dx], events)[0] == log['question'])]
+            direction = riddles[0] if riddles else 0
+
+        target = [y - DIRECTIONS[direction][0] + DIRECTIONS[direction][1], x - DIRECTIONS[direction][2] + DIRECTIONS[direction][3]]
+
+        if log['log_type'] == 'riddle':
+            answers[index] = log['answer']
+        elif log['log_type'] == 'lose' and grid[target[0], target[1]] == '?':
+            # The log of the last move is replaced by 'lose', the location shows whether the answer was right.
+            answers[index] = get_riddle(replay_data, target, events)[1] if step in steps else None
+
+        directions.append(direction)
+
+    return directions, answers
+
+
+def simulate_replay(maze_data: dict, directions: list, answers: dict, file_path: str=None) -> dict:
+    """
+    This function plays the moves of a replay on a maze without any interface and returns the movement logs.
+
+    :param maze_data: Information of maze in dict format. The grid of the maze is changed by the moves.
+    :param directions: Directions of the moves, as indexes of DIRECTIONS.
+    :param answers: Answers given to the riddles by move number.
+    :param file_path: Path of the replay file, to find the result of the maze validator in the cache, or None.
+    :return: dict
+    """
+
+    validated_result = maze_validator(maze_data=maze_data, file_path=file_path)
+    if not validated_result:
+        return {}
+
+    game = GameState(maze_data=maze_data, validated_result=validated_result)
+
+    for index, direction in enumerate(directions, start=1):
+        if game.result:
+            break
+
+        game.step(direction=DIRECTIONS[direction], answer=answers.get(index))
+
+    return game.logs
+
+
+def verify_replay_files(paths: list, maze_file_path: str=None, jobs: int=None, json_output: bool=False) -> bool:
+    """
+    This function verifies the replay files, the .rmzx files inside the directories and the files that match
+    glob patterns, in a pool of processes, and displays the result of each one as a line of text or a json object.
+
+    :param paths: Paths of replay files or directories, or glob patterns, in string format.
+    :param maze_file_path: Path of the maze file that the replays must be played on, or None.
+    :param jobs: Number of worker processes, by default the number of cores.
+    :param json_output: Whether to write json objects instead of text.
+    :return: bool (whether every replay is valid)
+    """
+
+    if maze_file_path is not None and not path_validator(path=maze_file_path, suffix='.mzx'):
+        print(f"Error: '{maze_file_path}' is not valid!")
+        return False
+
+    replay_paths = collect_paths(paths=paths, suffix='.rmzx')
+    if not replay_paths:
+        print("Error: No replay file was found!")
+        return False
+
+    jobs = min(jobs or os.cpu_count() or 1, len(replay_paths)) or 1
+    all_valid, counter = True, 0
+
+    with contextlib.ExitStack() as stack:
+        if jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            reports = executor.map(verify_replay, replay_paths, [maze_file_path] * len(replay_paths),
+                                   chunksize=max(1, len(replay_paths) // (jobs * 8)))
+        else:
+            reports = (verify_replay(replay_path, maze_file_path) for replay_path in replay_paths)
+
+        for report in reports:
+            all_valid, counter = all_valid and report['valid'], counter + report['valid']
+
+            if json_output:
+                print(json.dumps(report))
+            else:
+                played = f": {report['result']} in {report['moves']} moves, {report['points']}/{report['total_point']} points"
+                print(f"{'OK' if report['valid'] else 'FAIL'} {report['path']}{played if report['result'] else ''}")
+                for error in report['errors']:
+                    print(f"  Error: {error}")
+
+    if not json_output:
+        print(f"{len(replay_paths)} replays verified: {counter} valid, {len(replay_paths) - counter} invalid.")
+
+    return all_valid
+
+
+def verify_replay(replay_path: str, maze_file_path: str=None) -> dict:
+    """
+    This function plays the moves of a replay file again with the rules of the game and reports whether it is valid.
+    The movement logs of the replay files of version 1 are checked move by move against the logs made by the rules,
+    so illegal jumps, passing through walls, wrong points and fake wins are found.
+    The error messages of the validators are collected in the report instead of being displayed.
+
+    :param replay_path: Path of replay file in string format.
+    :param maze_file_path: Path of the maze file that the replay must be played on, or None.
+    :return: dict (path, valid, result, moves, points, total_point, errors)
     """
 
-    event.current_buffer.insert_text('next')
-    event.app.exit(result=event.app.current_buffer.text)
+    report = {'path': replay_path, 'valid': False, 'result': None, 'moves': 0, 'points': 0, 'total_point': 0, 'errors': []}
+    output = io.StringIO()
 
+    try:
+        with contextlib.redirect_stdout(output):
+            replay_errors = check_replay(replay_path=replay_path, maze_file_path=maze_file_path, report=report)
+    except Exception as error:
+        replay_errors = [f"The replay file is damaged! ({type(error).__name__}: {error})"]
 
-@replay_bindings.add('c-c')
-def _(event):
+    messages = [line[len('Error: '):] if line.startswith('Error: ') else line for line in output.getvalue().splitlines()]
+    report['errors'] = messages + replay_errors
+    report['valid'] = not report['errors']
+
+    return report
+
+
+def check_replay(replay_path: str, maze_file_path: str, report: dict) -> list:
+    """
+    This function loads a replay file, plays its moves again and fills the report with the result.
+
+    :param replay_path: Path of replay file in string format.
+    :param maze_file_path: Path of the maze file that the replay must be played on, or None.
+    :param report: The report of the replay in dict format.
+    :return: list of errors
+    """
+
+    if not path_validator(path=replay_path, suffix='.rmzx'):
+        return [f"'{replay_path}' is not valid!"]
+
+    with open(replay_path, 'rb') as replay_file:
+        if replay_file.read(4) == REPLAY_MAGIC:
+            header, grid, directions, answers = read_replay(replay_file=replay_file)
+            replay_data, recorded = dict(header, maze=grid), None
+        else:
+            replay_file.seek(0)
+            replay_data = SafeUnpickler(replay_file).load()
+            replay_data['maze'] = MazeGrid.from_lines(replay_data['maze'])
+            recorded = {key: value for key, value in replay_data.items() if isinstance(key, int)}
+
+    validated_result = replay_validator(replay_data=replay_data)
+    if not validated_result:
+        return []
+
+    maze_data = {key: value for key, value in replay_data.items() if not isinstance(key, int)}
+    report['total_point'] = validated_result.total_point
+
+    if maze_file_path is not None and maze_signature(maze_data) != maze_signature(load_maze(maze_file_path)):
+        return [f"The replay is not played on the maze '{maze_file_path}'!"]
+
+    if recorded is not None:
+        if sorted(recorded) != list(range(len(recorded))):
+            return ['The moves of the replay are not numbered one after another!']
+
+        for index in range(1, len(recorded)):
+            (last_y, last_x), (y, x) = recorded[index - 1]['loc'], recorded[index]['loc']
+            if abs(y - last_y) + abs(x - last_x) > 1:
+                return [f"Move {index} is an illegal jump from {[last_y, last_x]} to {[y, x]}!"]
+
+        directions, answers = replay_actions(replay_data=replay_data)
+
+    maze_data['maze'] = maze_data['maze'].copy()
+    game = GameState(maze_data=maze_data, validated_result=validated_result)
+    logs, errors = game.logs, []
+
+    for index, direction in enumerate(directions, start=1):
+        if game.result:
+            errors.append(f"Move {index} is made after the end of the game!")
+            break
+
+        if recorded is not None:
+            (last_y, last_x), (y, x) = recorded[index - 1]['loc'], recorded[index]['loc']
+
+            if (y, x) != (last_y, last_x) and \
+                    (not 0 <= y < maze_data['maze'].height or not 0 <= x < maze_data['maze'].width or
+                     maze_data['maze'][y, x] in ['', maze_data['wall']]):
+                errors.append(f"Move {index} passes through the wall at {[y, x]}!")
+                break
+
+            if (y, x) == (last_y, last_x):
+                # A wrong answer does not move the player, so replay_actions can only guess the riddle from the grid.
+                # The riddle that is answered must still be in the maze and, when it is logged, ask the same question.
+                direction = next((option for option in [direction] + list(range(4))
+                                  if unsolved_riddle(game, option, recorded[index])), direction)
+
+        game.step(direction=DIRECTIONS[direction], answer=answers.get(index))
+
+        if recorded is not None and logs.get(index) != recorded[index]:
+            errors.append(f"Move {index} is recorded as {recorded[index]} but the rules make {logs.get(index)}!")
+            break
+
+    end_mode = game.result
+    report['result'], report['moves'], report['points'] = end_mode or 'unfinished', len(logs) - 1, game.point
+
+    if recorded is not None:
+        claimed_result = recorded[len(recorded) - 1]['log_type']
+        claimed_points = sum(log['log_type'] == 'point' for log in recorded.values())
+
+        if claimed_result in ['win', 'lose'] and claimed_result != end_mode:
+            errors.append(f"The replay claims a {claimed_result} but the rules make {end_mode or 'no end'}!")
+        if not errors and claimed_points != sum(log['log_type'] == 'point' for log in logs.values()):
+            errors.append(f"The replay claims {claimed_points} points but the rules give {game.point}!")
+
+    return errors
+
+
+def unsolved_riddle(game: GameState, direction: int, log: dict) -> bool:
     """
-    Reading Control+C (^C) to create a command to quit the replay.
+    This function checks whether a move of a game goes to a riddle that is not solved yet and matches a log.
 
-    :param event: The event that is automatically passed to this binder.
+    :param game: The game in its state before the move.
+    :param direction: The direction of the move, as an index of DIRECTIONS.
+    :param log: The log of the move in dict format.
+    :return: bool
+    """
+
+    up, down, left, right = DIRECTIONS[direction]
+    riddle = get_riddle(game.maze_data, [game.player[0] - up + down, game.player[1] - left + right], game.events)
+
+    return riddle is not None and (log['log_type'] != 'riddle' or riddle[0] == log['question'])
+
+
+def maze_signature(maze_data: dict) -> str:
+    """
+    This function makes a text that is the same for two mazes only if they have the same grid and information.
+
+    :param maze_data: Information of maze in dict format.
     :return: str
     """
 
-    event.current_buffer.insert_text('exit')
-    event.app.exit(result=event.app.current_buffer.text)
+    information = {key: maze_data[key] for key in ['player', 'wall', 'key', 'goal', 'point', 'moves', 'door', 'riddles']}
+    return json.dumps([maze_data['maze'].lines(), information])
+
+
+def run_tournament(maze_directory: str, agent_paths: list, jobs: int=None, json_output: bool=False,
+                   replay_directory: str=None, time_limit: float=None) -> bool:
+    """
+    This function plays every agent on every maze file of a directory in a pool of processes and displays
+    the result of each run as a line of text or a json object, followed by a summary of each agent.
+
+    :param maze_directory: Path of a directory of maze files, of one maze file or a glob pattern, in string format.
+    :param agent_paths: Paths of the agent scripts in string format, each one can end with :function_name.
+    :param jobs: Number of worker processes, by default the number of cores.
+    :param json_output: Whether to write json objects instead of text.
+    :param replay_directory: Path of a directory to save the replay of every run in, or None.
+    :param time_limit: Seconds that each run can take before it is stopped, or None.
+    :return: bool (whether the mazes and the agents were found)
+    """
+
+    maze_paths = collect_paths(paths=[maze_directory], suffix='.mzx')
+    if not maze_paths:
+        print(f"Error: No maze file was found in '{maze_directory}'!")
+        return False
+
+    for agent_path in agent_paths:
+        if not path_validator(path=agent_script(agent_path=agent_path)[0], suffix='.py'):
+            print(f"Error: '{agent_path}' is not a valid agent script!")
+            return False
+
+    runs = [(maze_path, agent_path) for maze_path in maze_paths for agent_path in agent_paths]
+    jobs = min(jobs or os.cpu_count() or 1, len(runs)) or 1
+    summary = {agent_path: [0, 0, 0, 0.0] for agent_path in agent_paths}
+
+    replay_paths = [None] * len(runs)
+    if replay_directory is not None:
+        Path(replay_directory).mkdir(parents=True, exist_ok=True)
+        replay_paths = tournament_replay_paths(runs=runs, replay_directory=replay_directory)
+
+    with contextlib.ExitStack() as stack:
+        arguments = [[run[0] for run in runs], [run[1] for run in runs], [time_limit] * len(runs), replay_paths]
+        if jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            reports = executor.map(play_agent, *arguments, chunksize=max(1, len(runs) // (jobs * 8)))
+        else:
+            reports = map(play_agent, *arguments)
+
+        for report in reports:
+            agent_summary = summary[report['agent']]
+            agent_summary[0] += 1
+            agent_summary[1] += report['result'] == 'win'
+            agent_summary[2] += report['points']
+            agent_summary[3] += report['seconds']
+
+            if json_output:
+                print(json.dumps(report))
+            else:
+                print(f"{report['result'].upper():<10} {report['maze']} {report['agent']}: {report['moves']} moves left, "
+                      f"{report['points']}/{report['total_point']} points, {report['steps']} steps in {report['seconds']:.3f}s")
+                for error in report['errors']:
+                    print(f"  Error: {error}")
+
+    if not json_output:
+        for agent_path, (played, wins, points, seconds) in summary.items():
+            print(f"{agent_path}: {wins}/{played} wins, {points} points, {seconds:.3f}s")
+
+    return True
+
+
+def tournament_replay_paths(runs: list, replay_directory: str) -> list:
+    """
+    This function names the replay file of every run of a tournament after its maze and its agent: the path of the maze
+    relative to the directory that contains all the mazes, the name of the script and the name of the agent function
+    if it is not agent, joined with dots, like sub.daily.smart_bot.play.rmzx for sub/daily.mzx and smart_bot.py:play.
+    A name that more than one run would have gets the number of the run too, so no replay overwrites another one.
+
+    :param runs: The (maze path, agent path) pair of every run.
+    :param replay_directory: Path of the directory of the replays in string format.
+    :return: list of the paths of the replay files
+    """
+
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(maze_path)) for maze_path, agent_path in runs])
+    names, counts = [], {}
+
+    for maze_path, agent_path in runs:
+        script_path, function_name = agent_script(agent_path=agent_path)
+        parts = list(Path(os.path.relpath(os.path.abspath(maze_path), base)).with_suffix('').parts)
+        parts += [Path(script_path).stem] + ([function_name] if function_name != 'agent' else [])
+        names.append('.'.join(parts))
+        counts[names[-1]] = counts.get(names[-1], 0) + 1
+
+    return [str(Path(replay_directory) / (f'{name}.{number}.rmzx' if counts[name] > 1 else f'{name}.rmzx'))
+            for number, name in enumerate(names, start=1)]
+
+
+def agent_script(agent_path: str) -> tuple:
+    """
+    This function separates the path of an agent script from the name of its agent function, which is agent by default.
+
+    :param agent_path: Path of the agent script in string format, it can end with :function_name.
+    :return: tuple (script path, function name)
+    """
+
+    if not agent_path.endswith('.py') and ':' in agent_path:
+        script_path, _, function_name = agent_path.rpartition(':')
+        return script_path, function_name
+
+    return agent_path, 'agent'
+
+
+@lru_cache(maxsize=None)
+def load_agent(agent_path: str) -> tuple:
+    """
+    This function loads an agent script once in each process. The agent is the function named agent in the script,
+    or the function named after a colon at the end of the path, and it takes an observation in dict format and returns
+    a direction. The answer_riddle function of the script, if there is one, takes the question of a riddle and
+    returns its answer.
+
+    :param agent_path: Path of the agent script in string format, it can end with :function_name.
+    :return: tuple (agent, answer_riddle)
+    """
+
+    script_path, function_name = agent_script(agent_path=agent_path)
+    spec = importlib.util.spec_from_file_location(Path(script_path).stem, script_path)
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+
+    return getattr(script, function_name), getattr(script, 'answer_riddle', None)
+
+
+def play_agent(maze_file_path: str, agent_path: str, time_limit: float=None, replay_path: str=None) -> dict:
+    """
+    This function plays an agent on a maze without any interface and reports the result of the run.
+    The error messages of the validators and the errors of the agent are collected in the report, and anything else
+    the agent writes is left out.
+
+    :param maze_file_path: Path of maze file in string format.
+    :param agent_path: Path of the agent script in string format, it can end with :function_name.
+    :param time_limit: Seconds that the run can take before it is stopped, or None.
+    :param replay_path: Path of the replay file to save the run in, or None.
+    :return: dict (maze, agent, result, moves, points, total_point, steps, seconds, replay, errors)
+    """
+
+    report = {'maze': maze_file_path, 'agent': agent_path, 'result': 'error', 'moves': 0, 'points': 0, 'total_point': 0,
+              'steps': 0, 'seconds': 0.0, 'replay': None, 'errors': []}
+    output, start = io.StringIO(), time.perf_counter()
+
+    try:
+        with contextlib.redirect_stdout(output):
+            agent_errors = play_agent_game(maze_file_path=maze_file_path, agent_path=agent_path, time_limit=time_limit,
+                                           replay_path=replay_path, report=report)
+    except Exception as error:
+        agent_errors = [f"The agent failed! ({type(error).__name__}: {error})"]
+        report['result'] = 'error'
+
+    messages = [line[len('Error: '):] for line in output.getvalue().splitlines() if line.startswith('Error: ')]
+    report['errors'] = messages + agent_errors
+    report['seconds'] = time.perf_counter() - start
+
+    return report
+
+
+def play_agent_game(maze_file_path: str, agent_path: str, time_limit: float, replay_path: str, report: dict) -> list:
+    """
+    This function loads a maze and an agent, plays the game until it ends, the agent gives up by returning None or
+    the time limit is reached, and fills the report with the result: win, lose, unfinished or timeout.
+    The time limit is enforced inside the agent by agent_timer, so an agent that never returns is stopped too.
+
+    The agent is given one observation dict, updated after every step: the grid of the maze and the wall sign,
+    the locations of the player, the key, the goal and the door, the remaining moves, the points, the total points,
+    whether the key is still in the maze, and the events of the last step as returned by GameState.step.
+    It returns an index of DIRECTIONS or one of DIRECTION_NAMES.
+
+    :param maze_file_path: Path of maze file in string format.
+    :param agent_path: Path of the agent script in string format, it can end with :function_name.
+    :param time_limit: Seconds that the run can take before it is stopped, or None.
+    :param replay_path: Path of the replay file to save the run in, or None.
+    :param report: The report of the run in dict format.
+    :return: list of errors
+    """
+
+    if not path_validator(path=maze_file_path, suffix='.mzx'):
+        return [f"'{maze_file_path}' is not valid!"]
+
+    maze_data = load_maze(maze_file_path=maze_file_path)
+    validated_result = maze_validator(maze_data=maze_data, file_path=maze_file_path)
+    if not validated_result:
+        return []
+
+    agent, answer_riddle = load_agent(agent_path)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+
+    with agent_timer(time_limit=time_limit) as guard:
+        result = play_agent_loop(maze_data=maze_data, validated_result=validated_result, agent=guard(agent),
+                                 answer_riddle=answer_riddle and guard(answer_riddle, timeout_value=''),
+                                 deadline=deadline, report=report)
+
+    if isinstance(result, list):
+        return result
+
+    if replay_path is not None:
+        with open(replay_path, 'wb') as replay_file:
+            replay_file.write(encode_replay(replay_data=maze_data, actions=result))
+        report['replay'] = str(replay_path)
+
+    return []
+
+
+def play_agent_loop(maze_data: dict, validated_result: MazeIndex, agent: callable, answer_riddle: callable,
+                    deadline: float, report: dict):
+    """
+    This function plays the game of a tournament run with the agent until it ends, the agent gives up by returning
+    None or the deadline is reached, and fills the report with the result.
+
+    :param maze_data: Data of the maze in dict format.
+    :param validated_result: The result of maze_validator.
+    :param agent: The agent function, guarded by agent_timer.
+    :param answer_riddle: The answer_riddle function of the agent, guarded by agent_timer, or None.
+    :param deadline: The time.perf_counter value that the run must end by, or None.
+    :param report: The report of the run in dict format.
+    :return: tuple (directions, answers) of the played moves, or list of errors
+    """
+
+    result = None
+    game = GameState(maze_data=dict(maze_data, maze=maze_data['maze'].copy()), validated_result=validated_result,
+                     answer_riddle=answer_riddle)
+    observation = {'grid': game.grid, 'wall': maze_data['wall'], 'player': list(game.player), 'key': game.key,
+                   'goal': game.goal, 'door': maze_data['door'], 'moves': game.moves, 'point': game.point,
+                   'total_point': game.total_point, 'is_key': game.is_key, 'events': []}
+
+    while game.result is None:
+        if deadline is not None and time.perf_counter() > deadline:
+            result = 'timeout'
+            break
+
+        try:
+            direction = agent(observation)
+        except AgentTimeout:
+            result = 'timeout'
+            break
+
+        if direction is None:
+            result = 'unfinished'
+            break
+
+        direction = DIRECTION_NAMES.index(direction) if isinstance(direction, str) else direction
+        if direction not in range(4):
+            return [f"The agent returned {direction!r}, which is not a direction!"]
+
+        events = game.step(direction=DIRECTIONS[direction])
+        report['steps'] += 1
+
+        observation['player'][:] = game.player
+        observation['moves'], observation['point'], observation['is_key'] = game.moves, game.point, game.is_key
+        observation['events'] = events
+
+    report['result'] = game.result or result
+    report['moves'], report['points'], report['total_point'] = game.moves, game.point, game.total_point
+    return game.directions, game.answers
+
+
+@contextlib.contextmanager
+def agent_timer(time_limit: float):
+    """
+    This function enforces the time limit of a tournament run inside the agent: a SIGALRM timer is set for the time
+    limit, and when it fires while the agent or its answer_riddle function is running, AgentTimeout is raised in it,
+    so an agent that loops or blocks cannot stall its worker. When it fires between the calls, the deadline check of
+    the game loop ends the run. Where there is no setitimer (Windows) or outside the main thread, no timer is set and
+    the time limit is only checked between the steps.
+
+    :param time_limit: Seconds that the run can take, or None.
+    :return: function that wraps a function of the agent, guard(function, timeout_value=None)
+    """
+
+    import signal
+    import threading
+
+    calling = [False]
+    timed_out = [False]
+
+    def alarm(signum, frame) -> None:
+        timed_out[0] = True
+        if calling[0]:
+            calling[0] = False
+            raise AgentTimeout
+
+    def guard(function: callable, timeout_value=None) -> callable:
+        def guarded(*arguments):
+            if timed_out[0]:
+                if timeout_value is None:
+                    raise AgentTimeout
+                return timeout_value
+
+            try:
+                calling[0] = True
+                return function(*arguments)
+            except AgentTimeout:
+                # A riddle of a step that ran out of time is answered with timeout_value, so the step still ends
+                # in a consistent state, and the run ends at the deadline check before the next step.
+                if timeout_value is None:
+                    raise
+                return timeout_value
+            finally:
+                calling[0] = False
+
+        return guarded
+
+    if time_limit is None or not hasattr(signal, 'setitimer') \
+            or threading.current_thread() is not threading.main_thread():
+        yield guard
+        return
+
+    previous = signal.signal(signal.SIGALRM, alarm)
+    signal.setitimer(signal.ITIMER_REAL, max(time_limit, 1e-6))
+    try:
+        yield guard
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
 
 
 if __name__ == '__main__':
@@ -3,7 +3,7 @@ from setuptools import setup, find_packages
 
 HERE = pathlib.Path(__file__).parent
 README = (HERE / "README.md").read_text()
-install_requires = ['click',]
+install_requires = ['click', 'prompt_toolkit>=3.0.16']
 dependency_links = ['click',]
 
 setup (
@@ -12,6 +12,7 @@ setup (
  version = '1.0.0',
  packages = find_packages(),
  install_requires = install_requires,
+ extras_require = {'batch': ['numpy']},
  python_requires='>=3.6',
  entry_points='''
         [console_scripts]
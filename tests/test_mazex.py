@@ -0,0 +1,684 @@
+import os
+import json
+import time
+import pickle
+import random
+
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import mazex.mazex
+from mazex.mazex import (DIRECTIONS, GameBatch, GameState, MazeCache, MazeDistances, MazeGrid, ReplayIndex,
+                         encode_replay, generate_maze, load_maze, load_replay, load_replay_actions, main,
+                         make_maze_file, maze_cache, maze_validator, passable_cells, play_agent, run_tournament,
+                         save_maze, scan_maze, search_layers, search_maze, search_points, solve_maze, verify_replay,
+                         verify_replay_files)
+
+
+@pytest.fixture(autouse=True)
+def cache_off(monkeypatch):
+    """
+    The tests never read or write the cache of the user.
+    """
+
+    monkeypatch.setenv('MAZEX_CACHE', 'off')
+    maze_cache.cache_clear()
+    yield
+    maze_cache.cache_clear()
+
+
+@pytest.fixture
+def maze_data() -> dict:
+    return generate_maze(width=21, height=15, seed=5, points=4, riddles=2, braid=0.3, slack=0.5)
+
+
+@pytest.fixture
+def riddle_maze() -> tuple:
+    """
+    A game that ends with a wrong answer to a riddle, next to another riddle that is already solved,
+    so the direction of the last move cannot be found from the logs.
+
+    :return: tuple (maze_data, game)
+    """
+
+    maze_data = {'maze': MazeGrid.from_lines(['oooooooo', 'ooo?oooo', 'oK X?o*o', 'oooooooo']), 'player': 'X', 'wall': 'o',
+                 'key': 'K', 'goal': '*', 'point': '$', 'moves': 3, 'door': [2, 5],
+                 'riddles': [['How much is 1 + 1?', '2', [1, 3]], ['How much is 2 + 2?', '4', [2, 4]]]}
+    game = GameState(maze_data=dict(maze_data, maze=maze_data['maze'].copy()),
+                     validated_result=maze_validator(maze_data=maze_data))
+    for direction, answer in [(0, '2'), (1, None), (3, '5')]:
+        game.step(direction=DIRECTIONS[direction], answer=answer)
+
+    return maze_data, game
+
+
+def play(maze_data: dict, wander: int=12, seed: int=0) -> tuple:
+    """
+    Playing a game with a few random moves and then the hints to the goal. The first answer to each riddle is wrong.
+
+    :return: tuple (game, directions, answers, grids), the grids are the cells after each move
+    """
+
+    validated_result = maze_validator(maze_data=maze_data)
+    distances = MazeDistances(maze_data=maze_data, validated_result=validated_result)
+    right_answers = {question: answer for question, answer, location in maze_data['riddles']}
+    asked = set()
+
+    game = GameState(maze_data=dict(maze_data, maze=maze_data['maze'].copy()), validated_result=validated_result)
+    directions, answers, grids, rnd = [], {}, [bytes(game.grid.cells)], random.Random(seed)
+
+    while not game.result:
+        if len(directions) < wander:
+            direction = rnd.randrange(4)
+        else:
+            direction = distances.hint(location=game.player, has_key=not game.is_key)
+
+        y, x = game.player[0] - DIRECTIONS[direction][0] + DIRECTIONS[direction][1], \
+            game.player[1] - DIRECTIONS[direction][2] + DIRECTIONS[direction][3]
+        question = next((question for question, answer, location in maze_data['riddles'] if location == [y, x]), None)
+        answer = None
+        if question is not None:
+            answer = right_answers[question] if question in asked else 'wrong'
+            asked.add(question)
+
+        if game.step(direction=DIRECTIONS[direction], answer=answer) == ['wall']:
+            continue
+
+        directions.append(direction)
+        if answer is not None:
+            answers[len(directions)] = answer
+        grids.append(bytes(game.grid.cells))
+
+    return game, directions, answers, grids
+
+
+def replay_data(maze_data: dict, game: GameState) -> dict:
+    return dict(game.logs, **maze_data)
+
+
+def test_maze_file_round_trip(tmp_path, maze_data):
+    maze_file_path = str(tmp_path / 'maze.mzx')
+    save_maze(maze_data=maze_data, maze_file_path=maze_file_path)
+    loaded = load_maze(maze_file_path=maze_file_path)
+
+    assert loaded['maze'].lines() == maze_data['maze'].lines()
+    assert {key: value for key, value in loaded.items() if key != 'maze'} == \
+        {key: value for key, value in maze_data.items() if key != 'maze'}
+
+
+def test_maze_file_version_1(tmp_path, maze_data):
+    maze_file_path = tmp_path / 'maze.mzx'
+    maze_file_path.write_bytes(pickle.dumps(dict(maze_data, maze=maze_data['maze'].to_list())))
+    loaded = load_maze(maze_file_path=str(maze_file_path))
+
+    assert loaded['maze'].lines() == maze_data['maze'].lines()
+    assert loaded['moves'] == maze_data['moves'] and loaded['riddles'] == maze_data['riddles']
+
+
+def test_replay_file_round_trip(tmp_path, maze_data):
+    game = play(maze_data)[0]
+    replay_file_path = tmp_path / 'game.rmzx'
+    replay_file_path.write_bytes(encode_replay(replay_data=replay_data(maze_data, game)))
+    loaded = load_replay(replay_path=str(replay_file_path))
+
+    assert game.result == 'win'
+    assert loaded['maze'].lines() == maze_data['maze'].lines()
+    assert {key: value for key, value in loaded.items() if isinstance(key, int)} == game.logs
+
+
+def test_replay_file_keeps_recorded_moves(tmp_path, riddle_maze):
+    maze_data, game = riddle_maze
+    replay_file_path = tmp_path / 'game.rmzx'
+    replay_file_path.write_bytes(encode_replay(replay_data=replay_data(maze_data, game),
+                                               actions=(game.directions, game.answers)))
+    loaded = load_replay(replay_path=str(replay_file_path))
+
+    assert game.result == 'lose' and game.directions == [0, 1, 3] and game.answers == {1: '2', 3: '5'}
+    assert {key: value for key, value in loaded.items() if isinstance(key, int)} == game.logs
+
+
+def test_replay_file_version_1(tmp_path, maze_data):
+    game = play(maze_data)[0]
+    replay_file_path = tmp_path / 'game.rmzx'
+    replay_file_path.write_bytes(pickle.dumps(dict(replay_data(maze_data, game), maze=maze_data['maze'].to_list())))
+    loaded = load_replay(replay_path=str(replay_file_path))
+
+    assert loaded['maze'].lines() == maze_data['maze'].lines()
+    assert {key: value for key, value in loaded.items() if isinstance(key, int)} == game.logs
+
+
+def test_game_batch_matches_game_state(maze_data):
+    pytest.importorskip('numpy')
+
+    validated_result = maze_validator(maze_data=maze_data)
+    right_answers = {tuple(location): answer for question, answer, location in maze_data['riddles']}
+    size, rnd = 16, random.Random(1)
+    batch = GameBatch(maze_data=maze_data, validated_result=validated_result, size=size)
+    games = [GameState(maze_data=dict(maze_data, maze=maze_data['maze'].copy()), validated_result=validated_result)
+             for _ in range(size)]
+
+    for _ in range(maze_data['moves'] + 10):
+        actions = [rnd.randrange(4) for _ in range(size)]
+        answers = [rnd.random() < 0.7 for _ in range(size)]
+
+        for game, action, right in zip(games, actions, answers):
+            if not game.result:
+                y, x = game.player[0] - DIRECTIONS[action][0] + DIRECTIONS[action][1], \
+                    game.player[1] - DIRECTIONS[action][2] + DIRECTIONS[action][3]
+                game.step(direction=DIRECTIONS[action], answer=right_answers.get((y, x)) if right else 'wrong')
+        batch.step(actions=actions, answers=answers)
+
+        assert batch.positions.tolist() == [game.player[0] * batch.width + game.player[1] for game in games]
+        assert batch.moves.tolist() == [game.moves for game in games]
+        assert batch.points.tolist() == [game.point for game in games]
+        assert batch.has_key.tolist() == [not game.is_key for game in games]
+        assert batch.results.tolist() == [{None: 0, 'win': 1, 'lose': 2}[game.result] for game in games]
+
+
+def test_replay_index_seek_matches_linear_replay(maze_data):
+    game, directions, answers, grids = play(maze_data, wander=40)
+    index = ReplayIndex(replay_data=replay_data(maze_data, game), interval=8)
+    rnd = random.Random(2)
+
+    assert index.moves == len(directions)
+    for move in [index.moves, 0, 7, 8, 9] + [rnd.randrange(index.moves + 1) for _ in range(50)]:
+        index.seek(move)
+        assert bytes(index.grid.cells) == grids[move]
+
+
+def test_replay_index_uses_recorded_moves(tmp_path, riddle_maze):
+    maze_data, game = riddle_maze
+    replay_file_path = tmp_path / 'game.rmzx'
+    replay_file_path.write_bytes(encode_replay(replay_data=replay_data(maze_data, game),
+                                               actions=(game.directions, game.answers)))
+    loaded, actions = load_replay_actions(replay_path=str(replay_file_path))
+    index = ReplayIndex(replay_data=loaded, actions=actions)
+    index.seek(index.moves)
+
+    assert actions == (game.directions, game.answers)
+    assert bytes(index.grid.cells) == bytes(game.grid.cells)
+
+
+def test_verify_accepts_real_replays(tmp_path, maze_data):
+    game = play(maze_data)[0]
+    (tmp_path / 'v2.rmzx').write_bytes(encode_replay(replay_data=replay_data(maze_data, game)))
+    (tmp_path / 'v1.rmzx').write_bytes(pickle.dumps(dict(replay_data(maze_data, game), maze=maze_data['maze'].to_list())))
+
+    for name in ['v1.rmzx', 'v2.rmzx']:
+        report = verify_replay(replay_path=str(tmp_path / name))
+        assert report['valid'], report['errors']
+        assert report['result'] == 'win' and report['points'] == game.point
+
+
+def test_verify_accepts_wrong_answer_next_to_solved_riddle(tmp_path, riddle_maze):
+    maze_data, game = riddle_maze
+    (tmp_path / 'v1.rmzx').write_bytes(pickle.dumps(dict(replay_data(maze_data, game), maze=maze_data['maze'].to_list())))
+    report = verify_replay(replay_path=str(tmp_path / 'v1.rmzx'))
+
+    assert report['valid'], report['errors']
+    assert report['result'] == 'lose'
+
+
+def test_verify_rejects_forged_win(tmp_path, maze_data):
+    game = play(maze_data)[0]
+    forged = replay_data(maze_data, game)
+    last = max(key for key in forged if isinstance(key, int))
+    del forged[last]
+    forged[last - 1] = dict(forged[last - 1], log_type='win')
+
+    (tmp_path / 'forged.rmzx').write_bytes(pickle.dumps(dict(forged, maze=maze_data['maze'].to_list())))
+    report = verify_replay(replay_path=str(tmp_path / 'forged.rmzx'))
+
+    assert not report['valid']
+    assert report['result'] != 'win'
+
+
+def test_verify_rejects_wall_pass(tmp_path, maze_data):
+    game = play(maze_data)[0]
+    forged, grid = replay_data(maze_data, game), maze_data['maze']
+    y, x = forged[0]['loc']
+    wall = next([y + dy, x + dx] for dy, dx in [(-1, 0), (1, 0), (0, -1), (0, 1)] if grid[y + dy, x + dx] == maze_data['wall'])
+    forged[1] = {'log_type': 'empty_loc', 'loc': wall}
+
+    (tmp_path / 'wall.rmzx').write_bytes(pickle.dumps(dict(forged, maze=grid.to_list())))
+    report = verify_replay(replay_path=str(tmp_path / 'wall.rmzx'))
+
+    assert not report['valid']
+    assert any('wall' in error for error in report['errors'])
+
+
+class Payload:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __reduce__(self):
+        return open, (self.path, 'w')
+
+
+def test_verify_rejects_malicious_pickle(tmp_path):
+    created = tmp_path / 'created'
+    (tmp_path / 'evil.rmzx').write_bytes(pickle.dumps({'maze': Payload(str(created))}))
+    report = verify_replay(replay_path=str(tmp_path / 'evil.rmzx'))
+
+    assert not report['valid']
+    assert not created.exists()
+    assert any('not allowed' in error for error in report['errors'])
+
+
+def test_verify_fails_without_replays(tmp_path, capsys):
+    assert not verify_replay_files(paths=[str(tmp_path / '*.rmzx')])
+    assert 'No replay file was found' in capsys.readouterr().out
+
+
+def test_validator_reports_every_problem(capsys):
+    maze_data = {'maze': MazeGrid.from_lines(['oooooooo', 'oX  ?  o', ' K X$*o', 'oooooooo']), 'player': 'X',
+                 'wall': 'o', 'key': 'K', 'goal': '*', 'point': '$', 'moves': -1, 'door': [1, 2],
+                 'riddles': [['How much is 1 + 1?', '2', [1, 4]], ['How much is 2 + 2?', '4', [2, 2]]]}
+    errors = ['Lack of proper covering of the wall in line 2',
+              'The valid number of player in each maze is equal to one!',
+              'The location intended for the door must be the location of a wall!',
+              'The value of moves must be a positive integer!',
+              'The mismatch of riddle number 1 with its address!']
+
+    assert scan_maze(maze_data=maze_data).errors == errors
+    assert maze_validator(maze_data=maze_data) is False
+    assert capsys.readouterr().out.splitlines() == [f'Error: {error}' for error in errors]
+
+
+def test_validator_limits_the_wall_problems():
+    lines = ['o' * 9] + ['o      o '] * 14 + ['o' * 9]
+    maze_data = {'maze': MazeGrid.from_lines(lines), 'player': 'X', 'wall': 'o', 'key': 'K', 'goal': '*',
+                 'point': '$', 'moves': 1, 'door': [2, 2]}
+    errors = scan_maze(maze_data=maze_data).errors
+
+    assert errors[:10] == [f'Lack of proper covering of the wall in line {y}' for y in range(1, 11)]
+    assert errors[10] == 'The wall has problems in 4 more places!'
+
+
+def test_validator_indexes_the_special_cells(maze_data):
+    index = maze_validator(maze_data=maze_data)
+    lines = maze_data['maze'].lines()
+    found = {sign: [[y, x] for y, line in enumerate(lines) for x, cell in enumerate(line) if cell == sign]
+             for sign in 'XK*$?'}
+
+    assert [index.player, index.key, index.goal] == [found['X'][0], found['K'][0], found['*'][0]]
+    assert sorted(divmod(cell, maze_data['maze'].width) for cell in index.points) == \
+        [tuple(location) for location in found['$']]
+    assert sorted(index.riddles) == [y * maze_data['maze'].width + x for y, x in found['?']]
+    assert index.door == maze_data['door'] and not index.errors
+
+
+def test_cache_is_off_by_default(tmp_path, monkeypatch, maze_data):
+    monkeypatch.delenv('MAZEX_CACHE')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    save_maze(maze_data=maze_data, maze_file_path=str(tmp_path / 'a.mzx'))
+
+    assert maze_cache().file_hash(str(tmp_path / 'a.mzx')) is None
+    assert solve_maze(maze_data=maze_data, file_path=str(tmp_path / 'a.mzx')) is not None
+    assert not (tmp_path / 'cache').exists()
+
+
+def test_cache_keeps_the_results_of_a_file(tmp_path, monkeypatch, maze_data):
+    monkeypatch.setenv('MAZEX_CACHE', str(tmp_path / 'cache.sqlite'))
+    maze_cache.cache_clear()
+    save_maze(maze_data=maze_data, maze_file_path=str(tmp_path / 'a.mzx'))
+    moves = solve_maze(maze_data=maze_data, file_path=str(tmp_path / 'a.mzx'))
+
+    def no_search(maze_data, validated_result):
+        raise AssertionError('The result of the solver was not kept.')
+
+    monkeypatch.setattr(mazex.mazex, 'search_layers', no_search)
+    assert solve_maze(maze_data=maze_data, file_path=str(tmp_path / 'a.mzx')) == moves
+    assert (tmp_path / 'cache.sqlite').exists()
+
+
+def test_cache_hashes_a_file_again_when_it_changes(tmp_path, maze_data):
+    cache, path = MazeCache(path=str(tmp_path / 'cache.sqlite')), tmp_path / 'a.mzx'
+    path.write_bytes(b'first')
+    os.utime(path, ns=(10 ** 18, 10 ** 18))
+    first_hash = cache.file_hash(str(path))
+
+    # The same size and modification time: the hash that is kept is used without reading the file.
+    path.write_bytes(b'other')
+    os.utime(path, ns=(10 ** 18, 10 ** 18))
+    assert cache.file_hash(str(path)) == first_hash
+
+    os.utime(path, ns=(10 ** 18 + 1, 10 ** 18 + 1))
+    assert cache.file_hash(str(path)) not in (None, first_hash)
+
+
+def test_cache_removes_the_least_recently_used_results(tmp_path):
+    cache = MazeCache(path=str(tmp_path / 'cache.sqlite'), max_size=1000)
+    cache.connect()
+    for number in range(8):
+        cache.put(f'hash{number}', 'search', 'x' * 100)
+    assert cache.get('hash0', 'search') is not None
+
+    for number in range(8, 20):
+        cache.put(f'hash{number}', 'search', 'x' * 100)
+
+    kept = [number for number in range(20) if cache.get(f'hash{number}', 'search') is not None]
+    assert len(kept) * 100 <= 1000
+    assert 19 in kept and 1 not in kept
+
+
+def locked_maze(key_row: str, moves: int=30) -> dict:
+    """
+    A maze whose goal is behind the door, with the key on the row under it.
+    """
+
+    lines = ['ooooooooo', 'oX   oo*o', 'o ooooooo', key_row, 'ooooooooo']
+    return {'maze': MazeGrid.from_lines(lines), 'player': 'X', 'wall': 'o', 'key': 'K', 'goal': '*', 'point': '$',
+            'moves': moves, 'door': [2, 7], 'riddles': []}
+
+
+def fewest_moves(maze_data: dict, validated_result, start: list=None, has_key: bool=False) -> tuple:
+    """
+    The moves to the key and to the goal, by a breadth-first search over every (cell, has key) state at once.
+    By default, the search starts from the player without the key.
+
+    :return: tuple (moves to the key, moves to the goal), None for the one that cannot be reached
+    """
+
+    cells, width = passable_cells(maze_data)
+    key = validated_result.key[0] * width + validated_result.key[1]
+    goal = validated_result.goal[0] * width + validated_result.goal[1]
+    start = start or validated_result.player
+    start = (start[0] * width + start[1], has_key)
+    frontier, seen, moves, key_moves = [start], {start}, 0, None
+
+    while frontier:
+        moves += 1
+        next_frontier = []
+        for cell, has_key in frontier:
+            for target in (cell - width, cell + width, cell - 1, cell + 1):
+                if not cells[target] or (cells[target] == 2 and not has_key):
+                    continue
+                if target == goal:
+                    return key_moves, moves
+                if target == key and key_moves is None:
+                    key_moves = moves
+                state = (target, has_key or target == key)
+                if state not in seen:
+                    seen.add(state)
+                    next_frontier.append(state)
+        frontier = next_frontier
+
+    return key_moves, None
+
+
+@pytest.mark.parametrize('algorithm', ['backtracker', 'kruskal', 'wilson', 'sidewinder'])
+@pytest.mark.parametrize('seed', range(5))
+def test_solver_matches_brute_force(algorithm, seed):
+    maze_data = generate_maze(width=31, height=21, algorithm=algorithm, seed=seed, riddles=3, braid=seed / 4)
+    validated_result = maze_validator(maze_data=maze_data)
+
+    assert search_maze(maze_data=maze_data, validated_result=validated_result) == \
+        fewest_moves(maze_data, validated_result)
+
+
+@pytest.mark.parametrize('key_row, moves', [('o   K   o', (5, 10)), ('o  oK   o', (None, None)),
+                                            ('o   Ko  o', (5, None))])
+def test_solver_needs_the_key_to_pass_the_door(key_row, moves):
+    maze_data = locked_maze(key_row=key_row)
+    validated_result = maze_validator(maze_data=maze_data)
+
+    assert search_maze(maze_data=maze_data, validated_result=validated_result) == moves
+    assert solve_maze(maze_data=maze_data) == moves[1]
+
+
+def write_maze_source(tmp_path, maze_data: dict) -> tuple:
+    """
+    Writing the text file and the json file of a maze, as they are given to the make command.
+
+    :return: tuple (txt path, json path)
+    """
+
+    (tmp_path / 'maze.txt').write_text('\n'.join(maze_data['maze'].lines()) + '\n')
+    (tmp_path / 'maze.json').write_text(json.dumps({key: value for key, value in maze_data.items() if key != 'maze'}))
+    return str(tmp_path / 'maze.txt'), str(tmp_path / 'maze.json')
+
+
+@pytest.mark.parametrize('key_row, moves, verdict', [
+    ('o   K   o', 10, 'The maze file was created successfully!'),
+    ('o  oK   o', 10, 'Error: The key cannot be reached from the location of the player!'),
+    ('o   Ko  o', 10, 'Error: The goal cannot be reached after the door opens!'),
+    ('o   K   o', 9, 'Error: The number of moves (9) is less than the minimum number of moves needed to win (10)!')])
+def test_make_gives_a_verdict_on_solvability(tmp_path, capsys, key_row, moves, verdict):
+    txt_path, json_path = write_maze_source(tmp_path, locked_maze(key_row=key_row, moves=moves))
+    make_maze_file(txt_maze_path=txt_path, json_maze_path=json_path, maze_file_path=str(tmp_path / 'maze.mzx'))
+
+    assert capsys.readouterr().out.strip() == verdict
+    assert (tmp_path / 'maze.mzx').exists() == verdict.startswith('The maze')
+
+
+@pytest.mark.parametrize('algorithm', ['backtracker', 'kruskal', 'wilson', 'sidewinder'])
+def test_generated_mazes_follow_the_rules(algorithm):
+    maze_data = generate_maze(width=40, height=26, algorithm=algorithm, seed=7, points=5, riddles=3, slack=0.5)
+    validated_result = maze_validator(maze_data=maze_data)
+    min_moves = search_maze(maze_data=maze_data, validated_result=validated_result)[1]
+
+    assert (maze_data['maze'].width, maze_data['maze'].height) == (39, 25)
+    assert len(validated_result.points) == 5 and len(maze_data['riddles']) == 3
+    assert maze_data['moves'] == min_moves + int(min_moves * 0.5)
+
+
+@pytest.mark.parametrize('algorithm', ['backtracker', 'kruskal', 'wilson', 'sidewinder'])
+def test_generated_mazes_are_perfect_without_braid(algorithm):
+    maze_data = generate_maze(width=31, height=21, algorithm=algorithm, seed=2)
+    validated_result = maze_validator(maze_data=maze_data)
+    cells, width = passable_cells(maze_data)
+    open_cells = [cell for cell in range(len(cells)) if cells[cell] == 1]
+    passages = sum(cells[cell + 1] == 1 for cell in open_cells) + sum(cells[cell + width] == 1 for cell in open_cells)
+
+    # The goal is closed off by the door, and the other cells are a tree: connected, with no loop.
+    reached, frontier = set(), [validated_result.player[0] * width + validated_result.player[1]]
+    while frontier:
+        cell = frontier.pop()
+        reached.add(cell)
+        frontier.extend(target for target in (cell - width, cell + width, cell - 1, cell + 1)
+                        if cells[target] == 1 and target not in reached)
+
+    assert len(reached) == len(open_cells) - 1
+    assert passages == len(reached) - 1
+
+
+@pytest.mark.parametrize('algorithm', ['backtracker', 'kruskal', 'wilson', 'sidewinder'])
+def test_generated_mazes_are_reproducible(algorithm):
+    first, second, other = (generate_maze(width=25, height=17, algorithm=algorithm, seed=seed, points=3, riddles=2,
+                                          braid=0.4) for seed in (11, 11, 12))
+
+    assert first['maze'].lines() == second['maze'].lines()
+    assert {key: value for key, value in first.items() if key != 'maze'} == \
+        {key: value for key, value in second.items() if key != 'maze'}
+    assert first['maze'].lines() != other['maze'].lines()
+
+
+def test_distance_fields_match_brute_force(maze_data):
+    validated_result = maze_validator(maze_data=maze_data)
+    distances = MazeDistances(maze_data=maze_data, validated_result=validated_result)
+    cells, width = passable_cells(maze_data)
+    goal = validated_result.goal[0] * width + validated_result.goal[1]
+
+    for cell in range(len(cells)):
+        if cells[cell] != 1 or cell == goal:
+            continue
+        location = list(divmod(cell, width))
+        for has_key in [False, True]:
+            has_key = has_key or cell == distances.key
+            assert distances.remaining(location=location, has_key=has_key) == \
+                fewest_moves(maze_data, validated_result, start=location, has_key=has_key)[1]
+
+
+def test_hints_win_in_the_fewest_moves(maze_data):
+    validated_result = maze_validator(maze_data=maze_data)
+    distances = MazeDistances(maze_data=maze_data, validated_result=validated_result)
+    right_answers = {question: answer for question, answer, location in maze_data['riddles']}
+    game = GameState(maze_data=dict(maze_data, maze=maze_data['maze'].copy()), validated_result=validated_result,
+                     answer_riddle=right_answers.get)
+
+    while game.result is None:
+        game.step(direction=DIRECTIONS[distances.hint(location=game.player, has_key=not game.is_key)])
+
+    assert right_answers and game.result == 'win'
+    assert maze_data['moves'] - game.moves == search_maze(maze_data=maze_data, validated_result=validated_result)[1]
+
+
+def test_wasted_moves_add_up_to_the_moves_over_the_minimum(maze_data):
+    validated_result = maze_validator(maze_data=maze_data)
+    distances = MazeDistances(maze_data=maze_data, validated_result=validated_result)
+    game, directions, answers, grids = play(maze_data, wander=12, seed=4)
+    wasted = distances.wasted_moves(logs=game.logs)
+
+    assert game.result == 'win' and len(wasted) == len(directions)
+    assert sum(wasted.values()) == len(directions) - distances.remaining(location=game.logs[0]['loc'], has_key=False)
+    assert set(wasted.values()) <= {0, 1, 2}
+
+
+def test_distance_fields_are_kept_in_the_cache(tmp_path, monkeypatch, maze_data):
+    monkeypatch.setenv('MAZEX_CACHE', str(tmp_path / 'cache.sqlite'))
+    maze_cache.cache_clear()
+    save_maze(maze_data=maze_data, maze_file_path=str(tmp_path / 'a.mzx'))
+    validated_result = maze_validator(maze_data=maze_data)
+    first = MazeDistances(maze_data=maze_data, validated_result=validated_result, file_path=str(tmp_path / 'a.mzx'))
+
+    def no_search(cells, width, source):
+        raise AssertionError('The distance fields were not kept.')
+
+    monkeypatch.setattr(mazex.mazex, 'distance_field', no_search)
+    second = MazeDistances(maze_data=maze_data, validated_result=validated_result, file_path=str(tmp_path / 'a.mzx'))
+    assert [second.to_key, second.to_goal, second.to_goal_open] == [first.to_key, first.to_goal, first.to_goal_open]
+
+
+@pytest.fixture
+def maze_library(tmp_path, maze_data) -> tuple:
+    """
+    A directory of maze files: two good mazes, one in a subdirectory, one with too few moves to win and one damaged.
+
+    :return: tuple (directory, names of the files)
+    """
+
+    (tmp_path / 'mazes' / 'sub').mkdir(parents=True)
+    save_maze(maze_data=maze_data, maze_file_path=str(tmp_path / 'mazes' / 'good.mzx'))
+    save_maze(maze_data=generate_maze(width=15, height=11, seed=1),
+              maze_file_path=str(tmp_path / 'mazes' / 'sub' / 'other.mzx'))
+    save_maze(maze_data=dict(maze_data, moves=3), maze_file_path=str(tmp_path / 'mazes' / 'short.mzx'))
+    (tmp_path / 'mazes' / 'damaged.mzx').write_bytes(b'MZX\x00\x02\x00\x00\x00')
+
+    return tmp_path / 'mazes', ['damaged.mzx', 'good.mzx', 'other.mzx', 'short.mzx']
+
+
+@pytest.mark.parametrize('command', ['info', 'lint'])
+def test_bulk_commands_report_every_maze_as_json(maze_library, maze_data, command):
+    directory, names = maze_library
+    result = CliRunner().invoke(main, [command, str(directory), '--json', '--jobs', '1'])
+    reports = {Path(report['path']).name: report for report in map(json.loads, result.output.splitlines())}
+
+    assert sorted(reports) == names
+    assert result.exit_code == 1
+    assert reports['good.mzx']['valid'] and not reports['damaged.mzx']['valid']
+    assert reports['damaged.mzx']['errors'][0].startswith('The maze file is damaged!')
+    assert reports['short.mzx']['valid'] == (command == 'info')
+    assert [reports['good.mzx'][key] for key in ['width', 'height', 'moves', 'points', 'riddles']] == \
+        [maze_data['maze'].width, maze_data['maze'].height, maze_data['moves'], 4, 2]
+
+    if command == 'lint':
+        assert reports['short.mzx']['errors'] == [
+            f"The number of moves (3) is less than the minimum number of moves needed to win "
+            f"({solve_maze(maze_data=load_maze(str(directory / 'short.mzx')))})!"]
+
+
+def test_bulk_commands_pass_on_good_mazes(maze_library):
+    directory = maze_library[0]
+    paths = [str(directory / 'good.mzx'), str(directory / '**' / 'o*.mzx'), str(directory / 'sub')]
+    result = CliRunner().invoke(main, ['lint', *paths, '--jobs', '1'])
+
+    # The maze of the subdirectory is found by the pattern and the directory, and checked once.
+    assert result.exit_code == 0
+    assert result.output.splitlines()[-1] == '2 mazes checked: 2 valid, 0 invalid.'
+
+
+def most_points(maze_data: dict, validated_result) -> int:
+    """
+    The most points that can be taken on a way to the goal within the moves, by a breadth-first search over every
+    (cell, key, points taken) state. It is only fast enough for small mazes.
+
+    :return: int (-1 if the goal cannot be reached within the moves)
+    """
+
+    cells, width = passable_cells(maze_data)
+    points = {cell: number for number, cell in enumerate(sorted(validated_result.points))}
+    key = validated_result.key[0] * width + validated_result.key[1]
+    goal = validated_result.goal[0] * width + validated_result.goal[1]
+    start = (validated_result.player[0] * width + validated_result.player[1], False, 0)
+    frontier, seen, best = [start], {start}, -1
+
+    for _ in range(maze_data['moves']):
+        next_frontier = []
+        for cell, has_key, taken in frontier:
+            for target in (cell - width, cell + width, cell - 1, cell + 1):
+                if not cells[target] or (cells[target] == 2 and not has_key):
+                    continue
+                if target == goal:
+                    best = max(best, bin(taken).count('1'))
+                    continue
+                state = (target, has_key or target == key, taken | (1 << points[target] if target in points else 0))
+                if state not in seen:
+                    seen.add(state)
+                    next_frontier.append(state)
+        frontier = next_frontier
+
+    return best
+
+
+@pytest.mark.parametrize('algorithm', ['backtracker', 'kruskal', 'sidewinder'])
+def test_wide_frontiers_match_narrow_frontiers(monkeypatch, algorithm):
+    maze_data = generate_maze(width=61, height=41, algorithm=algorithm, seed=3, braid=0.5)
+    validated_result = maze_validator(maze_data=maze_data)
+
+    monkeypatch.setattr(mazex.mazex, 'WIDE_FRONTIER', 10 ** 9)
+    narrow = search_layers(maze_data=maze_data, validated_result=validated_result)
+    monkeypatch.setattr(mazex.mazex, 'WIDE_FRONTIER', 4)
+    wide = search_layers(maze_data=maze_data, validated_result=validated_result)
+
+    assert narrow == wide
+    assert None not in narrow and narrow[0] < narrow[1]
+
+
+@pytest.mark.parametrize('seed', range(120))
+def test_point_route_matches_brute_force(seed):
+    maze_data = generate_maze(width=15, height=11, seed=seed, points=6, braid=0.6, slack=0.3 + seed % 5 * 0.2)
+    validated_result = maze_validator(maze_data=maze_data)
+    route = search_points(maze_data=maze_data, validated_result=validated_result)
+
+    assert route['exact']
+    assert route['points'] == most_points(maze_data, validated_result)
+    assert route['moves'] <= maze_data['moves']
+
+
+def test_tournament_replays_do_not_overwrite(tmp_path, maze_data, capsys):
+    (tmp_path / 'mazes' / 'sub').mkdir(parents=True)
+    save_maze(maze_data=maze_data, maze_file_path=str(tmp_path / 'mazes' / 'a.mzx'))
+    save_maze(maze_data=maze_data, maze_file_path=str(tmp_path / 'mazes' / 'sub' / 'a.mzx'))
+    (tmp_path / 'bot.py').write_text('def agent(observation):\n    return None\n\n\ndef other(observation):\n    return None\n')
+
+    agents = [str(tmp_path / 'bot.py'), str(tmp_path / 'bot.py') + ':other']
+    assert run_tournament(maze_directory=str(tmp_path / 'mazes'), agent_paths=agents, jobs=1,
+                          replay_directory=str(tmp_path / 'replays'))
+
+    assert sorted(path.name for path in (tmp_path / 'replays').iterdir()) == \
+        ['a.bot.other.rmzx', 'a.bot.rmzx', 'sub.a.bot.other.rmzx', 'sub.a.bot.rmzx']
+
+
+def test_tournament_stops_a_stuck_agent(tmp_path, maze_data):
+    save_maze(maze_data=maze_data, maze_file_path=str(tmp_path / 'a.mzx'))
+    (tmp_path / 'bot.py').write_text('def agent(observation):\n    while True:\n        pass\n')
+
+    started = time.perf_counter()
+    report = play_agent(str(tmp_path / 'a.mzx'), str(tmp_path / 'bot.py'), 0.2, str(tmp_path / 'a.rmzx'))
+
+    assert report['result'] == 'timeout' and report['steps'] == 0 and not report['errors']
+    assert time.perf_counter() - started < 5
+    assert verify_replay(replay_path=str(tmp_path / 'a.rmzx'))['valid']